@@ -0,0 +1,250 @@
+"""
+ASGI application for Mac Control.
+Serves the status and camera endpoints from one event loop through the asyncio service layer.
+
+Requests waiting on collectors, Server-Sent Events subscribers and MJPEG
+viewers are suspended coroutines rather than server threads, so one process
+can hold hundreds of idle dashboards. Run it with any ASGI server:
+
+    uvicorn app.asgi:application --port 8080
+    SERVER_MODE=asgi python serve.py
+"""
+import asyncio
+import json
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+from app.auth import (
+    _TOO_MANY_BODY, _TOO_MANY_HEADERS, _UNAUTHORIZED_BODY, _UNAUTHORIZED_HEADERS, _limiter, _verifier
+)
+from app.config import Config
+from app.services.async_services import (
+    capture_snapshot_async, get_system_status_async, list_available_cameras_async,
+    open_status_events_async, open_stream_async
+)
+from app.services.instrumentation import AUTH_REJECTIONS
+from app.services.streaming import BOUNDARY
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+Headers = List[Tuple[str, str]]
+
+
+class _Request:
+    """The parts of an HTTP scope the handlers read."""
+
+    def __init__(self, scope: Scope):
+        self.path = scope["path"]
+        self.method = scope["method"]
+        self.query = {k: v[-1] for k, v in parse_qs(scope.get("query_string", b"").decode("latin-1")).items()}
+        self.headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        client = scope.get("client")
+        self.client = client[0] if client else ""
+
+    def arg(self, name: str, type: Callable[[str], Any] = str, default: Any = None) -> Any:
+        """Get a query parameter converted with `type`, or the default if missing or invalid."""
+        value = self.query.get(name)
+        if value is None:
+            return default
+        try:
+            return type(value)
+        except ValueError:
+            return default
+
+
+def _json(body: Any, status: int = 200) -> Tuple[int, Headers, bytes]:
+    data = json.dumps(body).encode()
+    return status, [("Content-Type", "application/json")], data
+
+
+async def _send(send: Send, status: int, headers: Headers, body: bytes) -> None:
+    if status != 204 and not any(name.lower() == "content-length" for name, _ in headers):
+        headers = headers + [("Content-Length", str(len(body)))]
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _send_stream(send: Send, receive: Receive, headers: Headers, chunks: AsyncIterator[bytes]) -> None:
+    """Send a streaming body until it ends or the client disconnects."""
+    async def disconnected() -> None:
+        while (await receive())["type"] != "http.disconnect":
+            pass
+
+    watcher = asyncio.ensure_future(disconnected())
+    iterator = chunks.__aiter__()
+    try:
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers],
+        })
+        while True:
+            next_chunk = asyncio.ensure_future(iterator.__anext__())
+            done, _ = await asyncio.wait({next_chunk, watcher}, return_when=asyncio.FIRST_COMPLETED)
+            if next_chunk not in done:
+                next_chunk.cancel()
+                await asyncio.gather(next_chunk, return_exceptions=True)
+                break
+            try:
+                chunk = next_chunk.result()
+            except StopAsyncIteration:
+                break
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        if not watcher.done():
+            await send({"type": "http.response.body", "body": b""})
+    except OSError:
+        pass  # The client went away mid-write
+    finally:
+        watcher.cancel()
+        await iterator.aclose()
+        await chunks.aclose()
+
+
+def _max_apps(request: _Request) -> int:
+    """The max_apps parameter, capped at Config.MAX_APPS_DISPLAY like the Flask routes."""
+    return max(0, min(request.arg("max_apps", int, Config.MAX_APPS_DISPLAY), Config.MAX_APPS_DISPLAY))
+
+
+async def _status(request: _Request) -> Tuple[int, Headers, bytes]:
+    return _json(await get_system_status_async(max_apps=_max_apps(request)))
+
+
+async def _cameras(request: _Request) -> Tuple[int, Headers, bytes]:
+    refresh = request.arg("refresh", str, "0").lower() in ("1", "true")
+    return _json({"cameras": await list_available_cameras_async(6, refresh=refresh)})
+
+
+async def _camera(request: _Request) -> Tuple[int, Headers, bytes]:
+    width = request.arg("width", int)
+    height = request.arg("height", int)
+    if (width is not None and width <= 0) or (height is not None and height <= 0):
+        return _json({"error": "width and height must be positive"}, 400)
+    success, jpeg_bytes, error = await capture_snapshot_async(
+        request.arg("camera", int, 0), width, height, request.arg("quality", int)
+    )
+    if not success:
+        return _json({"error": error}, 500)
+    return 200, [("Content-Type", "image/jpeg"), ("Content-Disposition", "inline; filename=snapshot.jpg")], jpeg_bytes
+
+
+async def _status_events(request: _Request) -> Tuple[int, Headers, Any]:
+    last_event_id = request.headers.get("last-event-id") or request.arg("lastEventId")
+    success, stream, error = await open_status_events_async(last_event_id, _max_apps(request))
+    if not success:
+        return _json({"error": error}, 503)
+    return 200, [("Content-Type", "text/event-stream"), ("Cache-Control", "no-store"),
+                 ("X-Accel-Buffering", "no")], stream
+
+
+async def _camera_stream(request: _Request) -> Tuple[int, Headers, Any]:
+    width = request.arg("width", int)
+    height = request.arg("height", int)
+    if (width is not None and width <= 0) or (height is not None and height <= 0):
+        return _json({"error": "width and height must be positive"}, 400)
+    success, stream, error = await open_stream_async(
+        request.arg("camera", int, 0), request.arg("fps", float), width, height
+    )
+    if not success:
+        return _json({"error": error}, 503)
+    return 200, [("Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}"),
+                 ("Cache-Control", "no-store")], stream
+
+
+ROUTES = {
+    "/status": _status,
+    "/status/events": _status_events,
+    "/camera": _camera,
+    "/camera/stream": _camera_stream,
+    "/cameras": _cameras,
+}
+
+
+class MacControlASGI:
+    """
+    ASGI application serving the status and camera endpoints.
+
+    Authentication matches AuthMiddleware: the same accepted tokens, the
+    same wrong-token limiter (checked only when the token is not valid) and
+    the same pre-serialized 401/429 bodies.
+    """
+
+    def __init__(self, routes: Optional[Dict[str, Callable]] = None):
+        self.routes = ROUTES if routes is None else routes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        request = _Request(scope)
+        if request.path == "/favicon.ico":
+            # Fetched by browsers without the token; there is no icon
+            await _send(send, 204, [("Cache-Control", "public, max-age=86400")], b"")
+            return
+        token = request.headers.get("x-auth-token") or request.query.get("token")
+        if not _verifier.verify(token):
+            if _limiter.limited(request.client):
+                AUTH_REJECTIONS.inc("rate_limited")
+                await _send(send, 429, list(_TOO_MANY_HEADERS), _TOO_MANY_BODY)
+                return
+            if token:
+                _limiter.fail(request.client)
+            AUTH_REJECTIONS.inc("unauthorized")
+            await _send(send, 401, list(_UNAUTHORIZED_HEADERS), _UNAUTHORIZED_BODY)
+            return
+
+        handler = self.routes.get(request.path.rstrip("/") or "/")
+        if handler is None:
+            await _send(send, *_json({"error": "Not found"}, 404))
+            return
+        if request.method != "GET":
+            await _send(send, *_json({"error": "Method not allowed"}, 405))
+            return
+
+        status, headers, body = await handler(request)
+        if isinstance(body, bytes):
+            await _send(send, status, headers, body)
+        else:
+            await _send_stream(send, receive, headers, body)
+
+    async def _lifespan(self, receive: Receive, send: Send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                _startup()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await asyncio.get_running_loop().run_in_executor(None, _shutdown)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+def _startup() -> None:
+    """Start the background services mac-control.py starts at import."""
+    from app.services.metrics_history import get_history
+    from app.services.timelapse import start_timelapse
+
+    if Config.HISTORY_ENABLED:
+        get_history()
+    if Config.TIMELAPSE_ENABLED:
+        start_timelapse()
+
+
+def _shutdown() -> None:
+    """Stop the time-lapse recorder, release cameras and stop the sampler."""
+    from app.services.capture import release_all
+    from app.services.sampler import stop_sampler
+    from app.services.timelapse import stop_timelapse
+
+    stop_timelapse(timeout=2.0)
+    release_all(timeout=2.0)
+    stop_sampler(timeout=2.0)
+
+
+application = MacControlASGI()
@@ -0,0 +1,114 @@
+"""
+Static assets module for Mac Control application.
+Loads CSS/JS once at startup and serves them with strong ETags and long-lived cache headers.
+"""
+import hashlib
+import mimetypes
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional
+from flask import Request, Response
+
+
+def content_etag(body: bytes) -> str:
+    """
+    Strong ETag for a document that does not change while the process runs.
+
+    Args:
+        body: The document bytes
+
+    Returns:
+        str: A truncated SHA-256 of the body; compute it once, not per request
+    """
+    return hashlib.sha256(body).hexdigest()[:16]
+
+
+class Asset(NamedTuple):
+    """A static file held in memory with its content hash."""
+    body: bytes
+    etag: str
+    mimetype: str
+
+
+class StaticAssets:
+    """
+    In-memory static files addressed by their path under a directory.
+
+    URLs built with url() carry the content hash, so the browser may cache
+    them for a year: a changed file gets a new URL. Requests without the
+    matching version must revalidate, and get 304 when their ETag matches.
+    """
+
+    def __init__(self, directory: Path, max_age: int = 31536000):
+        """
+        Args:
+            directory: Directory holding the assets
+            max_age: Cache lifetime in seconds for versioned URLs
+        """
+        self.max_age = max_age
+        self._assets: Dict[str, Asset] = {}
+        directory = Path(directory)
+        if directory.is_dir():
+            for path in sorted(directory.rglob("*")):
+                if path.is_file():
+                    body = path.read_bytes()
+                    mimetype = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+                    self._assets[path.relative_to(directory).as_posix()] = Asset(
+                        body, content_etag(body), mimetype
+                    )
+
+    def url(self, filename: str) -> str:
+        """
+        Versioned URL of an asset.
+
+        Args:
+            filename: Path relative to the assets directory
+
+        Returns:
+            str: /static/<filename>?v=<content hash>
+        """
+        asset = self._assets.get(filename)
+        version = f"?v={asset.etag}" if asset is not None else ""
+        return f"/static/{filename}{version}"
+
+    def response(self, filename: str, request: Request) -> Optional[Response]:
+        """
+        Build the (possibly 304) response for an asset.
+
+        Args:
+            filename: Path relative to the assets directory
+            request: The current request, for If-None-Match and the version
+
+        Returns:
+            Response, or None if there is no such asset
+        """
+        asset = self._assets.get(filename)
+        if asset is None:
+            return None
+        response = Response(asset.body, mimetype=asset.mimetype)
+        response.set_etag(asset.etag)
+        if request.args.get("v") == asset.etag:
+            response.headers["Cache-Control"] = f"public, max-age={self.max_age}, immutable"
+        else:
+            response.headers["Cache-Control"] = "public, no-cache"
+        return response.make_conditional(request)
+
+
+def cached_document(body: bytes, mimetype: str, request: Request, etag: str,
+                    cache_control: str = "private, no-cache") -> Response:
+    """
+    Serve a prebuilt document with an ETag, answering 304 when the client already has it.
+
+    Args:
+        body: The document bytes
+        mimetype: Its content type
+        request: The current request
+        etag: ETag of the body, computed when the body was built (see content_etag)
+        cache_control: Cache-Control header value
+
+    Returns:
+        Response: 200 with the body, or 304 Not Modified
+    """
+    response = Response(body, mimetype=mimetype)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = cache_control
+    return response.make_conditional(request)
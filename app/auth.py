@@ -1,11 +1,214 @@
 """
 Authentication module for Mac Control application.
 Handles token-based authentication for API endpoints.
+
+Tokens are checked in constant time against keyed digests computed once at
+startup. AuthMiddleware rejects unauthenticated requests before Flask
+routing runs, with pre-serialized responses, and rate-limits clients that
+keep presenting wrong tokens.
 """
+import hashlib
+import hmac
+import json
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
 from functools import wraps
-from flask import request, abort, jsonify
+from typing import Callable, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs
+from flask import Response, request
 from app.config import Config
 
+# WSGI environ key set once a request's token has been verified
+AUTHENTICATED_KEY = "maccontrol.authenticated"
+
+# Per-process key, so digests of accepted tokens are never comparable across runs
+_DIGEST_KEY = os.urandom(32)
+
+
+def _digest(token: str) -> bytes:
+    return hmac.new(_DIGEST_KEY, token.encode("utf-8", "surrogateescape"), hashlib.sha256).digest()
+
+
+class TokenVerifier:
+    """
+    Constant-time check of a presented token against a set of accepted tokens.
+
+    Several tokens can be valid at once so a new token can be rolled out
+    before the old one is retired.
+    """
+
+    def __init__(self, tokens: Iterable[str]):
+        """
+        Args:
+            tokens: Accepted tokens; empty strings are ignored
+        """
+        self._digests = [_digest(token) for token in dict.fromkeys(tokens) if token]
+
+    def verify(self, token: Optional[str]) -> bool:
+        """
+        Check a presented token.
+
+        Every accepted digest is compared, so the time taken does not reveal
+        which token (if any) was close.
+        """
+        if not token:
+            return False
+        presented = _digest(token)
+        valid = False
+        for digest in self._digests:
+            valid |= hmac.compare_digest(presented, digest)
+        return valid
+
+
+class FailureLimiter:
+    """
+    Per-client token bucket charged for every wrong token presented.
+
+    A client may fail `burst` times in a row, then regains one attempt every
+    1/`rate` seconds. Buckets live in an LRU bounded by `max_clients`, so a
+    scan from many addresses cannot grow memory without limit.
+    """
+
+    def __init__(self, burst: float, rate: float, max_clients: int):
+        """
+        Args:
+            burst: Failed attempts allowed before limiting starts
+            rate: Attempts regained per second
+            max_clients: Client buckets kept before the least recently seen is dropped
+        """
+        self.burst = burst
+        self.rate = rate
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _refill(self, bucket: List[float], now: float) -> None:
+        bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+
+    def limited(self, client: str) -> bool:
+        """Whether the client has no attempts left."""
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                return False
+            self._refill(bucket, time.monotonic())
+            return bucket[0] < 1
+
+    def fail(self, client: str) -> None:
+        """Charge the client for one failed attempt."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = [float(self.burst), now]
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(client)
+                self._refill(bucket, now)
+            bucket[0] = max(0.0, bucket[0] - 1)
+
+    @property
+    def clients(self) -> int:
+        """Number of clients currently tracked."""
+        return len(self._buckets)
+
+
+def _json_body(error: str, message: str) -> bytes:
+    return json.dumps({"error": error, "message": message}).encode()
+
+
+# Rejections are the same for every request, so they are serialized once
+_UNAUTHORIZED_BODY = _json_body("Unauthorized", "Valid authentication token required")
+_UNAUTHORIZED_HEADERS = [
+    ("Content-Type", "application/json"),
+    ("Content-Length", str(len(_UNAUTHORIZED_BODY))),
+]
+_TOO_MANY_BODY = _json_body("Too Many Requests", "Too many failed authentication attempts")
+_TOO_MANY_HEADERS = [
+    ("Content-Type", "application/json"),
+    ("Content-Length", str(len(_TOO_MANY_BODY))),
+    ("Retry-After", str(max(1, math.ceil(1 / Config.AUTH_FAIL_RATE)) if Config.AUTH_FAIL_RATE > 0 else 60)),
+]
+
+_verifier = TokenVerifier([Config.AUTH_TOKEN] + Config.AUTH_TOKENS)
+_limiter = FailureLimiter(Config.AUTH_FAIL_BURST, Config.AUTH_FAIL_RATE, Config.AUTH_LIMITER_MAX_CLIENTS)
+
+
+def _token_from_environ(environ: dict) -> Optional[str]:
+    """Get the token from the X-Auth-Token header or the token query parameter."""
+    token = environ.get("HTTP_X_AUTH_TOKEN")
+    if token:
+        return token
+    query = environ.get("QUERY_STRING", "")
+    if "token=" not in query:
+        return None
+    values = parse_qs(query).get("token")
+    return values[0] if values else None
+
+
+class AuthMiddleware:
+    """
+    WSGI middleware authenticating every request before the app sees it.
+
+    Requests without a valid token get the cached 401 without reaching Flask
+    routing. The token is checked before the limiter, so a valid token is
+    always accepted; only wrong tokens are charged to the client, and a
+    client out of attempts gets the cached 429. Requests that send no token
+    at all (e.g. a browser fetching /favicon.ico) get a 401 but are not
+    charged, so they cannot lock the user out. Verified requests are marked
+    in the environ so check_token() does not verify them again.
+    """
+
+    def __init__(self, app: Callable, verifier: TokenVerifier = _verifier,
+                 limiter: FailureLimiter = _limiter, on_reject: Optional[Callable[[str], None]] = None,
+                 public_prefixes: Tuple[str, ...] = ()):
+        """
+        Args:
+            app: The wrapped WSGI application
+            verifier: Accepted-token check
+            limiter: Failed-attempt limiter
+            on_reject: Called with "unauthorized" or "rate_limited" for every rejection
+            public_prefixes: Path prefixes served without a token (e.g. static assets)
+        """
+        self.app = app
+        self.verifier = verifier
+        self.limiter = limiter
+        self.on_reject = on_reject
+        self.public_prefixes = public_prefixes
+
+    def _reject(self, start_response: Callable, status: str, headers: List[Tuple[str, str]],
+                body: bytes, reason: str) -> List[bytes]:
+        if self.on_reject is not None:
+            self.on_reject(reason)
+        start_response(status, list(headers))
+        return [body]
+
+    def __call__(self, environ: dict, start_response: Callable) -> Iterable[bytes]:
+        # CORS preflights never carry credentials
+        if environ.get("REQUEST_METHOD") == "OPTIONS":
+            return self.app(environ, start_response)
+        if self.public_prefixes and environ.get("PATH_INFO", "").startswith(self.public_prefixes):
+            return self.app(environ, start_response)
+
+        token = _token_from_environ(environ)
+        if self.verifier.verify(token):
+            environ[AUTHENTICATED_KEY] = True
+            return self.app(environ, start_response)
+
+        client = environ.get("REMOTE_ADDR", "")
+        if self.limiter.limited(client):
+            return self._reject(start_response, "429 Too Many Requests", _TOO_MANY_HEADERS,
+                                _TOO_MANY_BODY, "rate_limited")
+        if token:
+            self.limiter.fail(client)
+        return self._reject(start_response, "401 Unauthorized", _UNAUTHORIZED_HEADERS,
+                            _UNAUTHORIZED_BODY, "unauthorized")
+
 
 def check_token():
     """
@@ -14,8 +217,19 @@ def check_token():
     Returns:
         bool: True if token is valid, False otherwise
     """
-    token = request.headers.get("X-Auth-Token") or request.args.get("token")
-    return token and token == Config.AUTH_TOKEN
+    if request.environ.get(AUTHENTICATED_KEY):
+        return True
+    return _verifier.verify(request.headers.get("X-Auth-Token") or request.args.get("token"))
+
+
+def unauthorized_response():
+    """
+    Build the 401 response from the pre-serialized body.
+    
+    Returns:
+        Response: JSON 401 response
+    """
+    return Response(_UNAUTHORIZED_BODY, status=401, mimetype="application/json")
 
 
 def require_auth(f):
@@ -24,21 +238,28 @@ def require_auth(f):
     
     Args:
         f: The route function to protect
-        
+    
     Returns:
         Decorated function that checks authentication
     """
     @wraps(f)
     def decorated_function(*args, **kwargs):
         if not check_token():
-            return jsonify({
-                "error": "Unauthorized",
-                "message": "Valid authentication token required"
-            }), 401
+            return unauthorized_response()
         return f(*args, **kwargs)
     return decorated_function
 
 
+def get_limiter_stats():
+    """
+    Get failed-attempt limiter state.
+    
+    Returns:
+        Dict with the number of tracked clients and the limiter settings
+    """
+    return {"clients": _limiter.clients, "burst": _limiter.burst, "rate": _limiter.rate}
+
+
 def get_token_for_url():
     """
     Get the current authentication token for URL generation.
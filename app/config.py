@@ -14,12 +14,36 @@ class Config:
     # Security
     SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
     AUTH_TOKEN = os.environ.get('MAC_CONTROL_TOKEN', 'replace-this-token')
+    # Extra accepted tokens (comma-separated), e.g. the next token during a rotation
+    AUTH_TOKENS = [t.strip() for t in os.environ.get('MAC_CONTROL_TOKENS', '').split(',') if t.strip()]
+    # Failed-attempt limiter: burst of failures per client IP, then `rate` attempts regained per second
+    AUTH_FAIL_BURST = float(os.environ.get('AUTH_FAIL_BURST', '10'))
+    AUTH_FAIL_RATE = float(os.environ.get('AUTH_FAIL_RATE', '0.2'))
+    AUTH_LIMITER_MAX_CLIENTS = int(os.environ.get('AUTH_LIMITER_MAX_CLIENTS', '4096'))
     
     # Flask settings
     DEBUG = os.environ.get('FLASK_DEBUG', 'False').lower() == 'true'
     HOST = os.environ.get('FLASK_HOST', '0.0.0.0')
     PORT = int(os.environ.get('FLASK_PORT', '8080'))
     
+    # Production server (serve.py); keep one worker so caches and cameras are shared
+    # 'wsgi' serves mac-control.py on gunicorn threads; 'asgi' serves app/asgi.py on one event loop (uvicorn)
+    SERVER_MODE = os.environ.get('SERVER_MODE', 'wsgi').lower()
+    SERVER_WORKERS = int(os.environ.get('SERVER_WORKERS', '1'))
+    SERVER_THREADS = int(os.environ.get('SERVER_THREADS', '16'))
+    SERVER_KEEPALIVE = int(os.environ.get('SERVER_KEEPALIVE', '5'))
+    SERVER_TIMEOUT = int(os.environ.get('SERVER_TIMEOUT', '60'))
+    SERVER_GRACEFUL_TIMEOUT = int(os.environ.get('SERVER_GRACEFUL_TIMEOUT', '10'))
+    SERVER_BACKLOG = int(os.environ.get('SERVER_BACKLOG', '64'))
+    
+    # Prometheus exposition at /metrics
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True').lower() == 'true'
+    
+    # HTML views: Jinja2 templates and static CSS/JS (cached for a year via versioned URLs)
+    TEMPLATE_DIR = BASE_DIR / 'app' / 'templates'
+    STATIC_DIR = BASE_DIR / 'app' / 'static'
+    STATIC_MAX_AGE = int(os.environ.get('STATIC_MAX_AGE', str(365 * 24 * 3600)))
+    
     # Logging
     LOG_DIR = BASE_DIR / 'logs'
     LOG_FILE = LOG_DIR / 'app.log'
@@ -30,10 +54,113 @@ class Config:
     CAMERA_WARMUP_TIME = float(os.environ.get('CAMERA_WARMUP_TIME', '0.3'))
     CAMERA_RETRY_ATTEMPTS = int(os.environ.get('CAMERA_RETRY_ATTEMPTS', '5'))
     JPEG_QUALITY = int(os.environ.get('JPEG_QUALITY', '90'))
+    CAMERA_CAPTURE_WIDTH = int(os.environ.get('CAMERA_CAPTURE_WIDTH', '640'))
+    CAMERA_CAPTURE_HEIGHT = int(os.environ.get('CAMERA_CAPTURE_HEIGHT', '480'))
+    CAMERA_PYRAMID_LEVELS = int(os.environ.get('CAMERA_PYRAMID_LEVELS', '4'))
+    CAMERA_ENHANCE_MODE = os.environ.get('CAMERA_ENHANCE_MODE', 'fixed').lower()  # fixed, adaptive or off
+    CAMERA_BRIGHTNESS_STRIDE = int(os.environ.get('CAMERA_BRIGHTNESS_STRIDE', '8'))
+    
+    # Persistent capture: keep cameras open in reader threads between requests
+    CAMERA_PERSISTENT = os.environ.get('CAMERA_PERSISTENT', 'False').lower() == 'true'
+    CAMERA_IDLE_TIMEOUT = float(os.environ.get('CAMERA_IDLE_TIMEOUT', '30'))
+    CAMERA_BUFFER_FRAMES = int(os.environ.get('CAMERA_BUFFER_FRAMES', '4'))
+    CAMERA_FRAME_WAIT = float(os.environ.get('CAMERA_FRAME_WAIT', '2.0'))
+    CAMERA_INVENTORY_TTL = float(os.environ.get('CAMERA_INVENTORY_TTL', '60'))
+    CAMERA_PROBE_TIMEOUT = float(os.environ.get('CAMERA_PROBE_TIMEOUT', '3.0'))
+    CAMERA_JPEG_CACHE_BYTES = int(os.environ.get('CAMERA_JPEG_CACHE_BYTES', str(8 * 1024 * 1024)))
+    CAMERA_GRID_TILE_WIDTH = int(os.environ.get('CAMERA_GRID_TILE_WIDTH', '320'))
+    CAMERA_MULTI_MAX = int(os.environ.get('CAMERA_MULTI_MAX', '6'))
+    
+    # Motion detection against a background model (/camera/motion)
+    CAMERA_MOTION_WIDTH = int(os.environ.get('CAMERA_MOTION_WIDTH', '160'))
+    CAMERA_MOTION_FPS = float(os.environ.get('CAMERA_MOTION_FPS', '5'))
+    CAMERA_MOTION_THRESHOLD = float(os.environ.get('CAMERA_MOTION_THRESHOLD', '0.01'))
+    CAMERA_MOTION_PIXEL_DELTA = int(os.environ.get('CAMERA_MOTION_PIXEL_DELTA', '25'))
+    CAMERA_MOTION_LEARNING_RATE = float(os.environ.get('CAMERA_MOTION_LEARNING_RATE', '0.05'))
+    CAMERA_MOTION_MIN_AREA = float(os.environ.get('CAMERA_MOTION_MIN_AREA', '0.001'))
+    CAMERA_MOTION_COOLDOWN = float(os.environ.get('CAMERA_MOTION_COOLDOWN', '3'))
+    CAMERA_MOTION_MAX_EVENTS = int(os.environ.get('CAMERA_MOTION_MAX_EVENTS', '50'))
+    CAMERA_MOTION_IDLE_TIMEOUT = float(os.environ.get('CAMERA_MOTION_IDLE_TIMEOUT', '300'))
+    CAMERA_MOTION_MAX_WAIT = float(os.environ.get('CAMERA_MOTION_MAX_WAIT', '30'))
+    
+    # Time-lapse recorder: CAMERAS is comma-separated, FORMAT is jpeg or video
+    TIMELAPSE_ENABLED = os.environ.get('TIMELAPSE_ENABLED', 'False').lower() == 'true'
+    TIMELAPSE_CAMERAS = [int(c) for c in os.environ.get('TIMELAPSE_CAMERAS', '0').split(',') if c.strip()]
+    TIMELAPSE_INTERVAL = float(os.environ.get('TIMELAPSE_INTERVAL', '30'))
+    TIMELAPSE_DIR = Path(os.environ.get('TIMELAPSE_DIR', str(BASE_DIR / 'timelapse')))
+    TIMELAPSE_FORMAT = os.environ.get('TIMELAPSE_FORMAT', 'jpeg').lower()
+    TIMELAPSE_WORKERS = int(os.environ.get('TIMELAPSE_WORKERS', '2'))
+    TIMELAPSE_QUEUE_SIZE = int(os.environ.get('TIMELAPSE_QUEUE_SIZE', '8'))
+    TIMELAPSE_JPEG_QUALITY = int(os.environ.get('TIMELAPSE_JPEG_QUALITY', '85'))
+    TIMELAPSE_SEGMENT_FRAMES = int(os.environ.get('TIMELAPSE_SEGMENT_FRAMES', '240'))
+    TIMELAPSE_VIDEO_FPS = float(os.environ.get('TIMELAPSE_VIDEO_FPS', '24'))
+    TIMELAPSE_VIDEO_CODEC = os.environ.get('TIMELAPSE_VIDEO_CODEC', 'mp4v')
+    
+    # MJPEG streaming; every viewer holds a server thread (see STATUS_EVENTS_MAX_SUBSCRIBERS)
+    STREAM_MAX_VIEWERS = int(os.environ.get('STREAM_MAX_VIEWERS', str(max(1, SERVER_THREADS // 4))))
+    STREAM_DEFAULT_FPS = float(os.environ.get('STREAM_DEFAULT_FPS', '10'))
+    STREAM_MAX_FPS = float(os.environ.get('STREAM_MAX_FPS', '30'))
+    STREAM_JPEG_QUALITY = int(os.environ.get('STREAM_JPEG_QUALITY', '70'))
     
     # System settings
     MAX_APPS_DISPLAY = int(os.environ.get('MAX_APPS_DISPLAY', '10'))
     
+    # Status sampler settings (refresh intervals in seconds)
+    STATUS_SAMPLER_ENABLED = os.environ.get('STATUS_SAMPLER_ENABLED', 'True').lower() == 'true'
+    STATUS_SAMPLER_WAIT = float(os.environ.get('STATUS_SAMPLER_WAIT', '5'))
+    STATUS_INTERVAL_HOSTNAME = float(os.environ.get('STATUS_INTERVAL_HOSTNAME', '300'))
+    STATUS_INTERVAL_MEMORY = float(os.environ.get('STATUS_INTERVAL_MEMORY', '2'))
+    STATUS_INTERVAL_STORAGE = float(os.environ.get('STATUS_INTERVAL_STORAGE', '30'))
+    STATUS_INTERVAL_BATTERY = float(os.environ.get('STATUS_INTERVAL_BATTERY', '15'))
+    STATUS_INTERVAL_APPS = float(os.environ.get('STATUS_INTERVAL_APPS', '5'))
+    
+    # Server-Sent Events push channel for status changes. Each subscriber holds a server
+    # thread, so by default subscribers and stream viewers together take at most half of
+    # SERVER_THREADS and the rest stay free for ordinary requests
+    STATUS_EVENTS_MAX_SUBSCRIBERS = int(os.environ.get('STATUS_EVENTS_MAX_SUBSCRIBERS', str(max(1, SERVER_THREADS // 4))))
+    STATUS_EVENTS_HEARTBEAT = float(os.environ.get('STATUS_EVENTS_HEARTBEAT', '15'))
+    STATUS_EVENTS_MIN_INTERVAL = float(os.environ.get('STATUS_EVENTS_MIN_INTERVAL', '0.5'))
+    STATUS_EVENTS_RETRY_MS = int(os.environ.get('STATUS_EVENTS_RETRY_MS', '3000'))
+    STATUS_EVENTS_LOG_SIZE = int(os.environ.get('STATUS_EVENTS_LOG_SIZE', '256'))
+    
+    # Metric history ring buffers: comma-separated step_seconds:slots tiers
+    HISTORY_ENABLED = os.environ.get('HISTORY_ENABLED', 'True').lower() == 'true'
+    HISTORY_TIERS = os.environ.get('HISTORY_TIERS', '1:600,60:1440,900:2880')
+    HISTORY_MAX_POINTS = int(os.environ.get('HISTORY_MAX_POINTS', '500'))
+    
+    # On-disk metric log so history survives restarts (limits are per metric)
+    HISTORY_LOG_ENABLED = os.environ.get('HISTORY_LOG_ENABLED', 'True').lower() == 'true'
+    HISTORY_LOG_DIR = Path(os.environ.get('HISTORY_LOG_DIR', str(LOG_DIR / 'metrics')))
+    HISTORY_LOG_SEGMENT_BYTES = int(os.environ.get('HISTORY_LOG_SEGMENT_BYTES', str(4 * 1024 * 1024)))
+    HISTORY_LOG_MAX_BYTES = int(os.environ.get('HISTORY_LOG_MAX_BYTES', str(64 * 1024 * 1024)))
+    
+    # In-process process table (/status/processes)
+    PROCESS_SCAN_MIN_INTERVAL = float(os.environ.get('PROCESS_SCAN_MIN_INTERVAL', '1'))
+    PROCESS_TOP_MAX = int(os.environ.get('PROCESS_TOP_MAX', '100'))
+    PROCESS_EVENTS_LOG_SIZE = int(os.environ.get('PROCESS_EVENTS_LOG_SIZE', '1024'))
+    
+    # Collector cache TTLs in seconds ('inf' never expires, 0 disables caching)
+    STATUS_TTL_HOSTNAME = float(os.environ.get('STATUS_TTL_HOSTNAME', 'inf'))
+    STATUS_TTL_MEMORY_TOTAL = float(os.environ.get('STATUS_TTL_MEMORY_TOTAL', 'inf'))
+    STATUS_TTL_MEMORY = float(os.environ.get('STATUS_TTL_MEMORY', '1'))
+    STATUS_TTL_STORAGE = float(os.environ.get('STATUS_TTL_STORAGE', '30'))
+    STATUS_TTL_BATTERY = float(os.environ.get('STATUS_TTL_BATTERY', '15'))
+    STATUS_TTL_APPS = float(os.environ.get('STATUS_TTL_APPS', '5'))
+    
+    # Concurrent collection settings
+    STATUS_CONCURRENT = os.environ.get('STATUS_CONCURRENT', 'True').lower() == 'true'
+    STATUS_COLLECTOR_TIMEOUT = float(os.environ.get('STATUS_COLLECTOR_TIMEOUT', '2.0'))
+    STATUS_COLLECTOR_WORKERS = int(os.environ.get('STATUS_COLLECTOR_WORKERS', '8'))
+    STATUS_SUBPROCESS_TIMEOUT = float(os.environ.get('STATUS_SUBPROCESS_TIMEOUT', '10'))
+    
+    # Async service layer (app/asgi.py): threads for blocking OpenCV calls
+    ASYNC_CV_WORKERS = int(os.environ.get('ASYNC_CV_WORKERS', '2'))
+    # Open SSE and MJPEG streams in the ASGI app; each is a coroutine, not a thread
+    ASYNC_MAX_STREAMS = int(os.environ.get('ASYNC_MAX_STREAMS', '512'))
+    
+    # Collector backend: 'auto' reads memory/storage in-process, 'subprocess' forks top/df
+    STATUS_COLLECTOR_BACKEND = os.environ.get('STATUS_COLLECTOR_BACKEND', 'auto').lower()
+    
     @staticmethod
     def init_app():
         """Initialize application directories and settings."""
@@ -1,15 +1,29 @@
 """
 Services package initialization.
 """
-from .system_status import get_system_status, get_hostname
+from .system_status import get_system_status, get_hostname, get_cache_stats
 from .camera import capture_snapshot, list_available_cameras
+from .multicam import capture_grid, capture_multipart
 from .system_actions import lock_screen, restart_system
+from .sampler import get_sampled_status, get_sampler
+from .status_events import open_status_events
+from .metrics_history import query_history
+from .processes import get_top_processes, get_process_changes
 
 __all__ = [
     'get_system_status',
     'get_hostname',
+    'get_cache_stats',
+    'get_sampled_status',
+    'get_sampler',
+    'open_status_events',
+    'query_history',
+    'get_top_processes',
+    'get_process_changes',
     'capture_snapshot',
     'list_available_cameras',
+    'capture_grid',
+    'capture_multipart',
     'lock_screen',
     'restart_system'
 ]
@@ -0,0 +1,448 @@
+"""
+Asyncio service module.
+Async variants of the status and camera services for event-loop based servers.
+
+Subprocess collectors run through asyncio.create_subprocess_exec, so waiting
+on them holds no thread. OpenCV work is blocking C code and runs on a small
+bounded executor instead of one thread per request.
+"""
+import asyncio
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from app.config import Config
+from app.services import system_status as _status
+from app.services.camera import _encode_cached, capture_snapshot, list_available_cameras
+from app.services.capture import get_session
+from app.services.instrumentation import (
+    SUBPROCESS_FAILURES, SUBPROCESS_SPAWNS, collector_failed, timed_collector
+)
+from app.services.native_metrics import get_backend
+from app.services.sampler import get_sampler
+from app.services.status_events import _format_event, get_broadcaster
+from app.services.streaming import BOUNDARY
+
+
+async def run_command(cmd: List[str], timeout: Optional[float] = None) -> str:
+    """
+    Run a command without blocking the event loop.
+
+    Args:
+        cmd: The command and its arguments
+        timeout: Seconds before the process is killed (defaults to Config.STATUS_SUBPROCESS_TIMEOUT)
+
+    Returns:
+        str: Combined stdout and stderr without the trailing newline
+
+    Raises:
+        OSError: If the command cannot be started
+        asyncio.TimeoutError: If the command outlives the timeout
+    """
+    if timeout is None:
+        timeout = Config.STATUS_SUBPROCESS_TIMEOUT
+    SUBPROCESS_SPAWNS.inc(cmd[0])
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT
+        )
+    except OSError:
+        SUBPROCESS_FAILURES.inc(cmd[0])
+        raise
+    try:
+        stdout, _ = await asyncio.wait_for(proc.communicate(), timeout)
+    except asyncio.TimeoutError:
+        SUBPROCESS_FAILURES.inc(cmd[0])
+        proc.kill()
+        await proc.wait()
+        raise
+    output = stdout.decode(errors="replace")
+    return output[:-1] if output.endswith("\n") else output
+
+
+class AsyncTTLCache:
+    """
+    Event-loop TTL cache where concurrent misses await one shared refresh task.
+
+    Like TTLCache, but waiters await instead of blocking a thread. Instances
+    must only be used from the loop they were first used on.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[Any, Optional[float]]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    async def get(self, key: str, loader: Callable[[], Awaitable[Any]], ttl: Optional[float]) -> Any:
+        """
+        Get a cached value, awaiting the loader if missing or expired.
+
+        Args:
+            key: Cache key
+            loader: Coroutine function producing a fresh value
+            ttl: Seconds a value stays fresh; None or inf never expires, 0 disables caching
+
+        Returns:
+            The cached or freshly loaded value
+        """
+        entry = self._entries.get(key)
+        if entry is not None and (entry[1] is None or time.monotonic() < entry[1]):
+            return entry[0]
+
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key, loader, ttl))
+            self._tasks[key] = task
+        # Shield so one cancelled caller does not cancel the shared refresh
+        return await asyncio.shield(task)
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[Any]], ttl: Optional[float]) -> Any:
+        try:
+            value = await loader()
+            if ttl is None or ttl > 0:
+                expires = None if ttl is None or ttl == float("inf") else time.monotonic() + ttl
+                self._entries[key] = (value, expires)
+            return value
+        finally:
+            self._tasks.pop(key, None)
+
+    def peek(self, key: str, default: Any = None) -> Any:
+        """Get the last loaded value for a key, even if expired."""
+        entry = self._entries.get(key)
+        return entry[0] if entry is not None else default
+
+
+_cache = AsyncTTLCache()
+
+# Bounded pool for blocking OpenCV work, created on first use
+_cv_executor: Optional[ThreadPoolExecutor] = None
+_cv_executor_lock = threading.Lock()
+
+
+def _get_cv_executor() -> ThreadPoolExecutor:
+    """Get the shared OpenCV worker pool."""
+    global _cv_executor
+    if _cv_executor is None:
+        with _cv_executor_lock:
+            if _cv_executor is None:
+                _cv_executor = ThreadPoolExecutor(
+                    max_workers=Config.ASYNC_CV_WORKERS, thread_name_prefix="async-opencv"
+                )
+    return _cv_executor
+
+
+@timed_collector("hostname")
+async def _read_hostname() -> str:
+    try:
+        return await run_command(_status.HOSTNAME_CMD)
+    except Exception:
+        collector_failed("hostname", "unknown")
+        return "Unknown"
+
+
+async def _read_total_memory() -> int:
+    return int(await run_command(_status.MEMSIZE_CMD))
+
+
+@timed_collector("memory")
+async def _read_memory_info() -> Dict[str, Any]:
+    backend = get_backend()
+    if backend is not None:
+        try:
+            # In-process reads take microseconds; no need to leave the loop
+            return _status._format_memory(backend.memory())
+        except (OSError, KeyError, ValueError):
+            collector_failed("memory", "fallback")
+    try:
+        total = await _cache.get("memory_total", _read_total_memory, Config.STATUS_TTL_MEMORY_TOTAL)
+    except Exception:
+        total = None
+    try:
+        top_output = await run_command(_status.TOP_CMD)
+    except Exception:
+        top_output = ""
+    if total is None or "PhysMem" not in top_output:
+        collector_failed("memory", "unknown")
+    return _status._parse_memory(top_output, total)
+
+
+@timed_collector("storage")
+async def _read_storage_info() -> Dict[str, Any]:
+    backend = get_backend()
+    if backend is not None:
+        try:
+            return _status._format_storage(backend.storage("/"))
+        except OSError:
+            collector_failed("storage", "fallback")
+    try:
+        storage = _status._parse_storage(await run_command(_status.DF_CMD))
+    except Exception:
+        storage = _status._unknown("storage")
+    if storage == _status._UNKNOWN["storage"]:
+        collector_failed("storage", "unknown")
+    return storage
+
+
+@timed_collector("battery")
+async def _read_battery_info() -> Dict[str, str]:
+    try:
+        battery = _status._parse_battery(await run_command(_status.PMSET_CMD))
+    except Exception:
+        battery = _status._unknown("battery")
+    if battery == _status._UNKNOWN["battery"]:
+        collector_failed("battery", "unknown")
+    return battery
+
+
+@timed_collector("running_apps")
+async def _read_running_apps() -> List[str]:
+    try:
+        return _status._parse_running_apps(await run_command(_status.APPS_CMD))
+    except Exception:
+        collector_failed("running_apps", "unknown")
+        return []
+
+
+# Async collectors and the Config TTL attribute for each status field
+_COLLECTORS = {
+    "hostname": (_read_hostname, "STATUS_TTL_HOSTNAME"),
+    "memory": (_read_memory_info, "STATUS_TTL_MEMORY"),
+    "storage": (_read_storage_info, "STATUS_TTL_STORAGE"),
+    "battery": (_read_battery_info, "STATUS_TTL_BATTERY"),
+    "running_apps": (_read_running_apps, "STATUS_TTL_APPS"),
+}
+
+
+async def get_system_status_async(max_apps: int = 10, timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Get complete system status information without blocking the event loop.
+
+    Collectors run concurrently behind a per-field TTL cache. A collector that
+    misses the timeout keeps running and fills the cache; the response serves
+    its last value (or Unknown) and lists it under "stale".
+
+    Args:
+        max_apps: Maximum number of apps to include
+        timeout: Per-collector timeout in seconds (defaults to Config.STATUS_COLLECTOR_TIMEOUT)
+
+    Returns:
+        Dict containing all system information
+    """
+    if timeout is None:
+        timeout = Config.STATUS_COLLECTOR_TIMEOUT
+
+    async def collect(name: str) -> Any:
+        loader, ttl_attr = _COLLECTORS[name]
+        return await _cache.get(name, loader, getattr(Config, ttl_attr))
+
+    names = list(_COLLECTORS)
+    results = await asyncio.gather(
+        *(asyncio.wait_for(collect(name), timeout) for name in names),
+        return_exceptions=True
+    )
+
+    status: Dict[str, Any] = {"status": "ok"}
+    stale: Dict[str, str] = {}
+    for name, result in zip(names, results):
+        if isinstance(result, BaseException):
+            status[name] = _cache.peek(name, _status._unknown(name))
+            stale[name] = "timeout" if isinstance(result, asyncio.TimeoutError) else "error"
+        else:
+            status[name] = result
+
+    status["running_apps"] = status["running_apps"][:max_apps]
+    if stale:
+        status["stale"] = stale
+    return status
+
+
+async def capture_snapshot_async(camera_id: int = 0, width: Optional[int] = None, height: Optional[int] = None,
+                                 quality: Optional[int] = None) -> Tuple[bool, Optional[bytes], Optional[str]]:
+    """
+    Capture a snapshot on the bounded OpenCV executor.
+
+    Args:
+        camera_id: The camera index to use
+        width: Output width
+        height: Output height
+        quality: JPEG quality
+
+    Returns:
+        Tuple of (success, jpeg_bytes, error_message)
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_cv_executor(), capture_snapshot, camera_id, width, height, None, quality)
+
+
+async def list_available_cameras_async(max_cameras: int = 6, refresh: bool = False) -> List[Dict[str, Any]]:
+    """
+    Detect available cameras on the bounded OpenCV executor.
+
+    Args:
+        max_cameras: Maximum number of camera indices to check
+        refresh: Probe again instead of using the cached inventory
+
+    Returns:
+        List of dictionaries containing camera information
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_cv_executor(), list_available_cameras, max_cameras, refresh)
+
+
+# Open SSE and MJPEG streams; each is a suspended coroutine, not a thread
+_streams = 0
+
+
+def _acquire_stream() -> bool:
+    global _streams
+    if _streams >= Config.ASYNC_MAX_STREAMS:
+        return False
+    _streams += 1
+    return True
+
+
+def _release_stream() -> None:
+    global _streams
+    _streams -= 1
+
+
+class _AsyncStream:
+    """
+    Async iterable response body holding one stream slot.
+
+    aclose() frees the slot even if the body was never iterated.
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes]):
+        self._chunks = chunks
+        self._closed = False
+
+    def __aiter__(self) -> AsyncIterator[bytes]:
+        return self._iterate()
+
+    async def _iterate(self) -> AsyncIterator[bytes]:
+        try:
+            async for chunk in self._chunks:
+                yield chunk
+        finally:
+            await self.aclose()
+
+    async def aclose(self) -> None:
+        if not self._closed:
+            self._closed = True
+            await self._chunks.aclose()
+            _release_stream()
+
+
+async def _status_events(last_event_id: Optional[int], max_apps: int) -> AsyncIterator[bytes]:
+    broadcaster = get_broadcaster()
+    heartbeat = Config.STATUS_EVENTS_HEARTBEAT
+    poll = max(Config.STATUS_EVENTS_MIN_INTERVAL, 0.05)
+
+    event_id, full, fields = broadcaster.changes_since(last_event_id)
+    yield _format_event("snapshot" if full else "delta", broadcaster.format_id(event_id), fields,
+                        max_apps, retry=Config.STATUS_EVENTS_RETRY_MS)
+    idle = 0.0
+    while True:
+        # Checking the change counter is cheap, so polling it costs less than a thread per client
+        await asyncio.sleep(poll)
+        if broadcaster.last_id == event_id:
+            idle += poll
+            if idle >= heartbeat:
+                yield b": keepalive\n\n"
+                idle = 0.0
+            continue
+        event_id, full, fields = broadcaster.changes_since(event_id)
+        yield _format_event("snapshot" if full else "delta", broadcaster.format_id(event_id), fields, max_apps)
+        idle = 0.0
+
+
+async def open_status_events_async(last_event_id: Optional[str] = None, max_apps: int = 10
+                                   ) -> Tuple[bool, Optional[AsyncIterator[bytes]], Optional[str]]:
+    """
+    Open a Server-Sent Events stream of status changes on the event loop.
+
+    Same messages as open_status_events(), but an idle subscriber is a
+    suspended coroutine instead of a server thread.
+
+    Args:
+        last_event_id: The Last-Event-ID sent by a reconnecting client
+        max_apps: Maximum number of apps to include
+
+    Returns:
+        Tuple of (success, async iterable of SSE body chunks, error_message)
+    """
+    if not _acquire_stream():
+        return False, None, f"Stream limit ({Config.ASYNC_MAX_STREAMS}) reached"
+    last_event_id = get_broadcaster().parse_id(last_event_id)
+    if last_event_id is None:
+        # A new client needs every field, so wait for the sampler's first pass
+        sampler = get_sampler()
+        deadline = time.monotonic() + Config.STATUS_SAMPLER_WAIT
+        while len(sampler.snapshot()) < len(_status.COLLECTORS) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+    return True, _AsyncStream(_status_events(last_event_id, max_apps)), None
+
+
+async def _mjpeg(camera_id: int, fps: float, size: Optional[Tuple[Optional[int], Optional[int]]]) -> AsyncIterator[bytes]:
+    loop = asyncio.get_running_loop()
+    session = get_session(camera_id)
+    interval = 1.0 / fps
+    last_seq = 0
+    next_due = time.monotonic()
+    while session.alive:
+        frame = session.latest()
+        if frame is not None and frame.seq != last_seq:
+            last_seq = frame.seq
+            # Viewers of the same frame and size share one encode through the JPEG cache
+            jpeg = await loop.run_in_executor(
+                _get_cv_executor(), _encode_cached, camera_id, frame, Config.STREAM_JPEG_QUALITY, size
+            )
+            if jpeg is not None:
+                yield (
+                    f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n\r\n".encode()
+                    + jpeg + b"\r\n"
+                )
+        next_due = max(next_due + interval, time.monotonic())
+        await asyncio.sleep(next_due - time.monotonic())
+
+
+async def open_stream_async(camera_id: int = 0, fps: Optional[float] = None, width: Optional[int] = None,
+                            height: Optional[int] = None) -> Tuple[bool, Optional[AsyncIterator[bytes]], Optional[str]]:
+    """
+    Open an MJPEG stream for a camera on the event loop.
+
+    The camera's capture session keeps its one reader thread; each viewer
+    is a coroutine that takes the newest frame at its own rate, and
+    encoding runs on the bounded OpenCV executor.
+
+    Args:
+        camera_id: The camera index to stream
+        fps: Maximum frames per second for this viewer (defaults to Config.STREAM_DEFAULT_FPS,
+            which also replaces NaN and infinities)
+        width: Output width; the height follows the aspect ratio if not given
+        height: Output height; the width follows the aspect ratio if not given
+
+    Returns:
+        Tuple of (success, async iterable of multipart body chunks, error_message)
+    """
+    if fps is None or not math.isfinite(fps):
+        fps = Config.STREAM_DEFAULT_FPS  # NaN would reach asyncio.sleep() in the frame loop
+    fps = min(max(fps, 0.1), Config.STREAM_MAX_FPS)
+
+    session = get_session(camera_id)
+    deadline = time.monotonic() + Config.CAMERA_FRAME_WAIT
+    while session.latest() is None and session.alive and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+    if session.latest() is None:
+        return False, None, session.error or f"No frame from camera {camera_id} within {Config.CAMERA_FRAME_WAIT}s"
+
+    if not _acquire_stream():
+        return False, None, f"Stream limit ({Config.ASYNC_MAX_STREAMS}) reached"
+    size = (width, height) if width or height else None
+    return True, _AsyncStream(_mjpeg(camera_id, fps, size)), None
+
+
+def get_async_stream_count() -> int:
+    """Number of open async SSE and MJPEG streams."""
+    return _streams
@@ -0,0 +1,255 @@
+"""
+Cache module for Mac Control services.
+Provides a per-key TTL cache and a byte-budgeted LRU, both sharing a single in-flight load between concurrent misses.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class _Flight:
+    """A refresh in progress that other callers can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class TTLCache:
+    """
+    Thread-safe TTL cache with stampede protection.
+
+    Each key carries its own TTL, passed on every lookup so it can be tuned at
+    runtime. When a key is missing or expired, the first caller runs the
+    loader and every concurrent caller for that key waits on the same result
+    instead of running the loader again.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Hashable, tuple] = {}
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._stats: Dict[Hashable, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def _count(self, key: Hashable, counter: str) -> None:
+        """Increment a counter for a key; caller must hold the lock."""
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = {"hits": 0, "misses": 0, "waits": 0, "refreshes": 0, "errors": 0}
+        stats[counter] += 1
+
+    def get(self, key: Hashable, loader: Callable[[], Any], ttl: Optional[float],
+            wait: Optional[float] = None) -> Any:
+        """
+        Get a cached value, loading it if missing or expired.
+
+        Args:
+            key: Cache key
+            loader: Function producing a fresh value
+            ttl: Seconds a value stays fresh; None or inf never expires, 0 disables caching
+            wait: Seconds to wait for another caller's load of the same key (None waits indefinitely)
+
+        Returns:
+            The cached or freshly loaded value
+
+        Raises:
+            TimeoutError: If another caller's load did not finish within `wait`
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[1] is None or now < entry[1]):
+                self._count(key, "hits")
+                return entry[0]
+
+            flight = self._flights.get(key)
+            if flight is not None:
+                self._count(key, "waits")
+                leader = False
+            else:
+                self._count(key, "misses")
+                flight = self._flights[key] = _Flight()
+                leader = True
+
+        if not leader:
+            if not flight.done.wait(wait):
+                raise TimeoutError(f"Load of {key!r} still in progress after {wait}s")
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader()
+        except BaseException as e:
+            flight.error = e
+            with self._lock:
+                self._count(key, "errors")
+            raise
+        else:
+            expires = None if ttl is None or ttl == float("inf") else time.monotonic() + ttl
+            with self._lock:
+                self._count(key, "refreshes")
+                if ttl is None or ttl > 0:
+                    self._entries[key] = (flight.value, expires)
+            return flight.value
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def in_flight(self, key: Hashable) -> Optional[_Flight]:
+        """
+        Get the load currently running for a key, if any.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The in-flight load (wait on its `done` event, then read `value`
+            or `error`), or None if no load is running
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self._count(key, "waits")
+            return flight
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Get the last loaded value for a key without loading, even if expired.
+
+        Args:
+            key: Cache key
+            default: Value to return when nothing was ever loaded
+
+        Returns:
+            The last loaded value or the default
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry[0] if entry is not None else default
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """
+        Drop a cached value so the next lookup reloads it.
+
+        Args:
+            key: The key to drop, or None to clear everything
+        """
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> Dict[Hashable, Dict[str, int]]:
+        """
+        Get hit/miss/wait/refresh/error counters per key.
+
+        Returns:
+            Dict mapping each key to a copy of its counters
+        """
+        with self._lock:
+            return {key: dict(counters) for key, counters in self._stats.items()}
+
+
+class ByteBudgetLRU:
+    """
+    Thread-safe LRU cache of byte strings bounded by their total size.
+
+    Concurrent misses for the same key share one in-flight load, like
+    TTLCache. Loaders may return None to signal a failure that should not
+    be cached.
+    """
+
+    def __init__(self, max_bytes: int):
+        """
+        Args:
+            max_bytes: Upper bound on the summed size of cached values
+        """
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._bytes = 0
+        self._stats = {"hits": 0, "misses": 0, "waits": 0, "evictions": 0}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, loader: Callable[[], Optional[bytes]]) -> Optional[bytes]:
+        """
+        Get cached bytes, loading them on a miss.
+
+        Args:
+            key: Cache key
+            loader: Function producing the bytes, or None on failure
+
+        Returns:
+            The cached or freshly loaded bytes, or None if loading failed
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return value
+
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                self._stats["misses"] += 1
+                flight = self._flights[key] = _Flight()
+            else:
+                self._stats["waits"] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader()
+        except BaseException as e:
+            flight.error = e
+            raise
+        else:
+            if flight.value is not None:
+                self._put(key, flight.value)
+            return flight.value
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def _put(self, key: Hashable, value: bytes) -> None:
+        """Insert a value and evict least recently used entries over budget."""
+        size = len(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._entries[key] = value
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self._stats["evictions"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters and occupancy.
+
+        Returns:
+            Dict with hits, misses, waits, evictions, entries, bytes and hit_rate
+        """
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+        lookups = stats["hits"] + stats["misses"] + stats["waits"]
+        # A wait shares someone else's encode, so it counts as a hit
+        stats["hit_rate"] = round((stats["hits"] + stats["waits"]) / lookups, 4) if lookups else 0.0
+        return stats
@@ -3,110 +3,310 @@ Camera service module.
 Handles camera operations including snapshot capture and camera detection.
 """
 import io
+import itertools
+import threading
 import time
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Hashable, List, Optional, Tuple
 import cv2
 import numpy as np
 from app.config import Config
+from app.services.cache import ByteBudgetLRU
+from app.services.camera_inventory import get_inventory
+from app.services.capture import CaptureSession, Frame, active_sessions, get_session, open_device
+from app.services.enhance import enhance_frame
+from app.services.instrumentation import CAMERA_STAGE_SECONDS, register_cache_stats
+from app.services.pyramid import FramePyramid, Rect, fit_view
 
+# Encoded JPEGs keyed by (camera_id, frame seq, frame timestamp, quality, (width, height), crop),
+# so requests for the same frame and parameters share one encode. Sequence numbers
+# restart with every capture session, so the timestamp tells sessions apart.
+_jpeg_cache = ByteBudgetLRU(Config.CAMERA_JPEG_CACHE_BYTES)
+register_cache_stats(lambda: {"jpeg": _jpeg_cache.stats()})
 
-def capture_snapshot(camera_id: int = 0) -> Tuple[bool, Optional[bytes], Optional[str]]:
+# One pyramid per camera; its buffers are reused for every frame of that camera
+_pyramids: Dict[int, FramePyramid] = {}
+_pyramids_lock = threading.Lock()
+_oneshot_keys = itertools.count(1)
+
+
+def _encode_frame(frame: np.ndarray, quality: Optional[int] = None,
+                  inplace: bool = False) -> Tuple[bool, Optional[bytes], Optional[str]]:
+    """
+    Enhance a frame if it is too dark and encode it to JPEG.
+    
+    Args:
+        frame: BGR image as captured
+        quality: JPEG quality (defaults to Config.JPEG_QUALITY)
+        inplace: Allow enhancement to overwrite `frame`; only for frames the caller owns
+        
+    Returns:
+        Tuple of (success, jpeg_bytes, error_message)
+    """
+    # Enhance image if it's too dark
+    with CAMERA_STAGE_SECONDS.time("enhance"):
+        frame = enhance_frame(frame, inplace=inplace)
+    
+    # Encode to JPEG
+    if quality is None:
+        quality = Config.JPEG_QUALITY
+    encode_params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+    with CAMERA_STAGE_SECONDS.time("encode"):
+        ret, jpeg = cv2.imencode('.jpg', frame, encode_params)
+    
+    if not ret:
+        return False, None, "JPEG encoding failed"
+    
+    return True, jpeg.tobytes(), None
+
+
+def _get_pyramid(camera_id: int) -> FramePyramid:
+    """Get the camera's frame pyramid, creating it on first use."""
+    with _pyramids_lock:
+        pyramid = _pyramids.get(camera_id)
+        if pyramid is None:
+            pyramid = _pyramids[camera_id] = FramePyramid(Config.CAMERA_PYRAMID_LEVELS)
+        return pyramid
+
+
+def _encode_view(camera_id: int, key: Hashable, image: np.ndarray, quality: int, crop: Rect,
+                 size: Tuple[int, int], owned: bool = False) -> Optional[bytes]:
+    """
+    Encode a frame, or a resized/cropped view of it, to JPEG.
+    
+    Views are rendered from the camera's pyramid into reused buffers, which
+    are enhanced in place and encoded while the pyramid is locked.
+    
+    Args:
+        camera_id: The camera the frame came from
+        key: Identifies the frame, so pyramid levels are shared between its views
+        image: The full-resolution frame
+        quality: JPEG quality
+        crop: Source region from fit_view()
+        size: Output (width, height) from fit_view()
+        owned: The caller owns `image`, so the full view may be enhanced in place
+        
+    Returns:
+        JPEG bytes, or None if encoding failed
+    """
+    if crop == (0, 0, image.shape[1], image.shape[0]) and size == crop[2:]:
+        ok, jpeg, _ = _encode_frame(image, quality, inplace=owned)
+        return jpeg if ok else None
+    
+    pyramid = _get_pyramid(camera_id)
+    with pyramid.lock:
+        pyramid.set_frame(key, image)
+        with CAMERA_STAGE_SECONDS.time("resize"):
+            view = pyramid.render(crop, size)
+        ok, jpeg, _ = _encode_frame(view, quality, inplace=True)
+    return jpeg if ok else None
+
+
+def _clamp_quality(quality: Optional[int]) -> int:
+    """Clamp a requested JPEG quality to 1-100, defaulting to Config.JPEG_QUALITY."""
+    return Config.JPEG_QUALITY if quality is None else min(max(int(quality), 1), 100)
+
+
+def _encode_cached(camera_id: int, frame: Frame, quality: Optional[int] = None,
+                   size: Optional[Tuple[int, int]] = None, crop: Optional[Rect] = None) -> Optional[bytes]:
+    """
+    Encode a session frame, reusing the cached JPEG for the same frame and parameters.
+    
+    Args:
+        camera_id: The camera the frame came from
+        frame: The buffered frame
+        quality: JPEG quality (defaults to Config.JPEG_QUALITY)
+        size: Output (width, height); defaults to the (cropped) frame's own size
+        crop: Source region (x, y, width, height); defaults to the whole frame
+        
+    Returns:
+        JPEG bytes, or None if encoding failed
+    """
+    quality = _clamp_quality(quality)
+    src_size = (frame.image.shape[1], frame.image.shape[0])
+    rect, size = fit_view(src_size, *(size or (None, None)), crop)
+    
+    def encode() -> Optional[bytes]:
+        # The buffered frame is shared, so only pyramid buffers are enhanced in place
+        return _encode_view(camera_id, (frame.seq, frame.timestamp), frame.image, quality, rect, size)
+    
+    return _jpeg_cache.get((camera_id, frame.seq, frame.timestamp, quality, size, rect), encode)
+
+
+def get_jpeg_cache_stats() -> Dict[str, any]:
+    """
+    Get encoded-JPEG cache counters.
+    
+    Returns:
+        Dict with hits, misses, waits, evictions, entries, bytes and hit_rate
+    """
+    return _jpeg_cache.stats()
+
+
+def _frame_version(session: CaptureSession, frame: Frame, quality: Optional[int] = None,
+                   width: Optional[int] = None, height: Optional[int] = None,
+                   crop: Optional[Rect] = None) -> str:
+    """Identify a session frame together with the encode settings."""
+    rect, size = fit_view((frame.image.shape[1], frame.image.shape[0]), width, height, crop)
+    view = f"{size[0]}x{size[1]}+{rect[0]}+{rect[1]}+{rect[2]}x{rect[3]}"
+    return f"{session.camera_id}.{session.epoch}.{frame.seq}.{_clamp_quality(quality)}.{view}"
+
+
+def get_snapshot_version(camera_id: int, width: Optional[int] = None, height: Optional[int] = None,
+                         crop: Optional[Rect] = None, quality: Optional[int] = None) -> Optional[str]:
+    """
+    Get the version of the frame a snapshot would return right now.
+    
+    Only persistent sessions number their frames, so this is None without
+    Config.CAMERA_PERSISTENT or before the camera's session is running.
+    
+    Args:
+        camera_id: The camera index
+        width: Requested output width
+        height: Requested output height
+        crop: Requested source region (x, y, width, height)
+        quality: Requested JPEG quality
+        
+    Returns:
+        The frame version, or None if unknown
+    """
+    if not Config.CAMERA_PERSISTENT:
+        return None
+    session = active_sessions().get(camera_id)
+    frame = session.latest() if session is not None else None
+    return _frame_version(session, frame, quality, width, height, crop) if frame is not None else None
+
+
+def _capture_from_session(camera_id: int, width: Optional[int] = None, height: Optional[int] = None,
+                          crop: Optional[Rect] = None,
+                          quality: Optional[int] = None) -> Tuple[bool, Optional[bytes], Optional[str], Optional[str]]:
+    """
+    Take the newest frame from the camera's persistent capture session.
+    
+    Args:
+        camera_id: The camera index to use
+        width: Output width
+        height: Output height
+        crop: Source region (x, y, width, height)
+        quality: JPEG quality
+        
+    Returns:
+        Tuple of (success, jpeg_bytes, error_message, frame_version)
+    """
+    try:
+        session = get_session(camera_id)
+        frame = session.latest(timeout=Config.CAMERA_FRAME_WAIT)
+        if frame is None:
+            return False, None, session.error or f"No frame from camera {camera_id} within {Config.CAMERA_FRAME_WAIT}s", None
+        size = (width, height) if width or height else None
+        jpeg = _encode_cached(camera_id, frame, quality, size, crop)
+        if jpeg is None:
+            return False, None, "JPEG encoding failed", None
+        return True, jpeg, None, _frame_version(session, frame, quality, width, height, crop)
+    except Exception as e:
+        return False, None, f"Camera error: {str(e)}", None
+
+
+def capture_snapshot(camera_id: int = 0, width: Optional[int] = None, height: Optional[int] = None,
+                     crop: Optional[Rect] = None,
+                     quality: Optional[int] = None) -> Tuple[bool, Optional[bytes], Optional[str]]:
     """
     Capture a snapshot from the specified camera.
     
+    With Config.CAMERA_PERSISTENT enabled the camera stays open between
+    requests and the newest buffered frame is returned immediately.
+    
     Args:
         camera_id: The camera index to use
+        width: Output width (the height follows the aspect ratio if not given)
+        height: Output height (the width follows the aspect ratio if not given)
+        crop: Source region (x, y, width, height) in frame pixels
+        quality: JPEG quality (defaults to Config.JPEG_QUALITY)
         
     Returns:
         Tuple of (success, jpeg_bytes, error_message)
     """
+    return capture_snapshot_versioned(camera_id, width, height, crop, quality)[:3]
+
+
+def capture_snapshot_versioned(camera_id: int = 0, width: Optional[int] = None, height: Optional[int] = None,
+                               crop: Optional[Rect] = None,
+                               quality: Optional[int] = None) -> Tuple[bool, Optional[bytes], Optional[str], Optional[str]]:
+    """
+    Capture a snapshot along with the version of the frame it shows.
+    
+    Sizes and crops are rendered from a per-camera image pyramid, so
+    thumbnails cost a fraction of a full-resolution encode. The output is
+    never larger than the (cropped) frame.
+    
+    Args:
+        camera_id: The camera index to use
+        width: Output width
+        height: Output height
+        crop: Source region (x, y, width, height) in frame pixels
+        quality: JPEG quality
+        
+    Returns:
+        Tuple of (success, jpeg_bytes, error_message, frame_version); the
+        version is None unless the frame came from a persistent session
+    """
+    if Config.CAMERA_PERSISTENT:
+        return _capture_from_session(camera_id, width, height, crop, quality)
+    
     cap = None
     try:
         # Open camera
-        cap = cv2.VideoCapture(camera_id, cv2.CAP_AVFOUNDATION)
-        if not cap.isOpened():
-            return False, None, f"Camera {camera_id} not available"
-        
-        # Set camera properties
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-        cap.set(cv2.CAP_PROP_FPS, 30)
+        with CAMERA_STAGE_SECONDS.time("open"):
+            cap = open_device(camera_id)
+        if cap is None:
+            return False, None, f"Camera {camera_id} not available", None
         
         # Give camera time to warm up
-        time.sleep(Config.CAMERA_WARMUP_TIME)
+        with CAMERA_STAGE_SECONDS.time("warmup"):
+            time.sleep(Config.CAMERA_WARMUP_TIME)
         
         # Try multiple times to capture a frame
         frame = None
-        for attempt in range(Config.CAMERA_RETRY_ATTEMPTS):
-            ret, frame = cap.read()
-            if ret and frame is not None:
-                break
-            time.sleep(0.1)
+        with CAMERA_STAGE_SECONDS.time("read"):
+            for attempt in range(Config.CAMERA_RETRY_ATTEMPTS):
+                ret, frame = cap.read()
+                if ret and frame is not None:
+                    break
+                time.sleep(0.1)
         
         if not ret or frame is None:
-            return False, None, f"Capture failed after {Config.CAMERA_RETRY_ATTEMPTS} attempts"
+            return False, None, f"Capture failed after {Config.CAMERA_RETRY_ATTEMPTS} attempts", None
         
         # Check if frame has valid dimensions
         if frame.shape[0] == 0 or frame.shape[1] == 0:
-            return False, None, "Invalid frame dimensions"
-        
-        # Enhance image if it's too dark
-        brightness = np.mean(frame)
-        if brightness < 100:
-            alpha = 1.3  # Contrast control
-            beta = 30    # Brightness control
-            frame = cv2.convertScaleAbs(frame, alpha=alpha, beta=beta)
-        
-        # Encode to JPEG
-        encode_params = [cv2.IMWRITE_JPEG_QUALITY, Config.JPEG_QUALITY]
-        ret, jpeg = cv2.imencode('.jpg', frame, encode_params)
+            return False, None, "Invalid frame dimensions", None
         
-        if not ret:
-            return False, None, "JPEG encoding failed"
-        
-        return True, jpeg.tobytes(), None
+        rect, size = fit_view((frame.shape[1], frame.shape[0]), width, height, crop)
+        jpeg = _encode_view(camera_id, ("oneshot", next(_oneshot_keys)), frame, _clamp_quality(quality),
+                            rect, size, owned=True)
+        if jpeg is None:
+            return False, None, "JPEG encoding failed", None
+        return True, jpeg, None, None
         
     except Exception as e:
-        return False, None, f"Camera error: {str(e)}"
+        return False, None, f"Camera error: {str(e)}", None
     finally:
         if cap is not None:
             cap.release()
 
 
-def list_available_cameras(max_cameras: int = 6) -> List[Dict[str, any]]:
+def list_available_cameras(max_cameras: int = 6, refresh: bool = False) -> List[Dict[str, any]]:
     """
     Detect available cameras on the system.
     
+    Indices are probed in parallel and the result is cached for
+    Config.CAMERA_INVENTORY_TTL seconds. Cameras with an active capture
+    session are reported from that session without being reopened.
+    
     Args:
         max_cameras: Maximum number of camera indices to check
+        refresh: Probe again instead of using the cached inventory
         
     Returns:
         List of dictionaries containing camera information
     """
-    available_cameras = []
-    
-    for i in range(max_cameras):
-        cap = None
-        try:
-            cap = cv2.VideoCapture(i, cv2.CAP_AVFOUNDATION)
-            if cap.isOpened():
-                # Try to read a frame to verify it's working
-                ret, frame = cap.read()
-                if ret and frame is not None:
-                    available_cameras.append({
-                        "id": i,
-                        "status": "available",
-                        "resolution": f"{frame.shape[1]}x{frame.shape[0]}"
-                    })
-                else:
-                    available_cameras.append({
-                        "id": i,
-                        "status": "detected but failed to capture"
-                    })
-        except Exception:
-            pass
-        finally:
-            if cap is not None:
-                cap.release()
-    
-    return available_cameras
+    return get_inventory().list(max_cameras, refresh=refresh)
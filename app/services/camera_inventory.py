@@ -0,0 +1,117 @@
+"""
+Camera inventory module.
+Probes camera indices in parallel and caches the resulting device list.
+"""
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import time
+from typing import Any, Callable, Dict, List
+import cv2
+from app.config import Config
+from app.services.cache import TTLCache
+from app.services.capture import active_sessions, open_device
+
+
+def _probe(camera_id: int, opener: Callable[[int], Any]) -> Dict[str, Any]:
+    """
+    Open a camera index and check that it delivers frames.
+
+    Uses grab() rather than read() so the probe never decodes a frame.
+    """
+    cap = opener(camera_id)
+    if cap is None:
+        return {}
+    try:
+        if not cap.grab():
+            return {"id": camera_id, "status": "detected but failed to capture"}
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        return {"id": camera_id, "status": "available", "resolution": f"{width}x{height}"}
+    finally:
+        cap.release()
+
+
+class CameraInventory:
+    """
+    Cached list of cameras found by probing indices in parallel.
+
+    Cameras that already have a live capture session are described from
+    that session instead of being reopened, so listing never disturbs a
+    camera that is in use.
+    """
+
+    def __init__(self, ttl: float, probe_timeout: float, opener: Callable[[int], Any] = open_device):
+        """
+        Args:
+            ttl: Seconds a probed inventory stays fresh
+            probe_timeout: Seconds to wait for each index before giving up on it
+            opener: Function returning an opened capture object (or None) for a camera index
+        """
+        self.ttl = ttl
+        self.probe_timeout = probe_timeout
+        self._opener = opener
+        self._cache = TTLCache()
+
+    def list(self, max_cameras: int, refresh: bool = False) -> List[Dict[str, Any]]:
+        """
+        Get the cameras among the first `max_cameras` indices.
+
+        Args:
+            max_cameras: Number of camera indices to check
+            refresh: Probe again even if the cached inventory is still fresh
+
+        Returns:
+            List of dictionaries containing camera information
+        """
+        if refresh:
+            self.invalidate()
+        return self._cache.get(max_cameras, lambda: self._probe_all(max_cameras), self.ttl)
+
+    def invalidate(self) -> None:
+        """Forget the cached inventory so the next listing probes again."""
+        self._cache.invalidate()
+
+    def _probe_all(self, max_cameras: int) -> List[Dict[str, Any]]:
+        """Probe every index not held by a capture session, in parallel."""
+        sessions = active_sessions()
+        results: Dict[int, Dict[str, Any]] = {}
+        for camera_id, session in sessions.items():
+            if camera_id >= max_cameras:
+                continue
+            frame = session.latest()
+            info: Dict[str, Any] = {"id": camera_id, "status": "available", "in_use": True}
+            if frame is not None:
+                info["resolution"] = f"{frame.image.shape[1]}x{frame.image.shape[0]}"
+            results[camera_id] = info
+
+        to_probe = [i for i in range(max_cameras) if i not in results]
+        if to_probe:
+            # A probe that hangs in the driver must not hold up the listing,
+            # so the pool is abandoned rather than joined
+            executor = ThreadPoolExecutor(max_workers=len(to_probe), thread_name_prefix="camera-probe")
+            futures = {i: executor.submit(_probe, i, self._opener) for i in to_probe}
+            executor.shutdown(wait=False)
+            deadline = time.monotonic() + self.probe_timeout
+            for camera_id, future in futures.items():
+                try:
+                    info = future.result(timeout=max(0.0, deadline - time.monotonic()))
+                except FutureTimeoutError:
+                    info = {"id": camera_id, "status": "probe timed out"}
+                except Exception:
+                    info = {}
+                if info:
+                    results[camera_id] = info
+
+        return [results[i] for i in sorted(results)]
+
+
+_inventory = CameraInventory(Config.CAMERA_INVENTORY_TTL, Config.CAMERA_PROBE_TIMEOUT)
+
+
+def get_inventory() -> CameraInventory:
+    """
+    Get the process-wide camera inventory.
+
+    Returns:
+        CameraInventory: The shared inventory
+    """
+    return _inventory
@@ -0,0 +1,254 @@
+"""
+Persistent camera capture module.
+Keeps cameras open in dedicated reader threads and holds the latest frames in a ring buffer.
+"""
+import itertools
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, NamedTuple, Optional
+import cv2
+import numpy as np
+from app.config import Config
+from app.services.instrumentation import CAMERA_STAGE_SECONDS
+
+
+class Frame(NamedTuple):
+    """A captured frame with its per-session sequence number."""
+    seq: int
+    timestamp: float
+    image: np.ndarray
+
+
+def open_device(camera_id: int, width: Optional[int] = None, height: Optional[int] = None, fps: int = 30):
+    """
+    Open a camera device with the standard capture settings.
+
+    Args:
+        camera_id: The camera index to open
+        width: Requested frame width (defaults to Config.CAMERA_CAPTURE_WIDTH)
+        height: Requested frame height (defaults to Config.CAMERA_CAPTURE_HEIGHT)
+        fps: Requested frame rate
+
+    Returns:
+        The opened cv2.VideoCapture, or None if the camera is not available
+    """
+    cap = cv2.VideoCapture(camera_id, cv2.CAP_AVFOUNDATION)
+    if not cap.isOpened():
+        cap.release()
+        return None
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, width or Config.CAMERA_CAPTURE_WIDTH)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height or Config.CAMERA_CAPTURE_HEIGHT)
+    cap.set(cv2.CAP_PROP_FPS, fps)
+    return cap
+
+
+# Distinguishes sessions of the same camera, whose frame sequences each restart at 1
+_session_epochs = itertools.count(1)
+
+
+class CaptureSession:
+    """
+    A camera kept open by a dedicated reader thread.
+
+    The reader pushes every frame into a bounded ring buffer so readers can
+    take the newest frame without touching the device. The device is
+    released once nobody has asked for a frame for `idle_timeout` seconds.
+    """
+
+    def __init__(self, camera_id: int, buffer_size: int = 4, idle_timeout: float = 30.0,
+                 opener: Callable[[int], object] = open_device):
+        """
+        Args:
+            camera_id: The camera index to capture from
+            buffer_size: Number of recent frames to keep
+            idle_timeout: Seconds without readers before the device is released
+            opener: Function returning an opened capture object (or None) for a camera index
+        """
+        self.camera_id = camera_id
+        self.epoch = next(_session_epochs)
+        self.idle_timeout = idle_timeout
+        self.error: Optional[str] = None
+        self._opener = opener
+        self._frames = deque(maxlen=buffer_size)
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._last_access = time.monotonic()
+        self._thread = threading.Thread(
+            target=self._run, name=f"camera-{camera_id}-reader", daemon=True
+        )
+
+    @property
+    def alive(self) -> bool:
+        """Whether the reader thread is still running."""
+        return self._thread.is_alive() and not self._stop.is_set()
+
+    def start(self) -> "CaptureSession":
+        """Start the reader thread."""
+        self._thread.start()
+        return self
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop the reader thread and release the device.
+
+        Args:
+            timeout: Seconds to wait for the reader to finish
+        """
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread.is_alive() and threading.current_thread() is not self._thread:
+            self._thread.join(timeout)
+
+    def touch(self) -> None:
+        """Record reader activity so the device is not released as idle."""
+        self._last_access = time.monotonic()
+
+    def latest(self, timeout: float = 0) -> Optional[Frame]:
+        """
+        Get the newest buffered frame.
+
+        Args:
+            timeout: Seconds to wait if no frame has been captured yet
+
+        Returns:
+            The newest Frame, or None if none arrived in time
+        """
+        self.touch()
+        with self._cond:
+            if not self._frames and timeout > 0:
+                self._cond.wait_for(lambda: self._frames or not self.alive, timeout)
+            return self._frames[-1] if self._frames else None
+
+    def wait_for_next(self, after_seq: int, timeout: float) -> Optional[Frame]:
+        """
+        Wait for a frame newer than `after_seq`.
+
+        Args:
+            after_seq: Sequence number of the last frame the caller has seen
+            timeout: Seconds to wait
+
+        Returns:
+            The newest Frame if it is newer than `after_seq`, otherwise None
+        """
+        self.touch()
+        with self._cond:
+            self._cond.wait_for(
+                lambda: (self._frames and self._frames[-1].seq > after_seq) or not self.alive,
+                timeout
+            )
+            if self._frames and self._frames[-1].seq > after_seq:
+                return self._frames[-1]
+            return None
+
+    def frame_near(self, timestamp: float) -> Optional[Frame]:
+        """
+        Get the buffered frame captured closest to a point in time.
+
+        Args:
+            timestamp: Epoch seconds to match
+
+        Returns:
+            The closest Frame, or None if nothing is buffered
+        """
+        self.touch()
+        with self._cond:
+            if not self._frames:
+                return None
+            return min(self._frames, key=lambda frame: abs(frame.timestamp - timestamp))
+
+    def _run(self) -> None:
+        """Reader loop: open the device, read frames until stopped or idle."""
+        with CAMERA_STAGE_SECONDS.time("open"):
+            cap = self._opener(self.camera_id)
+        if cap is None:
+            self.error = f"Camera {self.camera_id} not available"
+            self._stop.set()
+            with self._cond:
+                self._cond.notify_all()
+            return
+
+        failures = 0
+        max_failures = Config.CAMERA_RETRY_ATTEMPTS * 10
+        # Frames read while auto-exposure settles are drained but not published
+        warm_until = time.monotonic() + Config.CAMERA_WARMUP_TIME
+        try:
+            while not self._stop.is_set():
+                if time.monotonic() - self._last_access > self.idle_timeout:
+                    break
+
+                with CAMERA_STAGE_SECONDS.time("read"):
+                    ret, image = cap.read()
+                if not ret or image is None or image.shape[0] == 0 or image.shape[1] == 0:
+                    failures += 1
+                    if failures >= max_failures:
+                        self.error = f"Capture failed after {failures} attempts"
+                        break
+                    time.sleep(0.1)
+                    continue
+
+                failures = 0
+                if time.monotonic() < warm_until:
+                    continue
+                with self._cond:
+                    self._seq += 1
+                    self._frames.append(Frame(self._seq, time.time(), image))
+                    self._cond.notify_all()
+        finally:
+            cap.release()
+            self._stop.set()
+            with self._cond:
+                self._cond.notify_all()
+
+
+_sessions: Dict[int, CaptureSession] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(camera_id: int) -> CaptureSession:
+    """
+    Get the running capture session for a camera, starting one if needed.
+
+    Args:
+        camera_id: The camera index
+
+    Returns:
+        CaptureSession: A session whose reader thread has been started
+    """
+    with _sessions_lock:
+        session = _sessions.get(camera_id)
+        if session is None or not session.alive:
+            session = CaptureSession(
+                camera_id,
+                buffer_size=Config.CAMERA_BUFFER_FRAMES,
+                idle_timeout=Config.CAMERA_IDLE_TIMEOUT
+            ).start()
+            _sessions[camera_id] = session
+        return session
+
+
+def active_sessions() -> Dict[int, CaptureSession]:
+    """
+    Get the capture sessions whose devices are currently open.
+
+    Returns:
+        Dict mapping camera index to its live session
+    """
+    with _sessions_lock:
+        return {cid: s for cid, s in _sessions.items() if s.alive}
+
+
+def release_all(timeout: Optional[float] = None) -> None:
+    """
+    Close every capture session and release the devices.
+
+    Args:
+        timeout: Seconds to wait for each reader thread
+    """
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close(timeout)
@@ -0,0 +1,352 @@
+"""
+Instrumentation module.
+Low-overhead in-process counters, gauges and histograms rendered in the Prometheus text format.
+"""
+import abc
+import bisect
+import inspect
+import math
+import threading
+import time
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latency buckets in seconds, from sub-millisecond cache hits to slow osascript calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the exposition format."""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+def _sample(name: str, labelnames: Sequence[str], labelvalues: Sequence[Any], value: float,
+            extra: str = "") -> str:
+    """Format one sample line."""
+    pairs = [f'{k}="{_escape(v)}"' for k, v in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    labels = "{" + ",".join(pairs) + "}" if pairs else ""
+    return f"{name}{labels} {_format_value(value)}"
+
+
+class _Metric(abc.ABC):
+    """
+    Base for metrics keyed by a tuple of label values.
+
+    Label values are passed positionally on every update, so the hot path is
+    one dict lookup and one uncontended lock.
+    """
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, Any] = {}
+        self._lock = threading.Lock()
+
+    @abc.abstractmethod
+    def _lines(self) -> List[str]:
+        """Sample lines, without the HELP and TYPE header."""
+
+    def render(self) -> List[str]:
+        """Lines of this metric in the exposition format."""
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"] + self._lines()
+
+
+class Counter(_Metric):
+    """A monotonically increasing count; exposed with the _total suffix."""
+
+    type = "counter"
+
+    def inc(self, *labelvalues: Any, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def _lines(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [_sample(f"{self.name}_total", self.labelnames, k, v) for k, v in items]
+
+    def render(self) -> List[str]:
+        total = f"{self.name}_total"
+        return [f"# HELP {total} {self.documentation}", f"# TYPE {total} counter"] + self._lines()
+
+
+class Gauge(_Metric):
+    """A value that can go up and down."""
+
+    type = "gauge"
+
+    def inc(self, *labelvalues: Any, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def dec(self, *labelvalues: Any, amount: float = 1) -> None:
+        self.inc(*labelvalues, amount=-amount)
+
+    def set(self, value: float, *labelvalues: Any) -> None:
+        with self._lock:
+            self._values[labelvalues] = value
+
+    def _lines(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [_sample(self.name, self.labelnames, k, v) for k, v in items]
+
+
+class _Timer:
+    """Context manager that observes its elapsed time into a histogram."""
+
+    __slots__ = ("_histogram", "_labelvalues", "_start")
+
+    def __init__(self, histogram: "Histogram", labelvalues: Tuple):
+        self._histogram = histogram
+        self._labelvalues = labelvalues
+
+    def __enter__(self) -> "_Timer":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._histogram.observe(time.perf_counter() - self._start, *self._labelvalues)
+
+
+class Histogram(_Metric):
+    """Observations counted into fixed cumulative buckets, with their sum."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self._upper = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labelvalues: Any) -> None:
+        index = bisect.bisect_left(self._upper, value)
+        with self._lock:
+            state = self._values.get(labelvalues)
+            if state is None:
+                # Per-bucket (non-cumulative) counts with a final +Inf slot, then the sum
+                state = self._values[labelvalues] = [[0] * (len(self._upper) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def time(self, *labelvalues: Any) -> _Timer:
+        """Time a block: `with histogram.time("label"): ...`."""
+        return _Timer(self, labelvalues)
+
+    def _lines(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(counts), total) for k, (counts, total) in self._values.items()]
+        lines = []
+        for labelvalues, counts, total in items:
+            cumulative = 0
+            for upper, count in zip(self._upper + (math.inf,), counts):
+                cumulative += count
+                lines.append(_sample(f"{self.name}_bucket", self.labelnames, labelvalues, cumulative,
+                                     f'le="{_format_value(float(upper))}"'))
+            lines.append(_sample(f"{self.name}_sum", self.labelnames, labelvalues, total))
+            lines.append(_sample(f"{self.name}_count", self.labelnames, labelvalues, cumulative))
+        return lines
+
+
+class CallbackMetric(_Metric):
+    """A metric read from existing state at scrape time, costing nothing between scrapes."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str], metric_type: str,
+                 callback: Callable[[], Iterable[Tuple[Tuple, float]]]):
+        super().__init__(name, documentation, labelnames)
+        self.type = metric_type
+        self._callback = callback
+
+    def _lines(self) -> List[str]:
+        return [_sample(self.name, self.labelnames, k, v) for k, v in self._callback()]
+
+
+class Registry:
+    """The set of metrics exposed by /metrics."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception:
+                continue  # One failing callback must not break the scrape
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# HTTP
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "maccontrol_request_duration_seconds", "Time from request start to response headers.", ("route", "method")
+))
+REQUESTS = REGISTRY.register(Counter(
+    "maccontrol_requests", "Requests by route, method and status code.", ("route", "method", "code")
+))
+REQUESTS_IN_FLIGHT = REGISTRY.register(Gauge(
+    "maccontrol_requests_in_flight", "Requests currently being handled."
+))
+AUTH_REJECTIONS = REGISTRY.register(Counter(
+    "maccontrol_auth_rejections", "Requests rejected before routing, by reason.", ("reason",)
+))
+
+# Status collectors
+COLLECTOR_SECONDS = REGISTRY.register(Histogram(
+    "maccontrol_collector_duration_seconds", "Time spent in each status collector.", ("collector",)
+))
+COLLECTOR_FAILURES = REGISTRY.register(Counter(
+    "maccontrol_collector_failures",
+    "Status collector runs that raised, fell back to a slower source or reported Unknown, by reason.",
+    ("collector", "reason")
+))
+SUBPROCESS_SPAWNS = REGISTRY.register(Counter(
+    "maccontrol_subprocess_spawns", "Child processes started by collectors.", ("command",)
+))
+SUBPROCESS_FAILURES = REGISTRY.register(Counter(
+    "maccontrol_subprocess_failures", "Child processes that could not start or timed out.", ("command",)
+))
+
+# Camera pipeline
+CAMERA_STAGE_SECONDS = REGISTRY.register(Histogram(
+    "maccontrol_camera_stage_duration_seconds",
+    "Time spent in each camera stage (open, warmup, read, grab, retrieve, resize, compose, enhance, encode).", ("stage",)
+))
+
+TIMELAPSE_FRAMES = REGISTRY.register(Counter(
+    "maccontrol_timelapse_frames", "Time-lapse frames by outcome (captured, written, dropped, failed).",
+    ("camera", "outcome")
+))
+
+# Cache counters are read from the caches themselves at scrape time
+_cache_sources: List[Callable[[], Dict[str, Dict[str, Any]]]] = []
+_CACHE_EVENTS = ("hits", "misses", "waits", "refreshes", "errors", "evictions")
+
+
+def register_cache_stats(source: Callable[[], Dict[str, Dict[str, Any]]]) -> None:
+    """
+    Expose cache counters on /metrics.
+
+    Args:
+        source: Returns {cache name: stats dict} using the TTLCache/ByteBudgetLRU counter names
+    """
+    _cache_sources.append(source)
+
+
+def _cache_stats() -> Dict[str, Dict[str, Any]]:
+    stats: Dict[str, Dict[str, Any]] = {}
+    for source in _cache_sources:
+        stats.update(source())
+    return stats
+
+
+def _cache_events() -> Iterable[Tuple[Tuple, float]]:
+    for cache, stats in _cache_stats().items():
+        for event in _CACHE_EVENTS:
+            if event in stats:
+                yield (cache, event), stats[event]
+
+
+def _cache_hit_ratio() -> Iterable[Tuple[Tuple, float]]:
+    for cache, stats in _cache_stats().items():
+        # Waits joined another caller's load, so like hits they did not run one
+        served = stats.get("hits", 0) + stats.get("waits", 0)
+        lookups = served + stats.get("misses", 0)
+        if lookups:
+            yield (cache,), served / lookups
+
+
+REGISTRY.register(CallbackMetric(
+    "maccontrol_cache_events_total", "Cache lookups and maintenance by outcome.", ("cache", "event"),
+    "counter", _cache_events
+))
+REGISTRY.register(CallbackMetric(
+    "maccontrol_cache_hit_ratio", "Share of cache lookups served without running a load of their own.", ("cache",),
+    "gauge", _cache_hit_ratio
+))
+
+
+def timed_collector(name: str) -> Callable[[Callable], Callable]:
+    """
+    Decorator recording a collector's duration and the runs that raised.
+
+    Works on plain and coroutine functions. Collectors that catch their own
+    errors and fall back report that with `collector_failed` instead.
+
+    Args:
+        name: The collector label
+    """
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                except BaseException:
+                    COLLECTOR_FAILURES.inc(name, "raised")
+                    raise
+                finally:
+                    COLLECTOR_SECONDS.observe(time.perf_counter() - start, name)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except BaseException:
+                COLLECTOR_FAILURES.inc(name, "raised")
+                raise
+            finally:
+                COLLECTOR_SECONDS.observe(time.perf_counter() - start, name)
+        return wrapper
+    return decorator
+
+
+def collector_failed(name: str, reason: str) -> None:
+    """
+    Count a collector run that did not get a real reading.
+
+    Args:
+        name: The collector label
+        reason: "fallback" when the fast source failed and a slower one was
+            used, "unknown" when the collector reported Unknown or defaults
+    """
+    COLLECTOR_FAILURES.inc(name, reason)
+
+
+def render_metrics() -> str:
+    """
+    Render all metrics for a Prometheus scrape.
+
+    Returns:
+        str: The text exposition (see CONTENT_TYPE)
+    """
+    return REGISTRY.render()
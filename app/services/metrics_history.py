@@ -0,0 +1,309 @@
+"""
+Metrics history module.
+Keeps fixed-size, multi-resolution ring buffers of numeric system metrics fed by the status sampler,
+optionally backed by an on-disk log that outlives restarts.
+"""
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from app.config import Config
+from app.services.metrics_log import MetricsLog
+from app.services.sampler import get_sampler
+from app.services.system_status import _parse_percent
+
+# Recorded metrics: name -> (status field, extractor from the field's value, unit).
+# Sizes come from the collectors' raw byte counts, not the rounded display strings.
+METRICS: Dict[str, Tuple[str, Callable[[Any], Optional[float]], str]] = {
+    "memory_used": ("memory", lambda value: value["raw"]["used"], "bytes"),
+    "storage_used": ("storage", lambda value: value["raw"]["used"], "bytes"),
+    "battery_percent": ("battery", lambda value: _parse_percent(value["percent"]), "percent"),
+    "app_count": ("running_apps", lambda value: float(len(value)), "count"),
+}
+
+
+def _parse_tiers(spec: str) -> List[Tuple[float, int]]:
+    """Parse "step:slots,..." into [(step seconds, slot count), ...] sorted finest first."""
+    tiers = []
+    for part in spec.split(","):
+        step, slots = part.split(":")
+        tiers.append((float(step), int(slots)))
+    return sorted(tiers)
+
+
+class RingSeries:
+    """
+    One metric at one resolution: `capacity` slots of `step` seconds each.
+
+    Every slot keeps the sum, count, min and max of the samples that fell in
+    its interval, so coarser views can be derived without keeping raw
+    samples. Memory use is fixed at construction.
+    """
+
+    def __init__(self, step: float, capacity: int):
+        """
+        Args:
+            step: Seconds covered by one slot
+            capacity: Number of slots kept
+        """
+        self.step = step
+        self.capacity = capacity
+        self._bucket = np.full(capacity, -1, dtype=np.int64)
+        self._sum = np.zeros(capacity)
+        self._count = np.zeros(capacity, dtype=np.int64)
+        self._min = np.zeros(capacity)
+        self._max = np.zeros(capacity)
+
+    @property
+    def retention(self) -> float:
+        """Seconds of history this series covers."""
+        return self.step * self.capacity
+
+    def add(self, timestamp: float, value: float) -> None:
+        """Fold a sample into the slot for its interval, recycling the slot if it holds an older interval."""
+        bucket = int(timestamp // self.step)
+        i = bucket % self.capacity
+        if self._bucket[i] != bucket:
+            if self._bucket[i] > bucket:
+                return  # Older than what the slot now holds
+            self._bucket[i] = bucket
+            self._sum[i] = value
+            self._count[i] = 1
+            self._min[i] = value
+            self._max[i] = value
+            return
+        self._sum[i] += value
+        self._count[i] += 1
+        if value < self._min[i]:
+            self._min[i] = value
+        if value > self._max[i]:
+            self._max[i] = value
+
+    def window(self, start: float, end: float) -> Tuple[np.ndarray, ...]:
+        """
+        Get the filled slots between `start` and `end`, oldest first.
+
+        Returns:
+            Tuple of (slot start times, sums, counts, mins, maxes) arrays
+        """
+        first = int(start // self.step)
+        last = int(end // self.step)
+        mask = (self._bucket >= first) & (self._bucket <= last)
+        order = np.argsort(self._bucket[mask])
+        return (
+            self._bucket[mask][order] * self.step,
+            self._sum[mask][order],
+            self._count[mask][order],
+            self._min[mask][order],
+            self._max[mask][order],
+        )
+
+
+def downsample(times: np.ndarray, sums: np.ndarray, counts: np.ndarray,
+               mins: np.ndarray, maxes: np.ndarray, step: float) -> List[List[float]]:
+    """
+    Merge consecutive slots into `step`-second points.
+
+    Args:
+        times: Slot start times, ascending
+        sums, counts, mins, maxes: Per-slot aggregates
+        step: Output resolution in seconds (a multiple of the slot step)
+
+    Returns:
+        List of [time, avg, min, max] points
+    """
+    if len(times) == 0:
+        return []
+    groups = np.floor(times / step).astype(np.int64)
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    total = np.add.reduceat(sums, starts)
+    count = np.add.reduceat(counts, starts)
+    low = np.minimum.reduceat(mins, starts)
+    high = np.maximum.reduceat(maxes, starts)
+    avg = total / count
+    return [
+        [float(g * step), round(float(a), 3), round(float(lo), 3), round(float(hi), 3)]
+        for g, a, lo, hi in zip(groups[starts], avg, low, high)
+    ]
+
+
+class MetricsHistory:
+    """
+    Fixed-memory history of the numeric status metrics.
+
+    Every sample is folded into every resolution tier as it arrives, so a
+    query only reads the tier that covers its range and merges slots.
+    Ranges reaching back before this process started are read from the
+    on-disk log instead, when one is attached.
+    """
+
+    def __init__(self, tiers: List[Tuple[float, int]], log: Optional[MetricsLog] = None):
+        """
+        Args:
+            tiers: (step seconds, slot count) per resolution, finest first
+            log: Persistent log every sample is also appended to
+        """
+        self.tiers = tiers
+        self.started_at = time.time()
+        self._log = log
+        self._series = {
+            metric: [RingSeries(step, slots) for step, slots in tiers]
+            for metric in METRICS
+        }
+        self._lock = threading.Lock()
+
+    def record(self, metric: str, timestamp: float, value: float) -> None:
+        """Add one sample of a metric to every tier."""
+        with self._lock:
+            for series in self._series[metric]:
+                series.add(timestamp, value)
+        if self._log is not None:
+            try:
+                self._log.append(metric, timestamp, value)
+            except OSError:
+                pass  # A full or read-only disk must not stop in-memory history
+
+    def observe(self, name: str, value: Any, timestamp: float) -> None:
+        """
+        Sampler listener: extract and record the metrics derived from a status field.
+
+        Args:
+            name: The status field name
+            value: The sampled value
+            timestamp: When the value was sampled (epoch seconds)
+        """
+        for metric, (field, extract, _) in METRICS.items():
+            if field != name:
+                continue
+            try:
+                number = extract(value)
+            except (KeyError, TypeError, ValueError):
+                continue
+            if number is not None:
+                self.record(metric, timestamp, number)
+
+    def _select(self, metric: str, start: float, now: float) -> RingSeries:
+        """Pick the finest tier whose retention still reaches back to `start`."""
+        tiers = self._series[metric]
+        for series in tiers:
+            if start >= now - series.retention:
+                return series
+        return tiers[-1]
+
+    def query(self, metric: str, start: float, end: float, max_points: int) -> Dict[str, Any]:
+        """
+        Get a metric's series between two times in about `max_points` points.
+
+        Args:
+            metric: One of METRICS
+            start: Range start (epoch seconds)
+            end: Range end (epoch seconds)
+            max_points: Target point count; the step is rounded up to whole slots
+
+        Returns:
+            Dict with the unit, the point step in seconds, the source ("memory" or
+            "log") and [time, avg, min, max] points
+
+        Raises:
+            KeyError: If the metric is unknown
+        """
+        series = self._select(metric, start, time.time())
+        step = series.step * max(1, math.ceil((end - start) / max(1, max_points) / series.step))
+
+        if self._log is not None and start < self.started_at:
+            # The ring buffers only know this process's lifetime
+            times, values = self._log.read(metric, start, end)
+            if len(times):
+                return {
+                    "unit": METRICS[metric][2],
+                    "step": step,
+                    "source": "log",
+                    "points": downsample(times, values, np.ones(len(values), dtype=np.int64),
+                                         values, values, step),
+                }
+
+        with self._lock:
+            window = series.window(start, end)
+        return {
+            "unit": METRICS[metric][2],
+            "step": step,
+            "source": "memory",
+            "points": downsample(*window, step),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Describe the tiers and the fixed memory they use."""
+        nbytes = sum(
+            s._bucket.nbytes + s._sum.nbytes + s._count.nbytes + s._min.nbytes + s._max.nbytes
+            for tiers in self._series.values() for s in tiers
+        )
+        return {
+            "metrics": list(METRICS),
+            "tiers": [{"step": step, "retention": step * slots} for step, slots in self.tiers],
+            "bytes": nbytes,
+            "log": self._log.stats() if self._log is not None else None,
+        }
+
+
+_history: Optional[MetricsHistory] = None
+_history_lock = threading.Lock()
+
+
+def get_history() -> MetricsHistory:
+    """
+    Get the process-wide metrics history, attaching it to the sampler on first use.
+
+    Returns:
+        MetricsHistory: The shared history
+    """
+    global _history
+    if _history is None:
+        with _history_lock:
+            if _history is None:
+                log = None
+                if Config.HISTORY_LOG_ENABLED:
+                    log = MetricsLog(Config.HISTORY_LOG_DIR, Config.HISTORY_LOG_SEGMENT_BYTES,
+                                     Config.HISTORY_LOG_MAX_BYTES)
+                history = MetricsHistory(_parse_tiers(Config.HISTORY_TIERS), log)
+                sampler = get_sampler()
+                sampler.add_listener(history.observe)
+                for name, (value, timestamp) in sampler.snapshot().items():
+                    history.observe(name, value, timestamp)
+                _history = history
+    return _history
+
+
+def query_history(metrics: Optional[List[str]] = None, start: Optional[float] = None,
+                  end: Optional[float] = None, max_points: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Get numeric metric series for a time range.
+
+    Args:
+        metrics: Metric names (defaults to all)
+        start: Range start in epoch seconds (defaults to one hour before `end`)
+        end: Range end in epoch seconds (defaults to now)
+        max_points: Maximum points per metric (defaults to Config.HISTORY_MAX_POINTS)
+
+    Returns:
+        Dict containing the range and a series per metric, or an "error" entry
+    """
+    if end is None:
+        end = time.time()
+    if start is None:
+        start = end - 3600
+    if max_points is None:
+        max_points = Config.HISTORY_MAX_POINTS
+    if start >= end:
+        return {"error": "start must be before end"}
+    metrics = metrics or list(METRICS)
+    unknown = [m for m in metrics if m not in METRICS]
+    if unknown:
+        return {"error": f"Unknown metric(s): {', '.join(unknown)}. Available: {', '.join(METRICS)}"}
+
+    history = get_history()
+    return {
+        "start": start,
+        "end": end,
+        "metrics": {m: history.query(m, start, end, max_points) for m in metrics},
+    }
@@ -0,0 +1,202 @@
+"""
+Metrics log module.
+Append-only, fixed-record binary log of sampled metrics, read back through mmap.
+"""
+import fcntl
+import mmap
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+# One record per sample; the timestamp column is sorted within a metric's log
+RECORD = np.dtype([("ts", "<f8"), ("value", "<f8")])
+SEGMENT_SUFFIX = ".bin"
+
+
+class MetricsLog:
+    """
+    Per-metric segment files of (timestamp, value) records.
+
+    Each metric has its own directory of segments named after the
+    millisecond timestamp of their first record, so the segments covering a
+    time range are known from the file names alone. The active segment is
+    rotated once it reaches `segment_bytes` and the oldest segments are
+    deleted when a metric's log exceeds `max_bytes`.
+
+    Reads map only the overlapping segments and binary-search the timestamp
+    column of a zero-copy NumPy view, so a range query only touches the
+    pages that hold matching records.
+
+    Only one process writes to a directory: appends take an exclusive flock
+    on its .lock file, and while another process (e.g. a second gunicorn
+    worker) holds it they are dropped. Every process can still read.
+    """
+
+    def __init__(self, directory: Path, segment_bytes: int, max_bytes: int):
+        """
+        Args:
+            directory: Root directory of the log (one subdirectory per metric)
+            segment_bytes: Size at which the active segment is rotated
+            max_bytes: Size above which a metric's oldest segments are deleted
+        """
+        self.directory = Path(directory)
+        self.segment_bytes = max(RECORD.itemsize, segment_bytes - segment_bytes % RECORD.itemsize)
+        self.max_bytes = max_bytes
+        self._fds: Dict[str, Tuple[int, Path]] = {}
+        self._last_ts: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._lock_file: Optional[int] = None
+        self._writer = False
+
+    @property
+    def writer(self) -> bool:
+        """Whether this process holds the directory's write lock."""
+        return self._writer
+
+    def _acquire(self) -> bool:
+        """Try to take the directory's write lock; called with self._lock held."""
+        if self._writer:
+            return True
+        if self._lock_file is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._lock_file = os.open(self.directory / ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        # The previous holder may have written since the tails were last read
+        self._last_ts.clear()
+        self._writer = True
+        return True
+
+    def _segments(self, metric: str) -> List[Path]:
+        """Segment files of a metric, oldest first."""
+        metric_dir = self.directory / metric
+        if not metric_dir.is_dir():
+            return []
+        return sorted(metric_dir.glob(f"*{SEGMENT_SUFFIX}"))
+
+    def _open_segment(self, metric: str, timestamp: float) -> Tuple[int, Path]:
+        """Open a metric's newest segment for appending, starting a new one if full."""
+        segments = self._segments(metric)
+        if segments and segments[-1].stat().st_size < self.segment_bytes:
+            path = segments[-1]
+        else:
+            (self.directory / metric).mkdir(parents=True, exist_ok=True)
+            path = self.directory / metric / f"{int(timestamp * 1000):015d}{SEGMENT_SUFFIX}"
+            self._prune(metric, segments)
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        size = os.fstat(fd).st_size
+        if size % RECORD.itemsize:
+            # Drop a record torn by a crash mid-write
+            os.ftruncate(fd, size - size % RECORD.itemsize)
+        return fd, path
+
+    def _prune(self, metric: str, segments: List[Path]) -> None:
+        """Delete the oldest segments until the new one fits within max_bytes."""
+        sizes = [path.stat().st_size for path in segments]
+        total = sum(sizes) + self.segment_bytes
+        for path, size in zip(segments, sizes):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def _tail_ts(self, metric: str) -> Optional[float]:
+        """Timestamp of the last record on disk for a metric."""
+        for path in reversed(self._segments(metric)):
+            size = path.stat().st_size
+            if size >= RECORD.itemsize:
+                with open(path, "rb") as f:
+                    f.seek(size - size % RECORD.itemsize - RECORD.itemsize)
+                    return float(np.frombuffer(f.read(RECORD.itemsize), RECORD)["ts"][0])
+        return None
+
+    def append(self, metric: str, timestamp: float, value: float) -> None:
+        """
+        Append one sample.
+
+        Samples older than the metric's last record (e.g. after the clock was
+        set back) are dropped to keep the timestamps sorted, as are all
+        samples while another process holds the write lock.
+        """
+        with self._lock:
+            if not self._acquire():
+                return
+            if metric not in self._last_ts:
+                self._last_ts[metric] = self._tail_ts(metric) or 0.0
+            if timestamp < self._last_ts[metric]:
+                return
+
+            entry = self._fds.get(metric)
+            if entry is None:
+                entry = self._fds[metric] = self._open_segment(metric, timestamp)
+            elif os.fstat(entry[0]).st_size >= self.segment_bytes:
+                os.close(entry[0])
+                entry = self._fds[metric] = self._open_segment(metric, timestamp)
+
+            os.write(entry[0], np.array([(timestamp, value)], dtype=RECORD).tobytes())
+            self._last_ts[metric] = timestamp
+
+    def read(self, metric: str, start: float, end: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get a metric's samples with start <= timestamp <= end.
+
+        Returns:
+            Tuple of (timestamps, values) arrays, oldest first
+        """
+        segments = self._segments(metric)
+        firsts = [int(path.stem) / 1000 for path in segments]
+        parts = []
+        for i, path in enumerate(segments):
+            # Segment i holds records from its name up to the next segment's name
+            if firsts[i] > end or (i + 1 < len(segments) and firsts[i + 1] < start):
+                continue
+            parts.append(self._read_segment(path, start, end))
+
+        if not parts:
+            return np.empty(0), np.empty(0)
+        records = np.concatenate(parts)
+        return records["ts"], records["value"]
+
+    @staticmethod
+    def _read_segment(path: Path, start: float, end: float) -> np.ndarray:
+        """Copy out the records of one segment that fall within the range."""
+        with open(path, "rb") as f:
+            count = os.fstat(f.fileno()).st_size // RECORD.itemsize
+            if count == 0:
+                return np.empty(0, dtype=RECORD)
+            with mmap.mmap(f.fileno(), count * RECORD.itemsize, access=mmap.ACCESS_READ) as mm:
+                records = np.frombuffer(mm, dtype=RECORD, count=count)
+                ts = records["ts"]
+                lo = int(np.searchsorted(ts, start, side="left"))
+                hi = int(np.searchsorted(ts, end, side="right"))
+                # Copy the matching slice so no view outlives the mapping
+                result = records[lo:hi].copy()
+                del records, ts
+        return result
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Segment count and bytes on disk per metric."""
+        stats = {}
+        if self.directory.is_dir():
+            for metric_dir in sorted(p for p in self.directory.iterdir() if p.is_dir()):
+                segments = self._segments(metric_dir.name)
+                stats[metric_dir.name] = {
+                    "segments": len(segments),
+                    "bytes": sum(path.stat().st_size for path in segments),
+                }
+        return stats
+
+    def close(self) -> None:
+        """Close the open segment files and release the write lock."""
+        with self._lock:
+            for fd, _ in self._fds.values():
+                os.close(fd)
+            self._fds.clear()
+            if self._lock_file is not None:
+                os.close(self._lock_file)  # Closing the descriptor drops the flock
+                self._lock_file = None
+            self._writer = False
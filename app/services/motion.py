@@ -0,0 +1,418 @@
+"""
+Motion detection module.
+Compares downscaled grayscale frames against a running background model and records motion events,
+encoding a full-resolution JPEG only when motion is detected.
+"""
+import itertools
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+import cv2
+import numpy as np
+from app.config import Config
+from app.services.camera import _encode_cached
+from app.services.capture import CaptureSession, get_session
+from app.services.instrumentation import CAMERA_STAGE_SECONDS
+
+Box = Tuple[int, int, int, int]  # x, y, width, height in full-resolution pixels
+
+
+class MotionDetector:
+    """
+    Background-subtraction change detector for one camera.
+
+    Frames are reduced to a small blurred grayscale image; the background
+    is an exponentially weighted average of those images. Pixels differing
+    from the background by more than `pixel_delta` count as changed, and
+    the score is the fraction of changed pixels. All work happens at the
+    reduced size in preallocated buffers.
+    """
+
+    def __init__(self, width: int = 160, learning_rate: float = 0.05, pixel_delta: int = 25,
+                 min_area: float = 0.001):
+        """
+        Args:
+            width: Width of the analysis image; the height follows the aspect ratio
+            learning_rate: Weight of each new frame in the background model
+            pixel_delta: Gray-level difference at which a pixel counts as changed
+            min_area: Smallest region reported as a box, as a fraction of the image
+        """
+        self.width = width
+        self.learning_rate = learning_rate
+        self.pixel_delta = pixel_delta
+        self.min_area = min_area
+        self._kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+        self._source_size: Optional[Tuple[int, int]] = None
+        self._background: Optional[np.ndarray] = None
+
+    def reset(self) -> None:
+        """Forget the background model; the next frame becomes the new background."""
+        self._background = None
+
+    def _prepare(self, image: np.ndarray) -> np.ndarray:
+        src_height, src_width = image.shape[:2]
+        if self._source_size != (src_width, src_height):
+            # New resolution: the background and buffers no longer fit
+            self._source_size = (src_width, src_height)
+            height = max(1, round(src_height * self.width / src_width))
+            self._small = np.empty((height, self.width, 3), dtype=np.uint8)
+            self._gray = np.empty((height, self.width), dtype=np.uint8)
+            self._diff = np.empty_like(self._gray)
+            self._mask = np.empty_like(self._gray)
+            self._background_u8 = np.empty_like(self._gray)
+            self._background = None
+        size = (self.width, self._gray.shape[0])
+        if image.ndim == 3:
+            cv2.resize(image, size, dst=self._small, interpolation=cv2.INTER_AREA)
+            cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        else:
+            cv2.resize(image, size, dst=self._gray, interpolation=cv2.INTER_AREA)
+        return cv2.GaussianBlur(self._gray, (5, 5), 0, dst=self._gray)
+
+    def detect(self, image: np.ndarray) -> Tuple[float, List[Box]]:
+        """
+        Compare a frame with the background and fold it into the model.
+
+        Args:
+            image: BGR frame at capture resolution (not modified)
+
+        Returns:
+            Tuple of (fraction of changed pixels, bounding boxes of changed regions)
+        """
+        gray = self._prepare(image)
+        if self._background is None:
+            self._background = gray.astype(np.float32)
+            return 0.0, []
+
+        cv2.convertScaleAbs(self._background, dst=self._background_u8)
+        cv2.absdiff(gray, self._background_u8, dst=self._diff)
+        cv2.threshold(self._diff, self.pixel_delta, 255, cv2.THRESH_BINARY, dst=self._mask)
+        cv2.dilate(self._mask, self._kernel, dst=self._mask, iterations=2)
+        cv2.accumulateWeighted(gray, self._background, self.learning_rate)
+
+        changed = cv2.countNonZero(self._mask)
+        if changed == 0:
+            return 0.0, []
+        score = changed / self._mask.size
+
+        contours, _ = cv2.findContours(self._mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        scale = self._source_size[0] / self.width
+        min_pixels = self.min_area * self._mask.size
+        boxes = []
+        for contour in contours:
+            x, y, w, h = cv2.boundingRect(contour)
+            if w * h >= min_pixels:
+                boxes.append((round(x * scale), round(y * scale), round(w * scale), round(h * scale)))
+        boxes.sort(key=lambda box: box[2] * box[3], reverse=True)
+        return score, boxes
+
+
+class MotionEvent:
+    """One period of motion, from the first frame above the threshold until the scene settles."""
+
+    __slots__ = ("id", "camera_id", "started_at", "ended_at", "peak_score", "boxes", "frame_size",
+                 "jpeg", "snapshots", "_encoded_at", "_pending")
+
+    def __init__(self, event_id: int, camera_id: int, started_at: float):
+        self.id = event_id
+        self.camera_id = camera_id
+        self.started_at = started_at
+        self.ended_at: Optional[float] = None
+        self.peak_score = 0.0
+        self.boxes: List[Box] = []
+        self.frame_size: Tuple[int, int] = (0, 0)
+        self.jpeg: Optional[bytes] = None
+        self.snapshots = 0  # Bumped every time `jpeg` is replaced by a higher-scoring frame
+        self._encoded_at = 0.0
+        # Highest-scoring frame not encoded yet: (frame, score, boxes, frame_size)
+        self._pending: Optional[Tuple[Any, float, List[Box], Tuple[int, int]]] = None
+
+    def best_score(self) -> float:
+        """Score of the best frame seen, whether or not it has been encoded yet."""
+        return max(self.peak_score, self._pending[1] if self._pending is not None else 0.0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "camera": self.camera_id,
+            "started_at": self.started_at,
+            "ended_at": self.ended_at,
+            "active": self.ended_at is None,
+            "peak_score": round(self.peak_score, 4),
+            "boxes": [list(box) for box in self.boxes],
+            "frame_size": list(self.frame_size),
+            "has_snapshot": self.jpeg is not None,
+        }
+
+
+_event_ids = itertools.count(1)
+# Event ids restart with the process; the epoch keeps snapshot ETags from colliding across restarts
+_EPOCH = format(time.time_ns(), "x")
+
+
+class MotionMonitor:
+    """
+    Runs a MotionDetector on a camera's capture session and keeps recent events.
+
+    Frames are analysed at most `fps` times per second. When the score
+    crosses `threshold` an event opens and the frame is encoded at full
+    resolution; while motion lasts, a frame with a higher score replaces
+    the snapshot at most once per second. A better frame arriving sooner is
+    held and encoded once the second is up (or when the event closes), and
+    the event's peak score, boxes and frame size always describe the frame
+    in the snapshot. The event closes after `cooldown` seconds below the
+    threshold. Quiet scenes cost one small
+    grayscale comparison per analysed frame and no JPEG encoding.
+
+    The monitor stops, letting the camera go idle, when nobody has asked
+    for its events for `idle_timeout` seconds.
+    """
+
+    def __init__(self, session: CaptureSession, detector: MotionDetector, threshold: float,
+                 fps: float, cooldown: float, max_events: int, idle_timeout: float):
+        self.camera_id = session.camera_id
+        self.threshold = threshold
+        self.interval = 1.0 / fps if fps > 0 else 0.0
+        self.cooldown = cooldown
+        self.idle_timeout = idle_timeout
+        self.score = 0.0
+        self.frames = 0
+        self._session = session
+        self._detector = detector
+        self._events = deque(maxlen=max_events)
+        self._active: Optional[MotionEvent] = None
+        self._last_motion = 0.0
+        self._last_access = time.monotonic()
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name=f"camera-{self.camera_id}-motion", daemon=True
+        )
+
+    @property
+    def alive(self) -> bool:
+        """Whether the monitor thread is still running."""
+        return self._thread.is_alive() and not self._stop.is_set()
+
+    def start(self) -> "MotionMonitor":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+
+    def touch(self) -> None:
+        """Record client interest so the monitor is not stopped as idle."""
+        self._last_access = time.monotonic()
+
+    @property
+    def last_id(self) -> int:
+        """Id of the newest event, or 0 if there is none."""
+        return self._events[-1].id if self._events else 0
+
+    def _observe(self, frame_image: np.ndarray, frame) -> None:
+        with CAMERA_STAGE_SECONDS.time("motion"):
+            score, boxes = self._detector.detect(frame_image)
+        now = time.time()
+        with self._cond:
+            self.score = score
+            self.frames += 1
+            event = self._active
+            closing = False
+            if score >= self.threshold:
+                self._last_motion = now
+                if event is None:
+                    event = self._active = MotionEvent(next(_event_ids), self.camera_id, now)
+                    self._events.append(event)
+                if score > event.best_score():
+                    event._pending = (frame, score, boxes, (frame_image.shape[1], frame_image.shape[0]))
+                self._cond.notify_all()
+            elif event is None:
+                return
+            elif now - self._last_motion >= self.cooldown:
+                event.ended_at = self._last_motion
+                self._active = None
+                closing = True
+                self._cond.notify_all()
+
+            pending = event._pending
+            if pending is None or not (closing or event.jpeg is None or now - event._encoded_at >= 1.0):
+                return
+
+        # Encode outside the lock; the snapshot and its description are published together
+        jpeg = _encode_cached(self.camera_id, pending[0])
+        with self._cond:
+            if event._pending is pending:
+                event._pending = None
+            if jpeg is not None:
+                event.jpeg, event._encoded_at = jpeg, now
+                event.peak_score, event.boxes, event.frame_size = pending[1:]
+                event.snapshots += 1
+
+    def _run(self) -> None:
+        last_seq = 0
+        next_at = 0.0
+        try:
+            while not self._stop.is_set():
+                if time.monotonic() - self._last_access > self.idle_timeout:
+                    break
+                frame = self._session.wait_for_next(last_seq, timeout=1.0)
+                if frame is None:
+                    if not self._session.alive:
+                        break
+                    continue
+                last_seq = frame.seq
+                now = time.monotonic()
+                if now < next_at:
+                    continue  # Skip frames above the analysis rate
+                next_at = now + self.interval
+                self._observe(frame.image, frame)
+        finally:
+            self._stop.set()
+            with self._cond:
+                if self._active is not None:
+                    self._active.ended_at = self._last_motion
+                    self._active._pending = None  # Stopping: do not hold on to the frame
+                    self._active = None
+                self._cond.notify_all()
+
+    def events_since(self, event_id: int, wait: float = 0) -> Tuple[List[MotionEvent], float]:
+        """
+        Get events newer than `event_id`, plus the still-open event if it is older.
+
+        Args:
+            event_id: The newest event id the client has seen
+            wait: Seconds to wait for a new event if there is none yet
+
+        Returns:
+            Tuple of (events oldest first, current motion score)
+        """
+        self.touch()
+        with self._cond:
+            if wait > 0:
+                self._cond.wait_for(lambda: self.last_id > event_id or not self.alive, wait)
+            events = [event for event in self._events if event.id > event_id]
+            if self._active is not None and self._active.id <= event_id:
+                events.insert(0, self._active)
+            return events, self.score
+
+    def get_event(self, event_id: int) -> Optional[MotionEvent]:
+        """Get a retained event by id."""
+        self.touch()
+        with self._cond:
+            return next((event for event in self._events if event.id == event_id), None)
+
+    def get_snapshot(self, event_id: int) -> Optional[Tuple[bytes, str]]:
+        """Get a retained event's JPEG with a version that changes whenever the JPEG does."""
+        with self._cond:
+            event = self.get_event(event_id)
+            if event is None or event.jpeg is None:
+                return None
+            return event.jpeg, f"motion-{_EPOCH}-{event.id}-{event.snapshots}"
+
+
+_monitors: Dict[int, MotionMonitor] = {}
+_monitors_lock = threading.Lock()
+
+
+def get_monitor(camera_id: int, start: bool = True) -> Optional[MotionMonitor]:
+    """
+    Get the motion monitor for a camera.
+
+    Args:
+        camera_id: The camera index
+        start: Start a monitor (and the camera's capture session) if none is running
+
+    Returns:
+        The monitor, or None if none is running and `start` is False
+    """
+    with _monitors_lock:
+        monitor = _monitors.get(camera_id)
+        if monitor is not None and monitor.alive:
+            return monitor
+        if not start:
+            return monitor
+        detector = MotionDetector(
+            width=Config.CAMERA_MOTION_WIDTH,
+            learning_rate=Config.CAMERA_MOTION_LEARNING_RATE,
+            pixel_delta=Config.CAMERA_MOTION_PIXEL_DELTA,
+            min_area=Config.CAMERA_MOTION_MIN_AREA,
+        )
+        monitor = MotionMonitor(
+            get_session(camera_id), detector,
+            threshold=Config.CAMERA_MOTION_THRESHOLD,
+            fps=Config.CAMERA_MOTION_FPS,
+            cooldown=Config.CAMERA_MOTION_COOLDOWN,
+            max_events=Config.CAMERA_MOTION_MAX_EVENTS,
+            idle_timeout=Config.CAMERA_MOTION_IDLE_TIMEOUT,
+        ).start()
+        _monitors[camera_id] = monitor
+        return monitor
+
+
+def get_motion_events(camera_id: int = 0, since: int = 0, wait: float = 0) -> Dict[str, Any]:
+    """
+    Get motion events for a camera, starting motion monitoring if needed.
+
+    The first call for a camera starts its monitor; that call usually has no
+    events yet because the background model needs a first frame.
+
+    Args:
+        camera_id: The camera index
+        since: Only return events with a larger id (0 for all retained events)
+        wait: Seconds to wait for a new event (long polling)
+
+    Returns:
+        Dict with the current score, the newest event id and the events, or an "error" entry
+    """
+    session = get_session(camera_id)
+    if session.latest(timeout=Config.CAMERA_FRAME_WAIT) is None:
+        return {"error": session.error or f"No frame from camera {camera_id} within {Config.CAMERA_FRAME_WAIT}s"}
+    monitor = get_monitor(camera_id)
+    events, score = monitor.events_since(since, min(max(wait, 0.0), Config.CAMERA_MOTION_MAX_WAIT))
+    return {
+        "camera": camera_id,
+        "monitoring": monitor.alive,
+        "score": round(score, 4),
+        "motion": score >= monitor.threshold,
+        "threshold": monitor.threshold,
+        "last_id": monitor.last_id,
+        "events": [event.to_dict() for event in events],
+    }
+
+
+def get_motion_snapshot(camera_id: int, event_id: int) -> Optional[Tuple[bytes, str]]:
+    """
+    Get the full-resolution JPEG recorded for a motion event.
+
+    Args:
+        camera_id: The camera index
+        event_id: The event id
+
+    Returns:
+        Tuple of (jpeg_bytes, version) where the version is usable as an ETag,
+        or None if the event is unknown, expired or has no snapshot yet
+    """
+    monitor = get_monitor(camera_id, start=False)
+    if monitor is None:
+        return None
+    return monitor.get_snapshot(event_id)
+
+
+def get_motion_stats() -> Dict[int, Dict[str, Any]]:
+    """
+    Get per-camera monitor state.
+
+    Returns:
+        Dict mapping camera index to frames analysed, current score and retained events
+    """
+    with _monitors_lock:
+        monitors = dict(_monitors)
+    return {
+        camera_id: {"alive": m.alive, "frames": m.frames, "score": round(m.score, 4),
+                    "events": len(m._events), "last_id": m.last_id}
+        for camera_id, m in monitors.items()
+    }
@@ -0,0 +1,281 @@
+"""
+Multi-camera capture module.
+Captures from several cameras at once with minimal skew and returns the frames as a composite grid or multipart body.
+"""
+import math
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import cv2
+import numpy as np
+from app.config import Config
+from app.services.camera import _clamp_quality, _encode_cached, _encode_view, _get_pyramid, _oneshot_keys
+from app.services.capture import Frame, get_session, open_device
+from app.services.enhance import enhance_frame
+from app.services.instrumentation import CAMERA_STAGE_SECONDS
+from app.services.pyramid import fit_view
+
+
+class CameraFrame(NamedTuple):
+    camera_id: int
+    frame: Optional[Frame]  # seq is 0 for frames from a one-shot capture
+    error: Optional[str]
+
+
+class MultiCapture(NamedTuple):
+    frames: List[CameraFrame]
+    owned: bool  # The images belong to this capture (one-shot) rather than a capture session
+
+    @property
+    def captured(self) -> List[CameraFrame]:
+        return [shot for shot in self.frames if shot.frame is not None]
+
+    @property
+    def failed(self) -> List[int]:
+        return [shot.camera_id for shot in self.frames if shot.frame is None]
+
+    @property
+    def skew(self) -> float:
+        """Seconds between the first and last frame captured."""
+        timestamps = [shot.frame.timestamp for shot in self.captured]
+        return max(timestamps) - min(timestamps) if timestamps else 0.0
+
+
+def _grab(cap) -> Tuple[bool, float]:
+    """Latch a frame on an open device, retrying like a single-camera capture."""
+    for attempt in range(Config.CAMERA_RETRY_ATTEMPTS):
+        if cap.grab():
+            return True, time.time()
+        time.sleep(0.1)
+    return False, 0.0
+
+
+def _capture_oneshot(camera_ids: List[int]) -> MultiCapture:
+    """
+    Open every camera concurrently and take one frame from each.
+
+    The devices are opened and warmed up together, then grab() is called on
+    all of them at once so the frames are latched as close together as the
+    drivers allow; the slower retrieve() (decode/convert) only runs after
+    every camera has grabbed.
+    """
+    with ThreadPoolExecutor(max_workers=len(camera_ids), thread_name_prefix="camera-multi") as executor:
+        with CAMERA_STAGE_SECONDS.time("open"):
+            caps = list(executor.map(open_device, camera_ids))
+        try:
+            with CAMERA_STAGE_SECONDS.time("warmup"):
+                time.sleep(Config.CAMERA_WARMUP_TIME)
+
+            opened = [cap for cap in caps if cap is not None]
+            with CAMERA_STAGE_SECONDS.time("grab"):
+                grabbed = iter(list(executor.map(_grab, opened)))
+            with CAMERA_STAGE_SECONDS.time("retrieve"):
+                retrieved = iter(list(executor.map(lambda cap: cap.retrieve(), opened)))
+        finally:
+            for cap in caps:
+                if cap is not None:
+                    cap.release()
+
+    frames = []
+    for camera_id, cap in zip(camera_ids, caps):
+        if cap is None:
+            frames.append(CameraFrame(camera_id, None, f"Camera {camera_id} not available"))
+            continue
+        ok, timestamp = next(grabbed)
+        ret, image = next(retrieved)
+        if not ok or not ret or image is None or image.shape[0] == 0 or image.shape[1] == 0:
+            frames.append(CameraFrame(camera_id, None, f"Capture failed after {Config.CAMERA_RETRY_ATTEMPTS} attempts"))
+            continue
+        frames.append(CameraFrame(camera_id, Frame(0, timestamp, image), None))
+    return MultiCapture(frames, owned=True)
+
+
+def _capture_sessions(camera_ids: List[int]) -> MultiCapture:
+    """
+    Take one buffered frame from each camera's persistent session.
+
+    Sessions run freely, so each camera's newest frame is up to a frame
+    interval apart from the others. Instead the frame closest to the oldest
+    of the newest frames is chosen from each ring buffer, which matches
+    frames without waiting for any camera.
+    """
+    sessions = [get_session(camera_id) for camera_id in camera_ids]
+    started = [session.latest(timeout=Config.CAMERA_FRAME_WAIT) for session in sessions]
+    # Sessions that were just opened may have kept the others waiting, so look again
+    newest = [session.latest() if frame is not None else None for session, frame in zip(sessions, started)]
+    timestamps = [frame.timestamp for frame in newest if frame is not None]
+    reference = min(timestamps) if timestamps else 0.0
+
+    frames = []
+    for camera_id, session, frame in zip(camera_ids, sessions, newest):
+        if frame is None:
+            error = session.error or f"No frame from camera {camera_id} within {Config.CAMERA_FRAME_WAIT}s"
+            frames.append(CameraFrame(camera_id, None, error))
+        else:
+            frames.append(CameraFrame(camera_id, session.frame_near(reference) or frame, None))
+    return MultiCapture(frames, owned=False)
+
+
+def capture_cameras(camera_ids: List[int]) -> MultiCapture:
+    """
+    Capture one frame from each camera, as close together in time as possible.
+
+    With Config.CAMERA_PERSISTENT enabled the frames come from the cameras'
+    capture sessions; otherwise every device is opened for this capture.
+
+    Args:
+        camera_ids: Camera indices, in output order
+
+    Returns:
+        MultiCapture with a frame or an error for each camera
+    """
+    if Config.CAMERA_PERSISTENT:
+        return _capture_sessions(camera_ids)
+    return _capture_oneshot(camera_ids)
+
+
+def grid_layout(count: int) -> Tuple[int, int]:
+    """
+    Get the (columns, rows) of a near-square grid.
+
+    Args:
+        count: Number of tiles
+
+    Returns:
+        Tuple of (columns, rows)
+    """
+    columns = max(1, math.ceil(math.sqrt(count)))
+    return columns, max(1, math.ceil(count / columns))
+
+
+# Grid canvases are reused for every request with the same layout; the lock
+# is held from composition until the grid has been encoded
+_canvases: Dict[Tuple[int, ...], np.ndarray] = {}
+_canvas_lock = threading.Lock()
+
+
+def _canvas(shape: Tuple[int, ...]) -> np.ndarray:
+    canvas = _canvases.get(shape)
+    if canvas is None:
+        if len(_canvases) >= 4:
+            _canvases.clear()
+        canvas = _canvases[shape] = np.empty(shape, dtype=np.uint8)
+    return canvas
+
+
+def _tile_size(image: np.ndarray, tile: Tuple[int, int]) -> Tuple[int, int]:
+    """Largest size with the image's aspect ratio that fits the tile (never upscaled)."""
+    height, width = image.shape[:2]
+    scale = min(tile[0] / width, tile[1] / height, 1.0)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _compose(capture: MultiCapture, canvas: np.ndarray, tile: Tuple[int, int], columns: int) -> None:
+    """Render each camera into its tile of the canvas, letterboxed on black."""
+    tile_width, tile_height = tile
+    cells = (canvas.shape[0] // tile_height) * columns
+    for index in range(cells):
+        row, column = divmod(index, columns)
+        cell = canvas[row * tile_height:(row + 1) * tile_height, column * tile_width:(column + 1) * tile_width]
+        shot = capture.frames[index] if index < len(capture.frames) else None
+        if shot is None or shot.frame is None:
+            cell.fill(0)
+            continue
+
+        image = shot.frame.image
+        rect, size = fit_view((image.shape[1], image.shape[0]), *_tile_size(image, tile))
+        key = ("oneshot", next(_oneshot_keys)) if capture.owned else (shot.frame.seq, shot.frame.timestamp)
+        pyramid = _get_pyramid(shot.camera_id)
+        with pyramid.lock:
+            pyramid.set_frame(key, image)
+            with CAMERA_STAGE_SECONDS.time("resize"):
+                view = pyramid.render(rect, size)
+            # Enhance per tile, so one dark camera does not change the others
+            with CAMERA_STAGE_SECONDS.time("enhance"):
+                view = enhance_frame(view, inplace=True)
+            x, y = (tile_width - size[0]) // 2, (tile_height - size[1]) // 2
+            if size != tile:
+                cell.fill(0)
+            cell[y:y + size[1], x:x + size[0]] = view
+
+
+def capture_grid(camera_ids: List[int], tile_width: Optional[int] = None,
+                 quality: Optional[int] = None) -> Tuple[bool, Optional[bytes], Optional[str], MultiCapture]:
+    """
+    Capture every camera and tile the frames into one JPEG.
+
+    Tiles share the aspect ratio of the first camera that returned a frame;
+    other cameras are letterboxed and failed cameras are left black.
+
+    Args:
+        camera_ids: Camera indices, in row-major tile order
+        tile_width: Width of each tile (defaults to Config.CAMERA_GRID_TILE_WIDTH)
+        quality: JPEG quality (defaults to Config.JPEG_QUALITY)
+
+    Returns:
+        Tuple of (success, jpeg_bytes, error_message, capture)
+    """
+    capture = capture_cameras(camera_ids)
+    captured = capture.captured
+    if not captured:
+        return False, None, "; ".join(f"{shot.camera_id}: {shot.error}" for shot in capture.frames), capture
+
+    first = captured[0].frame.image
+    tile_width = tile_width or Config.CAMERA_GRID_TILE_WIDTH
+    tile = (tile_width, max(1, round(tile_width * first.shape[0] / first.shape[1])))
+    columns, rows = grid_layout(len(camera_ids))
+
+    with _canvas_lock:
+        canvas = _canvas((rows * tile[1], columns * tile[0]) + first.shape[2:])
+        with CAMERA_STAGE_SECONDS.time("compose"):
+            _compose(capture, canvas, tile, columns)
+        with CAMERA_STAGE_SECONDS.time("encode"):
+            ok, jpeg = cv2.imencode(".jpg", canvas, [cv2.IMWRITE_JPEG_QUALITY, _clamp_quality(quality)])
+    if not ok:
+        return False, None, "JPEG encoding failed", capture
+    return True, jpeg.tobytes(), None, capture
+
+
+def capture_multipart(camera_ids: List[int], width: Optional[int] = None,
+                      quality: Optional[int] = None) -> Tuple[bool, Optional[bytes], Optional[str], str, MultiCapture]:
+    """
+    Capture every camera and return the JPEGs as one multipart/mixed body.
+
+    Each part carries X-Camera-Id and X-Capture-Time (epoch seconds) headers.
+
+    Args:
+        camera_ids: Camera indices, in part order
+        width: Output width of each image (defaults to the frame's own)
+        quality: JPEG quality (defaults to Config.JPEG_QUALITY)
+
+    Returns:
+        Tuple of (success, body, error_message, boundary, capture)
+    """
+    boundary = uuid.uuid4().hex
+    capture = capture_cameras(camera_ids)
+    parts = []
+    for shot in capture.captured:
+        frame = shot.frame
+        if capture.owned:
+            rect, size = fit_view((frame.image.shape[1], frame.image.shape[0]), width)
+            jpeg = _encode_view(shot.camera_id, ("oneshot", next(_oneshot_keys)), frame.image,
+                                _clamp_quality(quality), rect, size, owned=True)
+        else:
+            jpeg = _encode_cached(shot.camera_id, frame, quality, (width, None) if width else None)
+        if jpeg is None:
+            continue
+        parts.append(
+            f"--{boundary}\r\n"
+            f"Content-Type: image/jpeg\r\n"
+            f"Content-Disposition: inline; filename=camera-{shot.camera_id}.jpg\r\n"
+            f"Content-Length: {len(jpeg)}\r\n"
+            f"X-Camera-Id: {shot.camera_id}\r\n"
+            f"X-Capture-Time: {frame.timestamp:.6f}\r\n\r\n".encode() + jpeg + b"\r\n"
+        )
+    if not parts:
+        error = "; ".join(f"{shot.camera_id}: {shot.error or 'JPEG encoding failed'}" for shot in capture.frames)
+        return False, None, error, boundary, capture
+    parts.append(f"--{boundary}--\r\n".encode())
+    return True, b"".join(parts), None, boundary, capture
@@ -0,0 +1,137 @@
+"""
+Native metrics module.
+Reads memory and storage figures in-process, without forking a shell, and returns them as numeric bytes.
+"""
+import abc
+import ctypes
+import ctypes.util
+import os
+import sys
+from typing import Dict, Optional
+from app.config import Config
+
+
+class MetricsBackend(abc.ABC):
+    """
+    Base class for in-process metric readers.
+
+    Subclasses implement memory() for their platform. Storage uses
+    os.statvfs, which is available on every POSIX platform.
+    """
+
+    name = "base"
+
+    @abc.abstractmethod
+    def memory(self) -> Dict[str, int]:
+        """
+        Read physical memory usage.
+
+        Returns:
+            Dict with total, used and available bytes
+        """
+
+    def storage(self, path: str = "/") -> Dict[str, float]:
+        """
+        Read filesystem usage for the volume holding `path`.
+
+        Args:
+            path: Any path on the volume to inspect
+
+        Returns:
+            Dict with total, used and available bytes and percent_used
+        """
+        st = os.statvfs(path)
+        total = st.f_blocks * st.f_frsize
+        used = (st.f_blocks - st.f_bfree) * st.f_frsize
+        available = st.f_bavail * st.f_frsize
+        # Same definition as df: reserved blocks count as neither used nor available
+        usable = used + available
+        return {
+            "total": total,
+            "used": used,
+            "available": available,
+            "percent_used": round(used * 100.0 / usable, 1) if usable else 0.0
+        }
+
+
+class LinuxBackend(MetricsBackend):
+    """Reads memory figures from /proc/meminfo."""
+
+    name = "linux"
+
+    def __init__(self, meminfo_path: str = "/proc/meminfo"):
+        self.meminfo_path = meminfo_path
+
+    def memory(self) -> Dict[str, int]:
+        fields = {}
+        with open(self.meminfo_path, "rb") as f:
+            for line in f:
+                key, _, rest = line.partition(b":")
+                if key in (b"MemTotal", b"MemAvailable", b"MemFree"):
+                    # Values are reported in kB
+                    fields[key] = int(rest.split()[0]) * 1024
+        total = fields[b"MemTotal"]
+        available = fields.get(b"MemAvailable", fields.get(b"MemFree", 0))
+        return {"total": total, "used": total - available, "available": available}
+
+
+class DarwinBackend(MetricsBackend):
+    """Reads memory figures through sysctlbyname(3)."""
+
+    name = "darwin"
+
+    def __init__(self):
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        # Neither value changes while the process is running
+        self._total = self._sysctl("hw.memsize", ctypes.c_uint64)
+        self._page_size = self._sysctl("vm.pagesize", ctypes.c_uint32)
+
+    def _sysctl(self, name: str, ctype) -> int:
+        """Read a single integer sysctl value."""
+        value = ctype()
+        size = ctypes.c_size_t(ctypes.sizeof(value))
+        if self._libc.sysctlbyname(name.encode(), ctypes.byref(value), ctypes.byref(size), None, 0) != 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"sysctl {name} failed: {os.strerror(errno)}")
+        return value.value
+
+    def memory(self) -> Dict[str, int]:
+        # Free plus speculative pages is what top reports as "unused"
+        free_pages = (self._sysctl("vm.page_free_count", ctypes.c_uint32)
+                      + self._sysctl("vm.page_speculative_count", ctypes.c_uint32))
+        available = free_pages * self._page_size
+        return {"total": self._total, "used": self._total - available, "available": available}
+
+
+_BACKENDS = {
+    "linux": LinuxBackend,
+    "darwin": DarwinBackend,
+}
+
+_backend: Optional[MetricsBackend] = None
+_backend_loaded = False
+
+
+def get_backend() -> Optional[MetricsBackend]:
+    """
+    Get the native backend selected by Config.STATUS_COLLECTOR_BACKEND.
+
+    "auto" picks the backend for the running platform and "subprocess"
+    disables native collection.
+
+    Returns:
+        The backend, or None if native collection is disabled or unsupported
+    """
+    global _backend, _backend_loaded
+    if Config.STATUS_COLLECTOR_BACKEND == "subprocess":
+        return None
+
+    if not _backend_loaded:
+        backend_class = _BACKENDS.get(sys.platform)
+        try:
+            _backend = backend_class() if backend_class is not None else None
+        except (OSError, AttributeError):
+            # libc or a sysctl is missing; keep using the subprocess path
+            _backend = None
+        _backend_loaded = True
+    return _backend
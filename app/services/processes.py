@@ -0,0 +1,395 @@
+"""
+Process table module.
+Scans processes in-process (/proc on Linux, libproc on macOS) and derives per-process CPU% from successive scans.
+"""
+import abc
+import ctypes
+import ctypes.util
+import heapq
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, NamedTuple, Optional
+from app.config import Config
+from app.services.instrumentation import timed_collector
+
+SORT_KEYS = ("cpu", "memory")
+
+
+class ProcessSample(NamedTuple):
+    """One process as read from the OS; cpu_seconds is cumulative user + system time."""
+    pid: int
+    name: str
+    cpu_seconds: float
+    rss: int
+    started_at: float
+
+
+class ProcessReader(abc.ABC):
+    """Base class for platform process scanners."""
+
+    name = "base"
+
+    @abc.abstractmethod
+    def scan(self) -> List[ProcessSample]:
+        """
+        Read every process visible to this user.
+
+        Processes that exit or deny access mid-scan are skipped.
+
+        Returns:
+            List of ProcessSample
+        """
+
+
+class LinuxProcessReader(ProcessReader):
+    """Reads /proc/<pid>/stat."""
+
+    name = "linux"
+
+    def __init__(self, proc_path: str = "/proc"):
+        self.proc_path = proc_path
+        self._ticks = os.sysconf("SC_CLK_TCK")
+        self._page_size = os.sysconf("SC_PAGE_SIZE")
+        with open(os.path.join(proc_path, "stat"), "rb") as f:
+            self._boot_time = next(int(line.split()[1]) for line in f if line.startswith(b"btime"))
+
+    def scan(self) -> List[ProcessSample]:
+        samples = []
+        with os.scandir(self.proc_path) as entries:
+            for entry in entries:
+                if not entry.name.isdigit():
+                    continue
+                try:
+                    with open(f"{entry.path}/stat", "rb") as f:
+                        data = f.read()
+                except OSError:
+                    continue  # Exited since the directory was listed
+                # The command name is parenthesized and may itself contain spaces or ')'
+                close = data.rindex(b")")
+                fields = data[close + 2:].split()
+                samples.append(ProcessSample(
+                    pid=int(entry.name),
+                    name=data[data.index(b"(") + 1:close].decode("utf-8", "replace"),
+                    cpu_seconds=(int(fields[11]) + int(fields[12])) / self._ticks,
+                    rss=int(fields[21]) * self._page_size,
+                    started_at=self._boot_time + int(fields[19]) / self._ticks,
+                ))
+        return samples
+
+
+class _BSDInfo(ctypes.Structure):
+    """struct proc_bsdinfo from <sys/proc_info.h>."""
+    _fields_ = [
+        ("pbi_flags", ctypes.c_uint32), ("pbi_status", ctypes.c_uint32), ("pbi_xstatus", ctypes.c_uint32),
+        ("pbi_pid", ctypes.c_uint32), ("pbi_ppid", ctypes.c_uint32),
+        ("pbi_uid", ctypes.c_uint32), ("pbi_gid", ctypes.c_uint32),
+        ("pbi_ruid", ctypes.c_uint32), ("pbi_rgid", ctypes.c_uint32),
+        ("pbi_svuid", ctypes.c_uint32), ("pbi_svgid", ctypes.c_uint32), ("rfu_1", ctypes.c_uint32),
+        ("pbi_comm", ctypes.c_char * 16), ("pbi_name", ctypes.c_char * 32),
+        ("pbi_nfiles", ctypes.c_uint32), ("pbi_pgid", ctypes.c_uint32), ("pbi_pjobc", ctypes.c_uint32),
+        ("e_tdev", ctypes.c_uint32), ("e_tpgid", ctypes.c_uint32), ("pbi_nice", ctypes.c_int32),
+        ("pbi_start_tvsec", ctypes.c_uint64), ("pbi_start_tvusec", ctypes.c_uint64),
+    ]
+
+
+class _TaskInfo(ctypes.Structure):
+    """struct proc_taskinfo from <sys/proc_info.h>."""
+    _fields_ = [
+        ("pti_virtual_size", ctypes.c_uint64), ("pti_resident_size", ctypes.c_uint64),
+        ("pti_total_user", ctypes.c_uint64), ("pti_total_system", ctypes.c_uint64),
+        ("pti_threads_user", ctypes.c_uint64), ("pti_threads_system", ctypes.c_uint64),
+    ] + [(name, ctypes.c_int32) for name in (
+        "pti_policy", "pti_faults", "pti_pageins", "pti_cow_faults", "pti_messages_sent",
+        "pti_messages_received", "pti_syscalls_mach", "pti_syscalls_unix", "pti_csw",
+        "pti_threadnum", "pti_numrunning", "pti_priority",
+    )]
+
+
+class _TaskAllInfo(ctypes.Structure):
+    """struct proc_taskallinfo: BSD and Mach task info in one proc_pidinfo call."""
+    _fields_ = [("pbsd", _BSDInfo), ("ptinfo", _TaskInfo)]
+
+
+class _TimebaseInfo(ctypes.Structure):
+    _fields_ = [("numer", ctypes.c_uint32), ("denom", ctypes.c_uint32)]
+
+
+class DarwinProcessReader(ProcessReader):
+    """Reads processes through libproc's proc_listallpids(3) and proc_pidinfo(3)."""
+
+    name = "darwin"
+
+    PROC_PIDTASKALLINFO = 2
+
+    def __init__(self):
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        timebase = _TimebaseInfo()
+        self._libc.mach_timebase_info(ctypes.byref(timebase))
+        # Task times are in Mach absolute time units (nanoseconds on Intel, not on Apple silicon)
+        self._time_scale = timebase.numer / timebase.denom / 1e9
+        self._info = _TaskAllInfo()
+
+    def _pids(self) -> List[int]:
+        count = self._libc.proc_listallpids(None, 0)
+        if count <= 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"proc_listallpids failed: {os.strerror(errno)}")
+        # Leave room for processes started between the two calls
+        buffer = (ctypes.c_int * (count + 64))()
+        count = self._libc.proc_listallpids(buffer, ctypes.sizeof(buffer))
+        return [pid for pid in buffer[:max(count, 0)] if pid > 0]
+
+    def scan(self) -> List[ProcessSample]:
+        samples = []
+        info, size = self._info, ctypes.sizeof(self._info)
+        for pid in self._pids():
+            # Fails for other users' processes unless running as root
+            if self._libc.proc_pidinfo(pid, self.PROC_PIDTASKALLINFO, 0, ctypes.byref(info), size) != size:
+                continue
+            bsd, task = info.pbsd, info.ptinfo
+            samples.append(ProcessSample(
+                pid=pid,
+                name=(bsd.pbi_name or bsd.pbi_comm).decode("utf-8", "replace"),
+                cpu_seconds=(task.pti_total_user + task.pti_total_system) * self._time_scale,
+                rss=task.pti_resident_size,
+                started_at=bsd.pbi_start_tvsec + bsd.pbi_start_tvusec / 1e6,
+            ))
+        return samples
+
+
+_READERS = {
+    "linux": LinuxProcessReader,
+    "darwin": DarwinProcessReader,
+}
+
+
+class _Entry:
+    """What is kept about a live process between scans."""
+
+    __slots__ = ("name", "started_at", "cpu_seconds", "cpu_percent", "rss")
+
+    def __init__(self, name: str, started_at: float, cpu_seconds: float, cpu_percent: float, rss: int):
+        self.name = name
+        self.started_at = started_at
+        self.cpu_seconds = cpu_seconds
+        self.cpu_percent = cpu_percent
+        self.rss = rss
+
+
+def _describe(pid: int, entry: _Entry) -> Dict[str, Any]:
+    return {
+        "pid": pid,
+        "name": entry.name,
+        "cpu_percent": round(entry.cpu_percent, 1),
+        "rss": entry.rss,
+        "started_at": round(entry.started_at, 3),
+    }
+
+
+class ProcessTable:
+    """
+    Process list with CPU% from successive scans and a log of started/exited processes.
+
+    Each scan keeps only the previous cumulative CPU time per process, so
+    CPU% is the share of one core used between the last two scans. A
+    process seen for the first time reports its lifetime average. A PID is
+    identified together with its start time, so a reused PID counts as an
+    exit and a start.
+
+    Every scan that finds a started or exited process bumps the version;
+    clients pass the last version they saw to changes_since().
+    """
+
+    def __init__(self, reader: ProcessReader, min_interval: float = 1.0, log_size: int = 1024):
+        """
+        Args:
+            reader: Platform process scanner
+            min_interval: Scans closer together than this reuse the previous result
+            log_size: Number of started/exited events kept for incremental queries
+        """
+        self.reader = reader
+        self.min_interval = min_interval
+        self._entries: Dict[int, _Entry] = {}
+        self._scanned_at = 0.0  # monotonic, for CPU% and rate limiting
+        self._sampled_at = 0.0  # epoch, for clients
+        self._version = 0
+        self._log = deque(maxlen=log_size)  # (version, event, pid, name, started_at)
+        self._lock = threading.Lock()
+        self._scan = timed_collector("processes")(self.reader.scan)
+
+    @property
+    def version(self) -> int:
+        """Version of the most recent scan that saw a process start or exit."""
+        return self._version
+
+    def refresh(self, force: bool = False) -> None:
+        """
+        Scan processes unless the last scan is more recent than min_interval.
+
+        Args:
+            force: Scan even if the last scan is recent
+        """
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._scanned_at and now - self._scanned_at < self.min_interval:
+                return
+            samples = self._scan()
+            now, wall = time.monotonic(), time.time()
+            elapsed = now - self._scanned_at if self._scanned_at else 0.0
+            first_scan = not self._scanned_at
+
+            previous, entries, started = self._entries, {}, []
+            for sample in samples:
+                entry = previous.pop(sample.pid, None)
+                if entry is not None and abs(entry.started_at - sample.started_at) < 1:
+                    cpu = (sample.cpu_seconds - entry.cpu_seconds) / elapsed if elapsed > 0 else 0.0
+                    entry.cpu_seconds, entry.cpu_percent, entry.rss = sample.cpu_seconds, cpu * 100, sample.rss
+                else:
+                    if entry is not None:
+                        previous[sample.pid] = entry  # Same PID, different process: the old one exited
+                    lifetime = max(wall - sample.started_at, 1e-3)
+                    entry = _Entry(sample.name, sample.started_at, sample.cpu_seconds,
+                                   sample.cpu_seconds / lifetime * 100, sample.rss)
+                    started.append((sample.pid, entry))
+                entries[sample.pid] = entry
+
+            # The first scan records the baseline without reporting every process as started
+            if not first_scan and (started or previous):
+                self._version += 1
+                for pid, entry in previous.items():
+                    self._log.append((self._version, "exited", pid, entry.name, entry.started_at))
+                for pid, entry in started:
+                    self._log.append((self._version, "started", pid, entry.name, entry.started_at))
+
+            self._entries = entries
+            self._scanned_at, self._sampled_at = now, wall
+
+    def top(self, n: int, key: str = "cpu") -> Dict[str, Any]:
+        """
+        Get the n processes using the most CPU or memory.
+
+        Uses heap selection, so only n entries are ever sorted.
+
+        Args:
+            n: Number of processes to return
+            key: "cpu" or "memory"
+
+        Returns:
+            Dict with the version, sample time, total process count and the selected processes
+        """
+        self.refresh()
+        with self._lock:
+            items = list(self._entries.items())
+            version, sampled_at = self._version, self._sampled_at
+        if key == "memory":
+            selected = heapq.nlargest(n, items, key=lambda item: item[1].rss)
+        else:
+            selected = heapq.nlargest(n, items, key=lambda item: item[1].cpu_percent)
+        return {
+            "version": version,
+            "sampled_at": sampled_at,
+            "count": len(items),
+            "sort": key,
+            "processes": [_describe(pid, entry) for pid, entry in selected],
+        }
+
+    def changes_since(self, version: Optional[int]) -> Dict[str, Any]:
+        """
+        Get the processes started and exited after `version`.
+
+        A version older than the event log (or unknown) cannot be answered
+        incrementally: the response then has "reset" set and lists every
+        live process as started.
+
+        Args:
+            version: The last version the client saw, or None
+
+        Returns:
+            Dict with the current version, reset flag and started/exited processes
+        """
+        self.refresh()
+        with self._lock:
+            oldest = self._log[0][0] if self._log else self._version + 1
+            if version is None or version > self._version or version < oldest - 1:
+                return {
+                    "version": self._version,
+                    "reset": True,
+                    "started": [_describe(pid, entry) for pid, entry in self._entries.items()],
+                    "exited": [],
+                }
+            started, exited = [], []
+            for event_version, event, pid, name, started_at in self._log:
+                if event_version > version:
+                    item = {"pid": pid, "name": name, "started_at": round(started_at, 3)}
+                    (started if event == "started" else exited).append(item)
+            # A process that started and exited within the window is reported in both lists
+            return {"version": self._version, "reset": False, "started": started, "exited": exited}
+
+    def stats(self) -> Dict[str, Any]:
+        """Scan bookkeeping for diagnostics."""
+        return {"reader": self.reader.name, "processes": len(self._entries), "version": self._version,
+                "events": len(self._log), "sampled_at": self._sampled_at}
+
+
+_table: Optional[ProcessTable] = None
+_table_lock = threading.Lock()
+
+
+def get_process_table() -> Optional[ProcessTable]:
+    """
+    Get the process table for this platform.
+
+    Returns:
+        The shared ProcessTable, or None if the platform has no reader
+    """
+    global _table
+    if _table is None:
+        with _table_lock:
+            if _table is None:
+                reader_class = _READERS.get(sys.platform)
+                if reader_class is None:
+                    return None
+                try:
+                    reader = reader_class()
+                except (OSError, AttributeError, StopIteration):
+                    return None
+                _table = ProcessTable(reader, Config.PROCESS_SCAN_MIN_INTERVAL, Config.PROCESS_EVENTS_LOG_SIZE)
+    return _table
+
+
+def get_top_processes(limit: int = 10, sort: str = "cpu") -> Dict[str, Any]:
+    """
+    Get the processes using the most CPU or memory.
+
+    Args:
+        limit: Number of processes to return
+        sort: "cpu" or "memory"
+
+    Returns:
+        Dict with the selected processes, or an "error" entry
+    """
+    if sort not in SORT_KEYS:
+        return {"error": f"sort must be one of: {', '.join(SORT_KEYS)}"}
+    table = get_process_table()
+    if table is None:
+        return {"error": f"Process table is not supported on {sys.platform}"}
+    return table.top(limit, sort)
+
+
+def get_process_changes(since: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Get processes started and exited since a version returned by an earlier call.
+
+    Args:
+        since: Version from a previous response, or None for the full list
+
+    Returns:
+        Dict with the current version and the changes, or an "error" entry
+    """
+    table = get_process_table()
+    if table is None:
+        return {"error": f"Process table is not supported on {sys.platform}"}
+    return table.changes_since(since)
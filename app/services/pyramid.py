@@ -0,0 +1,159 @@
+"""
+Image pyramid module.
+Builds half-resolution levels of a frame on demand and renders resized/cropped views into reused buffers.
+"""
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
+import cv2
+import numpy as np
+
+Rect = Tuple[int, int, int, int]  # x, y, width, height in source pixels
+
+
+def fit_view(src_size: Tuple[int, int], width: Optional[int] = None, height: Optional[int] = None,
+             crop: Optional[Rect] = None) -> Tuple[Rect, Tuple[int, int]]:
+    """
+    Resolve requested output dimensions against a source frame.
+
+    The crop is clipped to the frame. A missing dimension follows the crop's
+    aspect ratio, and the output is never larger than the cropped region.
+
+    Args:
+        src_size: Source (width, height)
+        width: Requested output width
+        height: Requested output height
+        crop: Region of the source to show, or None for the whole frame
+
+    Returns:
+        Tuple of (clipped crop rectangle, output (width, height))
+    """
+    src_width, src_height = src_size
+    if crop is None:
+        x, y, w, h = 0, 0, src_width, src_height
+    else:
+        x, y = min(max(crop[0], 0), src_width - 1), min(max(crop[1], 0), src_height - 1)
+        w, h = max(1, min(crop[2], src_width - x)), max(1, min(crop[3], src_height - y))
+
+    if width and not height:
+        height = round(h * width / w)
+    elif height and not width:
+        width = round(w * height / h)
+    elif not width:
+        width, height = w, h
+    return (x, y, w, h), (max(1, min(width, w)), max(1, min(height, h)))
+
+
+class FramePyramid:
+    """
+    Lazily built half-resolution levels of the current frame of one camera.
+
+    Level 0 is the frame itself (never written to); level n is built from
+    level n-1 with cv2.pyrDown the first time a request needs it. Level
+    buffers and output buffers are allocated once per size and reused for
+    every later frame, so a steady stream of thumbnail requests allocates
+    nothing but the encoded JPEG.
+
+    Rendered images live in shared buffers: callers must hold `lock` from
+    render() until they are done with the result.
+    """
+
+    def __init__(self, max_levels: int = 5, max_outputs: int = 8):
+        """
+        Args:
+            max_levels: Number of levels below the full frame
+            max_outputs: Number of distinct output sizes whose buffers are kept
+        """
+        self.max_levels = max_levels
+        self.max_outputs = max_outputs
+        self.lock = threading.Lock()
+        self._key: Optional[Hashable] = None
+        self._levels: List[np.ndarray] = []
+        self._built = 0
+        self._buffers: List[np.ndarray] = []
+        self._outputs: "OrderedDict[Tuple[int, ...], np.ndarray]" = OrderedDict()
+        self.builds = 0
+        self.allocations = 0
+
+    def set_frame(self, key: Hashable, image: np.ndarray) -> None:
+        """
+        Make `image` the frame levels are built from.
+
+        Args:
+            key: Identifies the frame; the same key keeps the levels already built
+            image: The full-resolution frame
+        """
+        if key == self._key and self._levels and self._levels[0] is image:
+            return
+        self._key = key
+        if self._levels and self._levels[0].shape != image.shape:
+            self._buffers = []  # Resolution changed
+        self._levels = [image]
+        self._built = 1
+
+    def _level(self, index: int) -> np.ndarray:
+        """Get a level, building it and any missing levels above it."""
+        while self._built <= index:
+            parent = self._levels[self._built - 1]
+            shape = ((parent.shape[0] + 1) // 2, (parent.shape[1] + 1) // 2) + parent.shape[2:]
+            slot = self._built - 1
+            if slot >= len(self._buffers):
+                self._buffers.append(np.empty(shape, dtype=parent.dtype))
+                self.allocations += 1
+            level = cv2.pyrDown(parent, dst=self._buffers[slot])
+            self._levels.append(level)
+            self._built += 1
+            self.builds += 1
+        return self._levels[index]
+
+    def _output(self, shape: Tuple[int, ...], dtype: np.dtype) -> np.ndarray:
+        buffer = self._outputs.get(shape)
+        if buffer is None:
+            buffer = self._outputs[shape] = np.empty(shape, dtype=dtype)
+            self.allocations += 1
+            if len(self._outputs) > self.max_outputs:
+                self._outputs.popitem(last=False)
+        else:
+            self._outputs.move_to_end(shape)
+        return buffer
+
+    def render(self, crop: Rect, size: Tuple[int, int]) -> np.ndarray:
+        """
+        Render a region of the frame at an output size.
+
+        Resizes from the smallest level that still has at least the output's
+        resolution, so a thumbnail costs a few pyrDown passes (shared by all
+        requests for the frame) plus one small resize.
+
+        Args:
+            crop: Source region (x, y, width, height) as returned by fit_view()
+            size: Output (width, height), no larger than the region
+
+        Returns:
+            np.ndarray: The rendered image in a reused buffer the caller may modify
+        """
+        x, y, w, h = crop
+        out_width, out_height = size
+        index = 0
+        while (index < self.max_levels and w >> (index + 1) >= out_width
+               and h >> (index + 1) >= out_height):
+            index += 1
+        level = self._level(index)
+
+        # Map the region onto the level, keeping at least one pixel
+        x0, y0 = x >> index, y >> index
+        x1 = min(level.shape[1], max(x0 + 1, (x + w) >> index))
+        y1 = min(level.shape[0], max(y0 + 1, (y + h) >> index))
+        view = level[y0:y1, x0:x1]
+
+        output = self._output((out_height, out_width) + level.shape[2:], level.dtype)
+        if view.shape[:2] == (out_height, out_width):
+            np.copyto(output, view)
+        else:
+            cv2.resize(view, (out_width, out_height), dst=output, interpolation=cv2.INTER_AREA)
+        return output
+
+    def stats(self) -> Dict[str, int]:
+        """Level builds and buffer allocations so far."""
+        return {"levels_built": self.builds, "allocations": self.allocations,
+                "output_buffers": len(self._outputs)}
@@ -0,0 +1,238 @@
+"""
+Status sampler module.
+Refreshes each system status collector in the background so requests only read the latest snapshot.
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+from app.config import Config
+from app.services.system_status import COLLECTORS
+
+
+class StatusSampler:
+    """
+    Background sampler that refreshes every collector on its own interval.
+
+    Each collector runs in its own daemon thread, so a slow collector such as
+    ``osascript`` never delays the others. Readers get an immutable snapshot
+    that is swapped in whole after every refresh and never take a lock.
+    """
+
+    def __init__(self, collectors: Dict[str, Tuple[Callable[[], Any], float]]):
+        """
+        Args:
+            collectors: Mapping of field name to (collector function, interval in seconds)
+        """
+        self._collectors = collectors
+        self._snapshot: Dict[str, Tuple[Any, float]] = {}
+        self._ready = {name: threading.Event() for name in collectors}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+        self._listeners = []
+        # Bumped whenever a field's value changes; a cheap content version for ETags
+        self.generation = 0
+        # Bumped on every published sample, changed or not; versions bodies that carry sample times
+        self.revision = 0
+
+    @property
+    def running(self) -> bool:
+        """Whether the sampler threads have been started and not stopped."""
+        return bool(self._threads) and not self._stop.is_set()
+
+    def start(self) -> None:
+        """Start one refresh thread per collector."""
+        with self._lock:
+            if self._threads:
+                return
+            self._stop.clear()
+            for name, (collector, interval) in self._collectors.items():
+                thread = threading.Thread(
+                    target=self._run,
+                    args=(name, collector, interval),
+                    name=f"status-sampler-{name}",
+                    daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop all refresh threads.
+
+        Args:
+            timeout: Seconds to wait for each thread to finish
+        """
+        self._stop.set()
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for thread in threads:
+            thread.join(timeout)
+
+    def add_listener(self, listener: Callable[[str, Any, float], None]) -> None:
+        """
+        Register a callback run after every successful refresh.
+
+        Listeners run on the sampler thread of the refreshed field and must
+        return quickly.
+
+        Args:
+            listener: Called with (field name, value, sampled_at epoch seconds)
+        """
+        with self._lock:
+            self._listeners = self._listeners + [listener]
+
+    def refresh(self, name: str) -> None:
+        """
+        Run one collector immediately and publish its value.
+
+        Args:
+            name: The collector field name
+        """
+        collector, _ = self._collectors[name]
+        try:
+            value = collector()
+        except Exception:
+            # Keep serving the previous value; the age shows it is getting old
+            self._ready[name].set()
+            return
+
+        timestamp = time.time()
+        with self._lock:
+            previous = self._snapshot.get(name)
+            snapshot = dict(self._snapshot)
+            snapshot[name] = (value, timestamp)
+            self._snapshot = snapshot
+            if previous is None or previous[0] != value:
+                self.generation += 1
+            self.revision += 1
+            listeners = self._listeners
+        self._ready[name].set()
+
+        for listener in listeners:
+            try:
+                listener(name, value, timestamp)
+            except Exception:
+                pass  # A broken listener must not stop sampling
+
+    def _run(self, name: str, collector: Callable[[], Any], interval: float) -> None:
+        """Refresh loop for a single collector."""
+        while not self._stop.is_set():
+            self.refresh(name)
+            self._stop.wait(interval)
+
+    def snapshot(self, wait: float = 0) -> Dict[str, Tuple[Any, float]]:
+        """
+        Get the latest sampled values.
+
+        Args:
+            wait: Seconds to wait for collectors that have not produced a first sample yet
+
+        Returns:
+            Dict mapping field name to (value, sampled_at epoch seconds)
+        """
+        if wait > 0:
+            deadline = time.monotonic() + wait
+            for event in self._ready.values():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                event.wait(remaining)
+        return self._snapshot
+
+
+_sampler: Optional[StatusSampler] = None
+_sampler_lock = threading.Lock()
+
+
+def get_sampler() -> StatusSampler:
+    """
+    Get the process-wide status sampler, starting it on first use.
+
+    Returns:
+        StatusSampler: The running sampler
+    """
+    global _sampler
+    if _sampler is None or not _sampler.running:
+        with _sampler_lock:
+            if _sampler is None:
+                intervals = {
+                    "hostname": Config.STATUS_INTERVAL_HOSTNAME,
+                    "memory": Config.STATUS_INTERVAL_MEMORY,
+                    "storage": Config.STATUS_INTERVAL_STORAGE,
+                    "battery": Config.STATUS_INTERVAL_BATTERY,
+                    "running_apps": Config.STATUS_INTERVAL_APPS,
+                }
+                _sampler = StatusSampler({
+                    name: (collector, intervals[name])
+                    for name, collector in COLLECTORS.items()
+                })
+            _sampler.start()
+    return _sampler
+
+
+def stop_sampler(timeout: Optional[float] = None) -> None:
+    """
+    Stop the process-wide sampler if it was started.
+
+    Args:
+        timeout: Seconds to wait for each refresh thread
+    """
+    if _sampler is not None:
+        _sampler.stop(timeout)
+
+
+def get_status_version() -> int:
+    """
+    Get the content version of the sampled status.
+
+    Returns:
+        int: A counter that changes only when some sampled value changes
+    """
+    return get_sampler().generation
+
+
+def get_status_revision() -> int:
+    """
+    Get the version of the sampled status including its sample times.
+
+    Returns:
+        int: A counter that changes after every sample, even one that read the same values
+    """
+    return get_sampler().revision
+
+
+def get_sampled_status(max_apps: int = 10) -> Dict[str, Any]:
+    """
+    Get system status from the background sampler's latest snapshot.
+
+    Args:
+        max_apps: Maximum number of apps to include
+
+    Returns:
+        Dict containing all system information plus per-field sample times and ages
+    """
+    sampler = get_sampler()
+    snapshot = sampler.snapshot(wait=Config.STATUS_SAMPLER_WAIT)
+    missing = [name for name in COLLECTORS if name not in snapshot]
+    if missing:
+        # A collector is still on its first run; collect inline rather than serve a hole
+        for name in missing:
+            sampler.refresh(name)
+        snapshot = sampler.snapshot()
+    now = time.time()
+
+    status: Dict[str, Any] = {"status": "ok"}
+    sampled_at: Dict[str, Optional[float]] = {}
+    age: Dict[str, Optional[float]] = {}
+    for name in COLLECTORS:
+        value, timestamp = snapshot.get(name, (None, None))
+        status[name] = value
+        sampled_at[name] = timestamp
+        age[name] = round(now - timestamp, 3) if timestamp is not None else None
+
+    if status["running_apps"] is not None:
+        status["running_apps"] = status["running_apps"][:max_apps]
+    status["sampled_at"] = sampled_at
+    status["age"] = age
+    return status
@@ -0,0 +1,236 @@
+"""
+Status encoding module.
+Compact numeric status representation, serialized and compressed once per sampler revision.
+
+MessagePack, CBOR and brotli are optional: a format is only offered when
+its package (msgpack, cbor2, brotli) is installed.
+"""
+import gzip
+import json
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from app.config import Config
+from app.services.sampler import get_sampled_status, get_status_revision
+from app.services.system_status import _parse_percent, get_system_status
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Media type -> serializer, in server preference order for ties
+_FORMATS = {"application/json": lambda data: json.dumps(data, separators=(",", ":")).encode()}
+if msgpack is not None:
+    _FORMATS["application/msgpack"] = lambda data: msgpack.packb(data, use_bin_type=True)
+    _FORMATS["application/x-msgpack"] = _FORMATS["application/msgpack"]
+if cbor2 is not None:
+    _FORMATS["application/cbor"] = cbor2.dumps
+
+# Content-Encoding -> compressor; only JSON is compressed, the binary formats are already dense
+_ENCODINGS = {"gzip": lambda body: gzip.compress(body, compresslevel=6, mtime=0)}
+if brotli is not None:
+    _ENCODINGS["br"] = lambda body: brotli.compress(body, quality=5)
+
+
+def compact_status(status: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a sampled status dict to numeric fields.
+
+    Sizes are the collectors' raw byte counts rather than the rounded
+    display strings, percentages become numbers and sample times stay epoch
+    seconds. Values the collectors could not read become None.
+
+    Args:
+        status: Result of get_sampled_status() or get_system_status()
+
+    Returns:
+        Dict with the compact representation
+    """
+    memory = (status.get("memory") or {}).get("raw") or {}
+    storage = (status.get("storage") or {}).get("raw") or {}
+    battery = status.get("battery") or {}
+    return {
+        "hostname": status.get("hostname"),
+        "memory": {
+            "total": memory.get("total"),
+            "used": memory.get("used"),
+            "available": memory.get("available"),
+        },
+        "storage": {
+            "total": storage.get("total"),
+            "used": storage.get("used"),
+            "available": storage.get("available"),
+            "percent_used": storage.get("percent_used"),
+        },
+        "battery": {
+            "percent": _parse_percent(battery.get("percent")),
+            "status": battery.get("status"),
+        },
+        "running_apps": status.get("running_apps") or [],
+        "sampled_at": status.get("sampled_at", {}),
+    }
+
+
+def _quality(value: str) -> float:
+    """Parse the q parameter of one Accept/Accept-Encoding entry."""
+    for param in value.split(";")[1:]:
+        name, _, q = param.strip().partition("=")
+        if name == "q":
+            try:
+                return float(q)
+            except ValueError:
+                return 0.0
+    return 1.0
+
+
+def _preferences(header: str) -> List[Tuple[str, float]]:
+    return [(part.split(";")[0].strip().lower(), _quality(part)) for part in header.split(",") if part.strip()]
+
+
+def negotiate(accept: str, accept_encoding: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Pick the media type and content encoding for a request.
+
+    Args:
+        accept: The Accept header ("" means anything)
+        accept_encoding: The Accept-Encoding header
+
+    Returns:
+        Tuple of (media type or None if nothing acceptable is available, content encoding or None)
+    """
+    media_type = None
+    if not accept.strip():
+        media_type = "application/json"
+    else:
+        best = 0.0
+        for candidate, q in _preferences(accept):
+            if candidate in ("*/*", "application/*"):
+                candidate = "application/json"
+            if candidate in _FORMATS and q > best:
+                media_type, best = candidate, q
+
+    encoding = None
+    if media_type == "application/json":
+        best = 0.0
+        for candidate, q in _preferences(accept_encoding):
+            # Prefer brotli over gzip when the client rates them equally
+            if candidate in _ENCODINGS and (q > best or (q == best and candidate == "br")):
+                encoding, best = candidate, q
+    return media_type, encoding
+
+
+class EncodedStatusCache:
+    """
+    Encoded bodies for the current sampler revision.
+
+    Every client asking for the same format between two samples gets the
+    same bytes; the first request after a sample discards the previous
+    revision's bodies. The revision moves on every sample, not only when a
+    value changes, because the bodies carry the sample times.
+    """
+
+    def __init__(self):
+        self._revision: Optional[int] = None
+        self._bodies: Dict[Tuple, bytes] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, revision: int, max_apps: int, media_type: str, encoding: Optional[str]) -> bytes:
+        """
+        Get the encoded status body.
+
+        Args:
+            revision: The sampler revision read before the snapshot
+            max_apps: Maximum number of apps to include
+            media_type: One of the negotiated media types
+            encoding: Content encoding, or None
+
+        Returns:
+            bytes: The (possibly compressed) body
+        """
+        key = (max_apps, media_type, encoding)
+        with self._lock:
+            if self._revision == revision and key in self._bodies:
+                self.hits += 1
+                return self._bodies[key]
+            self.misses += 1
+
+        body = _FORMATS[media_type](compact_status(get_sampled_status(max_apps)))
+        if encoding is not None:
+            body = _ENCODINGS[encoding](body)
+
+        with self._lock:
+            if self._revision != revision:
+                if self._revision is not None and revision < self._revision:
+                    return body  # A newer revision is already cached; do not roll back
+                self._revision = revision
+                self._bodies = {}
+            self._bodies[key] = body
+        return body
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and the cached revision."""
+        return {"revision": self._revision, "entries": len(self._bodies),
+                "hits": self.hits, "misses": self.misses}
+
+
+_encoded = EncodedStatusCache()
+
+
+def encode_status(max_apps: int, accept: str = "",
+                  accept_encoding: str = "") -> Tuple[bool, Optional[bytes], Dict[str, str], Optional[str]]:
+    """
+    Get the compact status in the best format the client accepts.
+
+    Args:
+        max_apps: Maximum number of apps to include
+        accept: The request's Accept header
+        accept_encoding: The request's Accept-Encoding header
+
+    Without the background sampler (Config.STATUS_SAMPLER_ENABLED off) the
+    status is read through the collector cache and encoded per request, and
+    there is no ETag.
+
+    Returns:
+        Tuple of (success, body, response headers, error_message). The headers
+        carry Content-Type, Content-Encoding when compressed, a strong ETag
+        for this sampler revision and format, and Vary.
+    """
+    media_type, encoding = negotiate(accept, accept_encoding)
+    if media_type is None:
+        available = ", ".join(sorted(set(_FORMATS)))
+        return False, None, {}, f"No acceptable format; available: {available}"
+
+    headers = {"Content-Type": media_type, "Vary": "Accept, Accept-Encoding"}
+    if Config.STATUS_SAMPLER_ENABLED:
+        revision = get_status_revision()
+        body = _encoded.get(revision, max_apps, media_type, encoding)
+        headers["ETag"] = f'"status-{revision}-{max_apps}-{media_type.split("/")[-1]}-{encoding or "identity"}"'
+    else:
+        body = _FORMATS[media_type](compact_status(get_system_status(max_apps)))
+        if encoding is not None:
+            body = _ENCODINGS[encoding](body)
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return True, body, headers, None
+
+
+def get_encoding_stats() -> Dict[str, Any]:
+    """
+    Get encoded-body cache counters and the available formats.
+
+    Returns:
+        Dict with cache counters, media types and content encodings
+    """
+    return {**_encoded.stats(), "formats": sorted(_FORMATS), "encodings": sorted(_ENCODINGS)}
@@ -0,0 +1,234 @@
+"""
+Status events module.
+Pushes status changes from the shared sampler to Server-Sent Events subscribers.
+"""
+import json
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+from app.config import Config
+from app.services.sampler import get_sampler
+
+
+class StatusBroadcaster:
+    """
+    Change log of sampled status fields shared by every SSE subscriber.
+
+    Each change of a field's value gets the next event id. Subscribers keep
+    only the last id they sent, so a slow client never queues events: when
+    it catches up it receives the latest value of every field changed since
+    then in one message. A client further behind than the log gets a full
+    snapshot instead.
+
+    Ids restart with every process, so on the wire they carry a per-process
+    epoch ("<epoch>-<n>"); a client reconnecting with an id from an earlier
+    process gets a full snapshot rather than a delta against the wrong log.
+    """
+
+    def __init__(self, log_size: int = 256):
+        """
+        Args:
+            log_size: Number of recent changes kept for resuming clients
+        """
+        self.epoch = format(time.time_ns(), "x")
+        self._values: Dict[str, Tuple[Any, float]] = {}
+        self._log = deque(maxlen=log_size)  # (event id, field name)
+        self._last_id = 0
+        self._subscribers = 0
+        self._cond = threading.Condition()
+
+    @property
+    def last_id(self) -> int:
+        """Id of the most recent change."""
+        return self._last_id
+
+    def format_id(self, event_id: int) -> str:
+        """Wire form of an event id, as sent in the SSE id field."""
+        return f"{self.epoch}-{event_id}"
+
+    def parse_id(self, text: Optional[str]) -> Optional[int]:
+        """
+        Read a Last-Event-ID sent by a client.
+
+        Args:
+            text: The id as the client sent it
+
+        Returns:
+            The event id, or None if it is missing, malformed or from another process
+        """
+        epoch, _, number = (text or "").partition("-")
+        if epoch != self.epoch or not number.isdigit():
+            return None
+        return int(number)
+
+    def publish(self, name: str, value: Any, timestamp: float) -> None:
+        """
+        Record a sampled value; only a changed value produces an event.
+
+        Args:
+            name: The status field name
+            value: The sampled value
+            timestamp: When the value was sampled (epoch seconds)
+        """
+        with self._cond:
+            previous = self._values.get(name)
+            self._values[name] = (value, timestamp)
+            if previous is not None and previous[0] == value:
+                return
+            self._last_id += 1
+            self._log.append((self._last_id, name))
+            self._cond.notify_all()
+
+    def changes_since(self, event_id: Optional[int]) -> Tuple[int, bool, Dict[str, Tuple[Any, float]]]:
+        """
+        Get the fields changed after `event_id`.
+
+        Args:
+            event_id: The last event id the client received, or None
+
+        Returns:
+            Tuple of (current event id, whether this is a full snapshot, field -> (value, sampled_at))
+        """
+        with self._cond:
+            oldest = self._log[0][0] if self._log else self._last_id + 1
+            if event_id is None or event_id > self._last_id or event_id < oldest - 1:
+                return self._last_id, True, dict(self._values)
+            names = {name for eid, name in self._log if eid > event_id}
+            return self._last_id, False, {name: self._values[name] for name in names}
+
+    def wait(self, event_id: int, timeout: float) -> bool:
+        """
+        Wait for a change after `event_id`.
+
+        Returns:
+            True if there is a newer event
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: self._last_id > event_id, timeout)
+
+    def acquire_subscriber(self, limit: int) -> bool:
+        """Reserve a subscriber slot; False if `limit` subscribers are connected."""
+        with self._cond:
+            if self._subscribers >= limit:
+                return False
+            self._subscribers += 1
+            return True
+
+    def release_subscriber(self) -> None:
+        """Free a subscriber slot."""
+        with self._cond:
+            self._subscribers -= 1
+
+    @property
+    def subscribers(self) -> int:
+        """Number of connected subscribers."""
+        return self._subscribers
+
+
+_broadcaster: Optional[StatusBroadcaster] = None
+_broadcaster_lock = threading.Lock()
+
+
+def get_broadcaster() -> StatusBroadcaster:
+    """
+    Get the process-wide broadcaster, attaching it to the sampler on first use.
+
+    Returns:
+        StatusBroadcaster: The shared broadcaster
+    """
+    global _broadcaster
+    if _broadcaster is None:
+        with _broadcaster_lock:
+            if _broadcaster is None:
+                broadcaster = StatusBroadcaster(Config.STATUS_EVENTS_LOG_SIZE)
+                sampler = get_sampler()
+                sampler.add_listener(broadcaster.publish)
+                # Seed with what has been sampled so far
+                for name, (value, timestamp) in sampler.snapshot().items():
+                    broadcaster.publish(name, value, timestamp)
+                _broadcaster = broadcaster
+    return _broadcaster
+
+
+def _format_event(event: str, event_id: str, fields: Dict[str, Tuple[Any, float]],
+                  max_apps: int, retry: Optional[int] = None) -> bytes:
+    """Serialize changed fields as one SSE message."""
+    data: Dict[str, Any] = {}
+    sampled_at: Dict[str, float] = {}
+    for name, (value, timestamp) in fields.items():
+        data[name] = value[:max_apps] if name == "running_apps" else value
+        sampled_at[name] = timestamp
+    data["sampled_at"] = sampled_at
+    lines = []
+    if retry is not None:
+        lines.append(f"retry: {retry}")
+    lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+class _EventStream:
+    """
+    Iterable SSE body for one subscriber.
+
+    close() frees the subscriber slot even if the body was never iterated.
+    """
+
+    def __init__(self, broadcaster: StatusBroadcaster, last_event_id: Optional[int], max_apps: int):
+        self._broadcaster = broadcaster
+        self._last_id = last_event_id
+        self._max_apps = max_apps
+        self._closed = False
+
+    def __iter__(self) -> Iterator[bytes]:
+        broadcaster = self._broadcaster
+        heartbeat = Config.STATUS_EVENTS_HEARTBEAT
+        try:
+            # First message: whatever the client missed, or everything
+            event_id, full, fields = broadcaster.changes_since(self._last_id)
+            yield _format_event("snapshot" if full else "delta", broadcaster.format_id(event_id), fields,
+                                self._max_apps, retry=Config.STATUS_EVENTS_RETRY_MS)
+            self._last_id = event_id
+
+            while True:
+                if not broadcaster.wait(self._last_id, heartbeat):
+                    # Comment line keeps proxies and the browser from timing out
+                    yield b": keepalive\n\n"
+                    continue
+                event_id, full, fields = broadcaster.changes_since(self._last_id)
+                yield _format_event("snapshot" if full else "delta", broadcaster.format_id(event_id), fields,
+                                    self._max_apps)
+                self._last_id = event_id
+                # Coalesce bursts: fields changing within this window share one message
+                time.sleep(Config.STATUS_EVENTS_MIN_INTERVAL)
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            self._broadcaster.release_subscriber()
+
+
+def open_status_events(last_event_id: Optional[str] = None,
+                       max_apps: int = 10) -> Tuple[bool, Optional[Iterable[bytes]], Optional[str]]:
+    """
+    Open a Server-Sent Events stream of status changes.
+
+    Args:
+        last_event_id: The Last-Event-ID sent by a reconnecting client
+        max_apps: Maximum number of apps to include
+
+    Returns:
+        Tuple of (success, iterable of SSE body chunks, error_message)
+    """
+    broadcaster = get_broadcaster()
+    last_event_id = broadcaster.parse_id(last_event_id)
+    if not broadcaster.acquire_subscriber(Config.STATUS_EVENTS_MAX_SUBSCRIBERS):
+        return False, None, f"Status event subscriber limit ({Config.STATUS_EVENTS_MAX_SUBSCRIBERS}) reached"
+    if last_event_id is None:
+        # A new client needs every field, so wait for the sampler's first pass
+        get_sampler().snapshot(wait=Config.STATUS_SAMPLER_WAIT)
+    return True, _EventStream(broadcaster, last_event_id, max_apps), None
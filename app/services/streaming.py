@@ -0,0 +1,281 @@
+"""
+Camera streaming module.
+Serves MJPEG (multipart/x-mixed-replace) streams that share one capture and one encode per frame.
+"""
+import math
+import threading
+import time
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+from app.config import Config
+from app.services.camera import _encode_cached
+from app.services.capture import CaptureSession, get_session
+
+BOUNDARY = "frame"
+
+
+class _Viewer:
+    """
+    A connected client holding at most one pending frame.
+
+    A new frame replaces any frame the client has not taken yet, so a slow
+    client skips frames instead of buffering them.
+    """
+
+    def __init__(self, encoder: "_Encoder", fps: float):
+        self.encoder = encoder
+        self.fps = fps
+        self.skipped = 0
+        self._pending: Optional[Tuple[int, bytes]] = None
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def offer(self, seq: int, jpeg: bytes) -> None:
+        """Publish a frame to this viewer, replacing any untaken one."""
+        with self._cond:
+            if self._pending is not None:
+                self.skipped += 1
+            self._pending = (seq, jpeg)
+            self._cond.notify()
+
+    def close(self) -> None:
+        """Wake the viewer and tell it the stream has ended."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+
+    def take(self, timeout: float) -> Tuple[bool, Optional[bytes]]:
+        """
+        Take the pending frame, waiting up to `timeout` seconds for one.
+
+        Returns:
+            Tuple of (stream still open, jpeg_bytes or None)
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._pending is not None or self._closed, timeout)
+            pending, self._pending = self._pending, None
+            return not self._closed, pending[1] if pending else None
+
+
+class _Encoder:
+    """
+    Reads one camera at one output size, encodes each frame once and fans it out.
+
+    Frames are encoded no faster than the fastest current viewer asked for,
+    so viewers at 1 fps do not pay for encoding every captured frame.
+    """
+
+    def __init__(self, hub: "StreamHub", key: Tuple[int, int, int], session: CaptureSession):
+        self.key = key
+        self.viewers = []
+        self._hub = hub
+        self._session = session
+        self._viewers_changed = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name=f"camera-{key[0]}-mjpeg-{key[1]}x{key[2]}", daemon=True
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def wake(self) -> None:
+        """Re-evaluate the frame rate now, e.g. because a faster viewer joined."""
+        self._viewers_changed.set()
+
+    def _run(self) -> None:
+        camera_id, width, height = self.key
+        last_seq = 0
+        last_encoded = float("-inf")
+        while True:
+            self._viewers_changed.clear()
+            with self._hub._lock:
+                if not self.viewers:
+                    self._hub._encoders.pop(self.key, None)
+                    return
+                interval = 1.0 / max(viewer.fps for viewer in self.viewers)
+
+            # Pace to the fastest viewer; frames captured meanwhile are skipped, not encoded
+            delay = last_encoded + interval - time.monotonic()
+            if delay > 0:
+                self._viewers_changed.wait(delay)
+                continue
+
+            frame = self._session.wait_for_next(last_seq, timeout=1.0)
+            if frame is None:
+                if not self._session.alive:
+                    break
+                continue
+            last_seq = frame.seq
+            last_encoded = time.monotonic()
+
+            jpeg = _encode_cached(camera_id, frame, Config.STREAM_JPEG_QUALITY, (width, height))
+            if jpeg is None:
+                continue
+
+            with self._hub._lock:
+                viewers = list(self.viewers)
+            for viewer in viewers:
+                viewer.offer(frame.seq, jpeg)
+
+        # The camera went away: end every stream attached to this encoder
+        with self._hub._lock:
+            self._hub._encoders.pop(self.key, None)
+            viewers, self.viewers = self.viewers, []
+            self._hub._viewer_count -= len(viewers)
+        for viewer in viewers:
+            viewer.close()
+
+
+class StreamHub:
+    """
+    Registry of active MJPEG encoders and their viewers.
+
+    There is one encoder per (camera, output size), shared by every viewer
+    asking for that size, and a cap on viewers across all streams.
+    """
+
+    def __init__(self, max_viewers: int):
+        self.max_viewers = max_viewers
+        self._encoders: Dict[Tuple[int, int, int], _Encoder] = {}
+        self._viewer_count = 0
+        self._lock = threading.Lock()
+
+    def subscribe(self, session: CaptureSession, width: int, height: int, fps: float) -> Optional[_Viewer]:
+        """
+        Attach a viewer to the encoder for this camera and size.
+
+        Args:
+            session: The camera's capture session
+            width: Output width
+            height: Output height
+            fps: Frames per second the viewer wants
+
+        Returns:
+            The viewer, or None if the viewer limit has been reached
+        """
+        key = (session.camera_id, width, height)
+        with self._lock:
+            if self._viewer_count >= self.max_viewers:
+                return None
+            encoder = self._encoders.get(key)
+            start = encoder is None
+            if start:
+                encoder = self._encoders[key] = _Encoder(self, key, session)
+            viewer = _Viewer(encoder, fps)
+            encoder.viewers.append(viewer)
+            self._viewer_count += 1
+        if start:
+            encoder.start()
+        else:
+            encoder.wake()
+        return viewer
+
+    def unsubscribe(self, viewer: _Viewer) -> None:
+        """Detach a viewer; its encoder stops once it has no viewers left."""
+        with self._lock:
+            if viewer in viewer.encoder.viewers:
+                viewer.encoder.viewers.remove(viewer)
+                self._viewer_count -= 1
+        viewer.encoder.wake()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get stream counters.
+
+        Returns:
+            Dict with the number of active encoders and viewers
+        """
+        with self._lock:
+            return {"encoders": len(self._encoders), "viewers": self._viewer_count}
+
+
+_hub = StreamHub(Config.STREAM_MAX_VIEWERS)
+
+
+class _MjpegStream:
+    """
+    Iterable multipart body for one viewer.
+
+    close() detaches the viewer even if the body was never iterated, which
+    happens when a client disconnects before the first chunk is sent.
+    """
+
+    def __init__(self, viewer: _Viewer, fps: float):
+        self._viewer = viewer
+        self._interval = 1.0 / fps
+
+    def __iter__(self) -> Iterator[bytes]:
+        next_due = time.monotonic()
+        try:
+            while True:
+                open_, jpeg = self._viewer.take(timeout=5.0)
+                if not open_:
+                    return
+                if jpeg is None:
+                    continue
+                yield (
+                    f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n\r\n".encode()
+                    + jpeg + b"\r\n"
+                )
+                # Pace this viewer; frames published meanwhile replace each other
+                next_due += self._interval
+                delay = next_due - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_due = time.monotonic()
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        _hub.unsubscribe(self._viewer)
+
+
+def open_stream(camera_id: int = 0, fps: Optional[float] = None, width: Optional[int] = None,
+                height: Optional[int] = None) -> Tuple[bool, Optional[Iterable[bytes]], Optional[str]]:
+    """
+    Open an MJPEG stream for a camera.
+
+    Args:
+        camera_id: The camera index to stream
+        fps: Maximum frames per second for this viewer (defaults to Config.STREAM_DEFAULT_FPS,
+            which also replaces NaN and infinities)
+        width: Output width; the height follows the aspect ratio if not given
+        height: Output height; the width follows the aspect ratio if not given
+
+    Returns:
+        Tuple of (success, iterable of multipart body chunks, error_message)
+    """
+    if fps is None or not math.isfinite(fps):
+        fps = Config.STREAM_DEFAULT_FPS  # NaN would make every pacing check false and run unpaced
+    fps = min(max(fps, 0.1), Config.STREAM_MAX_FPS)
+
+    session = get_session(camera_id)
+    frame = session.latest(timeout=Config.CAMERA_FRAME_WAIT)
+    if frame is None:
+        return False, None, session.error or f"No frame from camera {camera_id} within {Config.CAMERA_FRAME_WAIT}s"
+
+    # Never upscale; fill in a missing dimension from the source aspect ratio
+    src_height, src_width = frame.image.shape[:2]
+    if width and not height:
+        height = round(src_height * width / src_width)
+    elif height and not width:
+        width = round(src_width * height / src_height)
+    elif not width:
+        width, height = src_width, src_height
+    width, height = min(width, src_width), min(height, src_height)
+    width, height = max(width, 16), max(height, 16)
+
+    viewer = _hub.subscribe(session, width, height, fps)
+    if viewer is None:
+        return False, None, f"Stream viewer limit ({_hub.max_viewers}) reached"
+    return True, _MjpegStream(viewer, fps), None
+
+
+def get_stream_stats() -> Dict[str, int]:
+    """
+    Get counters for active MJPEG streams.
+
+    Returns:
+        Dict with the number of active encoders and viewers
+    """
+    return _hub.stats()
@@ -2,108 +2,372 @@
 System status service module.
 Provides functions to get Mac system information like memory, storage, battery, and running apps.
 """
+import copy
 import subprocess
 import re
-from typing import Dict, List, Any
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, List, Any, Optional
+from app.config import Config
+from app.services.cache import TTLCache
+from app.services.instrumentation import (
+    SUBPROCESS_FAILURES, SUBPROCESS_SPAWNS, collector_failed, register_cache_stats, timed_collector
+)
+from app.services.native_metrics import get_backend
 
+# Shared cache for collector results; TTLs come from Config on every lookup
+_cache = TTLCache()
+register_cache_stats(lambda: {f"status_{key}": stats for key, stats in _cache.stats().items()})
 
-def get_hostname() -> str:
+# Worker pool for concurrent collection, created on first use
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+# Values reported when a collector fails or times out before producing anything.
+# Memory and storage carry their unrounded figures under "raw" (bytes; None when unknown).
+_UNKNOWN = {
+    "hostname": "Unknown",
+    "memory": {
+        "total": "Unknown", "used": "Unknown", "available": "Unknown",
+        "raw": {"total": None, "used": None, "available": None},
+    },
+    "storage": {
+        "total": "Unknown", "used": "Unknown", "available": "Unknown", "percent_used": "Unknown",
+        "raw": {"total": None, "used": None, "available": None, "percent_used": None},
+    },
+    "battery": {"percent": "Unknown", "status": "Unknown"},
+    "running_apps": [],
+}
+
+
+def _unknown(name: str) -> Any:
+    """Get a fresh copy of a field's Unknown value, so callers never share its nested dicts."""
+    return copy.deepcopy(_UNKNOWN[name])
+
+# Commands behind the subprocess collectors, run without a shell
+HOSTNAME_CMD = ["scutil", "--get", "ComputerName"]
+MEMSIZE_CMD = ["sysctl", "-n", "hw.memsize"]
+TOP_CMD = ["top", "-l", "1", "-s", "0"]
+DF_CMD = ["df", "-h", "/"]
+PMSET_CMD = ["pmset", "-g", "batt"]
+# One name per line: app names may contain commas
+APPS_CMD = [
+    "osascript",
+    "-e", 'tell application "System Events" to set appNames to name of (processes whose background only is false)',
+    "-e", "set AppleScript's text item delimiters to linefeed",
+    "-e", "appNames as text",
+]
+
+
+def _getoutput(cmd: List[str]) -> str:
     """
-    Get the computer's hostname.
+    Run a command like subprocess.getoutput, but without a shell and bounded by a timeout.
     
+    Args:
+        cmd: The command and its arguments
+        
     Returns:
-        str: The computer name
+        str: Combined stdout and stderr without the trailing newline
+        
+    Raises:
+        OSError: If the command cannot be started
+        subprocess.TimeoutExpired: If the command outlives STATUS_SUBPROCESS_TIMEOUT
     """
+    SUBPROCESS_SPAWNS.inc(cmd[0])
     try:
-        return subprocess.getoutput("scutil --get ComputerName")
-    except Exception:
-        return "Unknown"
+        result = subprocess.run(
+            cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            text=True, timeout=Config.STATUS_SUBPROCESS_TIMEOUT
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        SUBPROCESS_FAILURES.inc(cmd[0])
+        raise
+    output = result.stdout
+    return output[:-1] if output.endswith('\n') else output
 
 
-def get_memory_info() -> Dict[str, str]:
-    """
-    Get system memory information.
-    
-    Returns:
-        Dict containing total, used, and available memory
-    """
+def _format_gb(num_bytes: float) -> str:
+    """Format a byte count the way the status API reports sizes."""
+    return f"{round(num_bytes / (1024**3), 1)} GB"
+
+
+def _format_memory(memory: Dict[str, int]) -> Dict[str, Any]:
+    """Format native memory figures in bytes for the status API, keeping the bytes under "raw"."""
+    return {
+        "total": _format_gb(memory["total"]),
+        "used": _format_gb(memory["used"]),
+        "available": _format_gb(memory["available"]),
+        "raw": {key: int(memory[key]) for key in ("total", "used", "available")},
+    }
+
+
+def _format_storage(storage: Dict[str, float]) -> Dict[str, Any]:
+    """Format native storage figures in bytes for the status API, keeping the numbers under "raw"."""
+    return {
+        "total": _format_gb(storage["total"]),
+        "used": _format_gb(storage["used"]),
+        "available": _format_gb(storage["available"]),
+        "percent_used": f"{round(storage['percent_used'])}%",
+        "raw": {
+            "total": int(storage["total"]),
+            "used": int(storage["used"]),
+            "available": int(storage["available"]),
+            "percent_used": storage["percent_used"],
+        },
+    }
+
+
+# Sizes as printed by df -h ("460Gi", "512M")
+_SIZE_RE = re.compile(r'^\s*([\d.]+)\s*([KMGTP]?)i?B?\s*$', re.IGNORECASE)
+_SIZE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4, "P": 1024**5}
+
+
+def _parse_size(text: str) -> Optional[float]:
+    """Convert a df -h size such as "460Gi" to bytes."""
+    match = _SIZE_RE.match(str(text))
+    if not match:
+        return None
+    return float(match.group(1)) * _SIZE_UNITS[match.group(2).upper()]
+
+
+def _parse_percent(text: str) -> Optional[float]:
+    """Convert "85%" to 85.0; anything else (e.g. "Plugged In") is None."""
+    text = str(text).strip()
+    if not text.endswith("%"):
+        return None
+    try:
+        return float(text[:-1])
+    except ValueError:
+        return None
+
+
+def _parse_memory(top_output: str, total_memory_bytes: Optional[int]) -> Dict[str, Any]:
+    """Parse the PhysMem line of top output; raw figures the output lacks are None."""
     # Default values
     total_memory_gb = 8.0
     used_memory_gb = 7.4
     free_memory_gb = 0.6
+    used_bytes = free_bytes = None
     
-    try:
-        # Get total memory
-        total_memory_bytes = int(subprocess.getoutput("sysctl -n hw.memsize"))
+    if total_memory_bytes is not None:
         total_memory_gb = round(total_memory_bytes / (1024**3), 1)
+    
+    physmem = next((line for line in top_output.splitlines() if "PhysMem" in line), "")
+    if "used" in physmem and "unused" in physmem:
+        used_match = re.search(r'(\d+)M used', physmem)
+        unused_match = re.search(r'(\d+)M unused', physmem)
         
-        # Get memory usage from top
-        top_output = subprocess.getoutput("top -l 1 -s 0 | grep PhysMem")
-        if "used" in top_output and "unused" in top_output:
-            used_match = re.search(r'(\d+)M used', top_output)
-            unused_match = re.search(r'(\d+)M unused', top_output)
+        if used_match and unused_match:
+            used_mb = int(used_match.group(1))
+            unused_mb = int(unused_match.group(1))
             
-            if used_match and unused_match:
-                used_mb = int(used_match.group(1))
-                unused_mb = int(unused_match.group(1))
-                
-                used_memory_gb = round(used_mb / 1024, 1)
-                free_memory_gb = round(unused_mb / 1024, 1)
-    except Exception:
-        pass  # Use default values
+            used_memory_gb = round(used_mb / 1024, 1)
+            free_memory_gb = round(unused_mb / 1024, 1)
+            used_bytes = used_mb * 1024**2
+            free_bytes = unused_mb * 1024**2
     
     return {
         "total": f"{total_memory_gb} GB",
         "used": f"{used_memory_gb} GB",
-        "available": f"{free_memory_gb} GB"
+        "available": f"{free_memory_gb} GB",
+        "raw": {"total": total_memory_bytes, "used": used_bytes, "available": free_bytes},
     }
 
 
-def get_storage_info() -> Dict[str, str]:
-    """
-    Get system storage information.
+def _df_storage(total: str, used: str, available: str, percent_used: str) -> Dict[str, Any]:
+    """Storage fields as df -h prints them; its sizes are the most precise figures it gives."""
+    raw_sizes = [_parse_size(text) for text in (total, used, available)]
+    return {
+        "total": total,
+        "used": used,
+        "available": available,
+        "percent_used": percent_used,
+        "raw": {
+            "total": int(raw_sizes[0]) if raw_sizes[0] is not None else None,
+            "used": int(raw_sizes[1]) if raw_sizes[1] is not None else None,
+            "available": int(raw_sizes[2]) if raw_sizes[2] is not None else None,
+            "percent_used": _parse_percent(percent_used),
+        },
+    }
+
+
+def _parse_storage(storage_info: str) -> Dict[str, Any]:
+    """Parse df -h output for the root volume."""
+    storage_lines = storage_info.strip().split('\n')
     
-    Returns:
-        Dict containing total, used, available storage and usage percentage
-    """
-    try:
-        storage_info = subprocess.getoutput("df -h /")
-        storage_lines = storage_info.strip().split('\n')
+    if len(storage_lines) > 1:
+        data_line = storage_lines[1]
+        parts = data_line.split()
         
-        if len(storage_lines) > 1:
-            data_line = storage_lines[1]
+        if len(parts) >= 5:
+            return _df_storage(*parts[1:5])
+        elif len(parts) == 1 and len(storage_lines) > 2:
+            # Handle case where filesystem name is on separate line
+            data_line = storage_lines[2]
             parts = data_line.split()
-            
-            if len(parts) >= 5:
-                return {
-                    "total": parts[1],
-                    "used": parts[2],
-                    "available": parts[3],
-                    "percent_used": parts[4]
-                }
-            elif len(parts) == 1 and len(storage_lines) > 2:
-                # Handle case where filesystem name is on separate line
-                data_line = storage_lines[2]
-                parts = data_line.split()
-                if len(parts) >= 4:
-                    return {
-                        "total": parts[0],
-                        "used": parts[1],
-                        "available": parts[2],
-                        "percent_used": parts[3]
-                    }
-    except Exception:
-        pass
+            if len(parts) >= 4:
+                return _df_storage(*parts[0:4])
     
     # Return unknown values if parsing fails
+    return _unknown("storage")
+
+
+def _parse_battery(battery_info: str) -> Dict[str, str]:
+    """Parse pmset -g batt output."""
+    if "InternalBattery" in battery_info:
+        battery_match = re.search(r'(\d+)%.*?(\w+)', battery_info)
+        if battery_match:
+            return {
+                "percent": battery_match.group(1) + "%",
+                "status": battery_match.group(2)
+            }
+        return _unknown("battery")
     return {
-        "total": "Unknown",
-        "used": "Unknown",
-        "available": "Unknown",
-        "percent_used": "Unknown"
+        "percent": "Plugged In",
+        "status": "AC Power"
     }
 
 
+def _parse_running_apps(apps_info: str) -> List[str]:
+    """Parse the app names printed by osascript, one per line."""
+    return [app.strip() for app in apps_info.splitlines() if app.strip()]
+
+
+@timed_collector("hostname")
+def _read_hostname() -> str:
+    """Read the computer name with scutil."""
+    try:
+        return _getoutput(HOSTNAME_CMD)
+    except Exception:
+        collector_failed("hostname", "unknown")
+        return "Unknown"
+
+
+def _read_total_memory() -> int:
+    """Read total physical memory in bytes with sysctl."""
+    return int(_getoutput(MEMSIZE_CMD))
+
+
+@timed_collector("memory")
+def _read_memory_info() -> Dict[str, Any]:
+    """Read memory usage in-process when possible, falling back to top."""
+    backend = get_backend()
+    if backend is not None:
+        try:
+            return _format_memory(backend.memory())
+        except (OSError, KeyError, ValueError):
+            collector_failed("memory", "fallback")
+    return _read_memory_info_subprocess()
+
+
+def _read_memory_info_subprocess() -> Dict[str, Any]:
+    """Read memory usage from top, reusing the cached total memory."""
+    try:
+        total_memory_bytes = _cache.get("memory_total", _read_total_memory, Config.STATUS_TTL_MEMORY_TOTAL)
+    except Exception:
+        total_memory_bytes = None
+    try:
+        top_output = _getoutput(TOP_CMD)
+    except Exception:
+        top_output = ""  # Use default values
+    if total_memory_bytes is None or "PhysMem" not in top_output:
+        collector_failed("memory", "unknown")
+    return _parse_memory(top_output, total_memory_bytes)
+
+
+@timed_collector("storage")
+def _read_storage_info() -> Dict[str, Any]:
+    """Read root volume usage in-process when possible, falling back to df."""
+    backend = get_backend()
+    if backend is not None:
+        try:
+            return _format_storage(backend.storage("/"))
+        except OSError:
+            collector_failed("storage", "fallback")
+    return _read_storage_info_subprocess()
+
+
+def _read_storage_info_subprocess() -> Dict[str, Any]:
+    """Read root volume usage with df."""
+    try:
+        storage = _parse_storage(_getoutput(DF_CMD))
+    except Exception:
+        storage = _unknown("storage")
+    if storage == _UNKNOWN["storage"]:
+        collector_failed("storage", "unknown")
+    return storage
+
+
+@timed_collector("battery")
+def _read_battery_info() -> Dict[str, str]:
+    """Read battery state with pmset."""
+    try:
+        battery = _parse_battery(_getoutput(PMSET_CMD))
+    except Exception:
+        battery = _unknown("battery")
+    if battery == _UNKNOWN["battery"]:
+        collector_failed("battery", "unknown")
+    return battery
+
+
+@timed_collector("running_apps")
+def _read_running_apps() -> List[str]:
+    """Read the names of all foreground apps with osascript."""
+    try:
+        return _parse_running_apps(_getoutput(APPS_CMD))
+    except Exception:
+        collector_failed("running_apps", "unknown")
+        return []
+
+
+# Config setting holding each cached field's TTL, read on every lookup
+_TTL_SETTINGS = {
+    "hostname": "STATUS_TTL_HOSTNAME",
+    "memory": "STATUS_TTL_MEMORY",
+    "storage": "STATUS_TTL_STORAGE",
+    "battery": "STATUS_TTL_BATTERY",
+    "running_apps": "STATUS_TTL_APPS",
+}
+
+
+def _cached(name: str, wait: Optional[float] = None) -> Any:
+    """Get a status field from the cache, running its collector when stale."""
+    return _cache.get(name, COLLECTORS[name], getattr(Config, _TTL_SETTINGS[name]), wait=wait)
+
+
+def get_hostname() -> str:
+    """
+    Get the computer's hostname.
+    
+    Returns:
+        str: The computer name
+    """
+    return _cached("hostname")
+
+
+def get_memory_info() -> Dict[str, Any]:
+    """
+    Get system memory information.
+    
+    Returns:
+        Dict containing total, used, and available memory, formatted, and
+        under "raw" the same figures in bytes
+    """
+    return _cached("memory")
+
+
+def get_storage_info() -> Dict[str, Any]:
+    """
+    Get system storage information.
+    
+    Returns:
+        Dict containing total, used, available storage and usage percentage,
+        formatted, and under "raw" the same figures in bytes and percent
+    """
+    return _cached("storage")
+
+
 def get_battery_info() -> Dict[str, str]:
     """
     Get battery status information.
@@ -111,61 +375,115 @@ def get_battery_info() -> Dict[str, str]:
     Returns:
         Dict containing battery percentage and status
     """
-    try:
-        battery_info = subprocess.getoutput("pmset -g batt")
-        
-        if "InternalBattery" in battery_info:
-            battery_match = re.search(r'(\d+)%.*?(\w+)', battery_info)
-            if battery_match:
-                return {
-                    "percent": battery_match.group(1) + "%",
-                    "status": battery_match.group(2)
-                }
-        else:
-            return {
-                "percent": "Plugged In",
-                "status": "AC Power"
-            }
-    except Exception:
-        pass
-    
-    return {
-        "percent": "Unknown",
-        "status": "Unknown"
-    }
+    return _cached("battery")
 
 
-def get_running_apps(max_apps: int = 10) -> List[str]:
+def get_running_apps(max_apps: Optional[int] = 10) -> List[str]:
     """
     Get list of running applications.
     
     Args:
-        max_apps: Maximum number of apps to return
+        max_apps: Maximum number of apps to return, or None for all of them
         
     Returns:
         List of running application names
     """
-    try:
-        apps_info = subprocess.getoutput(
-            'osascript -e \'tell application "System Events" to get name of '
-            '(processes whose background only is false)\''
-        )
-        running_apps = [app.strip() for app in apps_info.split(',') if app.strip()]
-        return running_apps[:max_apps]
-    except Exception:
-        return []
+    running_apps = _cached("running_apps")
+    return running_apps[:max_apps]
+
+
+def get_cache_stats() -> Dict[str, Dict[str, int]]:
+    """
+    Get collector cache counters for tuning the TTLs.
+    
+    Returns:
+        Dict mapping each collector to its hit/miss/wait/refresh/error counts
+    """
+    return _cache.stats()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Get the shared collector pool, creating it on first use."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=Config.STATUS_COLLECTOR_WORKERS,
+                    thread_name_prefix="status-collector"
+                )
+    return _executor
+
+
+def _collect_concurrently(max_apps: int, timeout: float) -> Dict[str, Any]:
+    """
+    Run every collector in parallel and wait at most `timeout` seconds for each.
+    
+    Collectors that miss the deadline keep running in the background and fill
+    the cache for later requests; this response reports the last cached value
+    (or Unknown) for them and lists them under "stale".
+    
+    Only fields that need a load of their own are handed to the pool. When
+    another request is already loading a field, this thread waits for that
+    load until the deadline instead of parking a pool worker on it, so a hung
+    command or a burst of requests at expiry cannot fill the pool with waiters.
+    """
+    executor = _get_executor()
+    deadline = time.monotonic() + timeout
+    flights = {name: _cache.in_flight(name) for name in COLLECTORS}
+    futures = {
+        name: executor.submit(_cached, name, timeout)
+        for name, flight in flights.items() if flight is None
+    }
+    
+    status: Dict[str, Any] = {"status": "ok"}
+    stale: Dict[str, str] = {}
+    for name in COLLECTORS:
+        remaining = max(0.0, deadline - time.monotonic())
+        flight = flights[name]
+        try:
+            if flight is None:
+                status[name] = futures[name].result(timeout=remaining)
+            elif not flight.done.wait(remaining):
+                raise TimeoutError
+            elif flight.error is not None:
+                raise flight.error
+            else:
+                status[name] = flight.value
+        except Exception as e:
+            if flight is None:
+                futures[name].cancel()  # Still queued: drop it rather than run it for nobody
+            stale[name] = "timeout" if isinstance(e, (FutureTimeoutError, TimeoutError)) else "error"
+            status[name] = _cache.peek(name, _unknown(name))
+    
+    status["running_apps"] = status["running_apps"][:max_apps]
+    if stale:
+        status["stale"] = stale
+    return status
 
 
-def get_system_status(max_apps: int = 10) -> Dict[str, Any]:
+def get_system_status(max_apps: int = 10, concurrent: Optional[bool] = None,
+                      timeout: Optional[float] = None) -> Dict[str, Any]:
     """
     Get complete system status information.
     
     Args:
         max_apps: Maximum number of apps to include
+        concurrent: Run collectors in parallel (defaults to Config.STATUS_CONCURRENT)
+        timeout: Per-collector timeout in seconds for concurrent mode
+            (defaults to Config.STATUS_COLLECTOR_TIMEOUT)
         
     Returns:
-        Dict containing all system information
+        Dict containing all system information. In concurrent mode, fields
+        whose collector timed out or failed are listed under "stale".
     """
+    if concurrent is None:
+        concurrent = Config.STATUS_CONCURRENT
+    if concurrent:
+        if timeout is None:
+            timeout = Config.STATUS_COLLECTOR_TIMEOUT
+        return _collect_concurrently(max_apps, timeout)
+    
     return {
         "status": "ok",
         "hostname": get_hostname(),
@@ -174,3 +492,14 @@ def get_system_status(max_apps: int = 10) -> Dict[str, Any]:
         "battery": get_battery_info(),
         "running_apps": get_running_apps(max_apps)
     }
+
+
+# Uncached collectors backing each top-level status field, in response order.
+# The running apps collector returns every app; callers trim the list.
+COLLECTORS = {
+    "hostname": _read_hostname,
+    "memory": _read_memory_info,
+    "storage": _read_storage_info,
+    "battery": _read_battery_info,
+    "running_apps": _read_running_apps,
+}
@@ -0,0 +1,335 @@
+"""
+Time-lapse module.
+Captures frames from the camera service on a schedule and writes JPEG sequences or segmented video
+from a small encoder pool fed through bounded queues.
+"""
+import fcntl
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+import cv2
+import numpy as np
+from app.config import Config
+from app.services.capture import CaptureSession, get_session
+from app.services.instrumentation import TIMELAPSE_FRAMES
+
+# Container extension for each supported VideoWriter codec
+VIDEO_CODECS = {"mp4v": ".mp4", "avc1": ".mp4", "MJPG": ".avi", "XVID": ".avi"}
+
+
+class _Shot(NamedTuple):
+    camera_id: int
+    timestamp: float
+    image: np.ndarray  # A capture-session frame; shared, never modified
+
+
+class _Segment:
+    """An open video file for one camera."""
+
+    def __init__(self, path: Path, writer: cv2.VideoWriter, size: Tuple[int, int]):
+        self.path = path
+        self.writer = writer
+        self.size = size
+        self.frames = 0
+
+
+class _CameraStats:
+    __slots__ = ("captured", "written", "dropped", "failed", "bytes", "last_capture_at", "last_error")
+
+    def __init__(self):
+        self.captured = self.written = self.dropped = self.failed = self.bytes = 0
+        self.last_capture_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+
+class TimelapseRecorder:
+    """
+    Scheduled frame capture with encoding off the capture path.
+
+    A scheduler thread takes the newest frame of each camera's capture
+    session every `interval` seconds and offers it to a bounded queue
+    without blocking. When an encoder falls behind the frame is dropped
+    and counted, so recording never holds up the capture session or
+    interactive requests that share it.
+
+    Each camera is pinned to one encoder thread (camera index modulo the
+    pool size) with its own queue, so its frames are written in order;
+    that matters for video segments.
+    """
+
+    def __init__(self, cameras: List[int], interval: float, directory: Path, output_format: str = "jpeg",
+                 workers: int = 2, queue_size: int = 8, jpeg_quality: int = 85,
+                 segment_frames: int = 240, video_fps: float = 24.0, codec: str = "mp4v"):
+        """
+        Args:
+            cameras: Camera indices to record
+            interval: Seconds between captures
+            directory: Root directory; each camera gets a camera-<index> subdirectory
+            output_format: "jpeg" for an image sequence or "video" for segmented video files
+            workers: Encoder threads
+            queue_size: Frames each encoder may have waiting before new ones are dropped
+            jpeg_quality: Quality of sequence images
+            segment_frames: Frames per video file before a new one is started
+            video_fps: Playback rate of the video files
+            codec: VideoWriter FourCC (see VIDEO_CODECS)
+        """
+        self.cameras = cameras
+        self.interval = interval
+        self.directory = Path(directory)
+        self.output_format = output_format
+        self.jpeg_quality = jpeg_quality
+        self.segment_frames = segment_frames
+        self.video_fps = video_fps
+        self.codec = codec
+        self._queues = [queue.Queue(maxsize=queue_size) for _ in range(max(1, workers))]
+        self._segments: Dict[int, _Segment] = {}
+        self._sessions: Dict[int, CaptureSession] = {}  # Used by the scheduler thread only
+        self._stats = {camera_id: _CameraStats() for camera_id in cameras}
+        self._stats_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._lock_file: Optional[int] = None
+        self._threads: List[threading.Thread] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._threads) and not self._stop.is_set()
+
+    def start(self) -> bool:
+        """
+        Start the scheduler and encoder threads.
+
+        Only one process may record into a directory: when another process
+        (e.g. a second gunicorn worker) already holds it, nothing is started.
+
+        Returns:
+            True if recording started
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.directory / ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_file = fd
+
+        for index, frames in enumerate(self._queues):
+            self._threads.append(threading.Thread(
+                target=self._encode_loop, args=(frames,), name=f"timelapse-encoder-{index}", daemon=True
+            ))
+        self._threads.append(threading.Thread(target=self._schedule_loop, name="timelapse-scheduler", daemon=True))
+        for thread in self._threads:
+            thread.start()
+        return True
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop capturing, write out queued frames and close open video files.
+
+        Args:
+            timeout: Seconds to wait for each thread
+        """
+        self._stop.set()
+        for frames in self._queues:
+            try:
+                frames.put_nowait(None)  # Wake an idle encoder
+            except queue.Full:
+                pass  # A busy encoder checks the stop flag between frames
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout)
+        for camera_id in list(self._segments):
+            self._close_segment(camera_id)
+        if self._lock_file is not None:
+            os.close(self._lock_file)
+            self._lock_file = None
+
+    def _count(self, camera_id: int, outcome: str, written_bytes: int = 0) -> None:
+        TIMELAPSE_FRAMES.inc(str(camera_id), outcome)
+        with self._stats_lock:
+            stats = self._stats[camera_id]
+            setattr(stats, outcome, getattr(stats, outcome) + 1)
+            stats.bytes += written_bytes
+
+    def _schedule_loop(self) -> None:
+        # Touch the sessions between captures, so an interval longer than the
+        # idle timeout does not release (and reopen and warm up) each camera
+        keepalive = max(Config.CAMERA_IDLE_TIMEOUT / 2, 0.1)
+        next_at = time.monotonic()
+        while not self._stop.is_set():
+            for camera_id in self.cameras:
+                self._capture(camera_id)
+            # Fixed-rate schedule; after a long stall skip the missed slots instead of bursting
+            next_at += self.interval
+            now = time.monotonic()
+            if next_at < now:
+                next_at = now + self.interval
+            while now < next_at and not self._stop.wait(min(next_at - now, keepalive)):
+                for session in self._sessions.values():
+                    session.touch()
+                now = time.monotonic()
+
+    def _capture(self, camera_id: int) -> None:
+        session = self._sessions[camera_id] = get_session(camera_id)
+        frame = session.latest(timeout=Config.CAMERA_FRAME_WAIT)
+        if frame is None:
+            with self._stats_lock:
+                self._stats[camera_id].last_error = session.error or "No frame"
+            self._count(camera_id, "failed")
+            return
+        self._count(camera_id, "captured")
+        with self._stats_lock:
+            self._stats[camera_id].last_capture_at = frame.timestamp
+        try:
+            self._queues[camera_id % len(self._queues)].put_nowait(_Shot(camera_id, frame.timestamp, frame.image))
+        except queue.Full:
+            self._count(camera_id, "dropped")
+
+    def _encode_loop(self, frames: "queue.Queue[Optional[_Shot]]") -> None:
+        while True:
+            try:
+                shot = frames.get(timeout=1.0)
+            except queue.Empty:
+                shot = None
+            if shot is None:
+                # Frames queued before stop() are still written
+                if self._stop.is_set() and frames.empty():
+                    return
+                continue
+            try:
+                if self.output_format == "video":
+                    written = self._write_video(shot)
+                else:
+                    written = self._write_jpeg(shot)
+            except Exception as e:
+                with self._stats_lock:
+                    self._stats[shot.camera_id].last_error = str(e)
+                self._count(shot.camera_id, "failed")
+                continue
+            self._count(shot.camera_id, "written", written)
+
+    def _camera_dir(self, camera_id: int, timestamp: float) -> Path:
+        path = self.directory / f"camera-{camera_id}" / datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d")
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def _write_jpeg(self, shot: _Shot) -> int:
+        ok, jpeg = cv2.imencode(".jpg", shot.image, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if not ok:
+            raise RuntimeError("JPEG encoding failed")
+        name = datetime.fromtimestamp(shot.timestamp).strftime("%H%M%S-%f")[:-3] + ".jpg"
+        path = self._camera_dir(shot.camera_id, shot.timestamp) / name
+        # Write then rename, so readers never see a partial image
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(jpeg.tobytes())
+        os.replace(tmp, path)
+        return len(jpeg)
+
+    def _write_video(self, shot: _Shot) -> int:
+        size = (shot.image.shape[1], shot.image.shape[0])
+        segment = self._segments.get(shot.camera_id)
+        if segment is not None and (segment.frames >= self.segment_frames or segment.size != size):
+            self._close_segment(shot.camera_id)
+            segment = None
+        if segment is None:
+            name = datetime.fromtimestamp(shot.timestamp).strftime("%H%M%S-%f")[:-3] + VIDEO_CODECS.get(self.codec, ".avi")
+            path = self._camera_dir(shot.camera_id, shot.timestamp) / name
+            writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*self.codec), self.video_fps, size)
+            if not writer.isOpened():
+                raise RuntimeError(f"Cannot open {self.codec} video writer for {path}")
+            segment = self._segments[shot.camera_id] = _Segment(path, writer, size)
+        segment.writer.write(shot.image)
+        segment.frames += 1
+        return 0  # The writer buffers; the file size is counted when the segment is closed
+
+    def _close_segment(self, camera_id: int) -> None:
+        segment = self._segments.pop(camera_id, None)
+        if segment is not None:
+            segment.writer.release()
+            if segment.path.exists():
+                with self._stats_lock:
+                    self._stats[camera_id].bytes += segment.path.stat().st_size
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Recording settings and per-camera counters.
+
+        Returns:
+            Dict with the settings, queue depths and frames captured, written,
+            dropped and failed per camera
+        """
+        with self._stats_lock:
+            cameras = {
+                camera_id: {name: getattr(stats, name) for name in _CameraStats.__slots__}
+                for camera_id, stats in self._stats.items()
+            }
+        return {
+            "running": self.running,
+            "format": self.output_format,
+            "interval": self.interval,
+            "directory": str(self.directory),
+            "queued": [frames.qsize() for frames in self._queues],
+            "cameras": cameras,
+        }
+
+
+_recorder: Optional[TimelapseRecorder] = None
+_recorder_lock = threading.Lock()
+
+
+def start_timelapse() -> Optional[TimelapseRecorder]:
+    """
+    Start the recorder configured in Config, once per process.
+
+    Returns:
+        The recorder, or None if time-lapse recording is disabled or another process is recording
+    """
+    global _recorder
+    with _recorder_lock:
+        if _recorder is None and Config.TIMELAPSE_ENABLED:
+            recorder = TimelapseRecorder(
+                cameras=Config.TIMELAPSE_CAMERAS,
+                interval=Config.TIMELAPSE_INTERVAL,
+                directory=Config.TIMELAPSE_DIR,
+                output_format=Config.TIMELAPSE_FORMAT,
+                workers=Config.TIMELAPSE_WORKERS,
+                queue_size=Config.TIMELAPSE_QUEUE_SIZE,
+                jpeg_quality=Config.TIMELAPSE_JPEG_QUALITY,
+                segment_frames=Config.TIMELAPSE_SEGMENT_FRAMES,
+                video_fps=Config.TIMELAPSE_VIDEO_FPS,
+                codec=Config.TIMELAPSE_VIDEO_CODEC,
+            )
+            if recorder.start():
+                _recorder = recorder
+        return _recorder
+
+
+def stop_timelapse(timeout: Optional[float] = None) -> None:
+    """
+    Stop the recorder and close its files.
+
+    Args:
+        timeout: Seconds to wait for each recorder thread
+    """
+    global _recorder
+    with _recorder_lock:
+        recorder, _recorder = _recorder, None
+    if recorder is not None:
+        recorder.stop(timeout)
+
+
+def get_timelapse_stats() -> Dict[str, Any]:
+    """
+    Get time-lapse recorder state.
+
+    Returns:
+        Dict with the recorder's counters, or {"running": False} if it is not recording in this process
+    """
+    recorder = _recorder
+    if recorder is None:
+        return {"running": False, "enabled": Config.TIMELAPSE_ENABLED}
+    return recorder.stats()
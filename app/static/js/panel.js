@@ -0,0 +1,38 @@
+/**
+ * Control panel and status page helpers.
+ * The pages are cached without the token, so links get it from this page's URL.
+ */
+
+const TOKEN = new URLSearchParams(location.search).get('token') || '';
+
+function withToken(path) {
+    const separator = path.includes('?') ? '&' : '?';
+    return `${path}${separator}token=${encodeURIComponent(TOKEN)}`;
+}
+
+document.querySelectorAll('a[data-path]').forEach(link => {
+    link.href = withToken(link.dataset.path);
+});
+
+function postAction(path, label) {
+    fetch(path, { method: 'POST', headers: { 'X-Auth-Token': TOKEN } })
+        .then(response => response.json())
+        .then(data => showResult(label + ': ' + JSON.stringify(data)))
+        .catch(error => showResult('Error: ' + error));
+}
+
+function lockScreen() {
+    postAction('/lock', 'Lock');
+}
+
+function restartMac() {
+    if (confirm('Are you sure you want to restart the Mac?')) {
+        postAction('/restart', 'Restart');
+    }
+}
+
+function showResult(message) {
+    const result = document.getElementById('result');
+    result.style.display = 'block';
+    result.textContent = message;
+}
@@ -0,0 +1,57 @@
+"""
+Collector benchmark.
+Compares the in-process memory/storage collectors against the subprocess (top/df) path.
+
+Usage:
+    python benchmarks/bench_collectors.py [--iterations N]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services import system_status  # noqa: E402
+from app.services.native_metrics import get_backend  # noqa: E402
+
+
+def time_call(func, iterations: int) -> float:
+    """Return the mean wall time of `func()` in microseconds."""
+    func()  # warm up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    backend = get_backend()
+    if backend is None:
+        sys.exit(f"No native backend for platform {sys.platform!r}")
+
+    cases = [
+        ("memory", "native", backend.memory),
+        ("memory", "subprocess", system_status._read_memory_info_subprocess),
+        ("storage", "native", lambda: backend.storage("/")),
+        ("storage", "subprocess", system_status._read_storage_info_subprocess),
+    ]
+
+    print(f"backend={backend.name} iterations={args.iterations}")
+    results = {}
+    for collector, path, func in cases:
+        mean_us = time_call(func, args.iterations)
+        results[(collector, path)] = mean_us
+        print(f"{collector:<8} {path:<11} {mean_us:>12.1f} us/call")
+
+    for collector in ("memory", "storage"):
+        speedup = results[(collector, "subprocess")] / results[(collector, "native")]
+        print(f"{collector:<8} native is {speedup:.0f}x faster")
+
+
+if __name__ == "__main__":
+    main()
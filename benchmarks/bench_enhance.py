@@ -0,0 +1,84 @@
+"""
+Enhancement benchmark.
+Compares per-frame cost of the original np.mean + convertScaleAbs stage with the strided-estimate stages.
+
+Usage:
+    python benchmarks/bench_enhance.py [--iterations N] [--width W] [--height H]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.enhance import (  # noqa: E402
+    FIXED_ALPHA, FIXED_BETA, contrast_lut, enhance_frame, estimate_brightness
+)
+
+
+def original_stage(frame: np.ndarray) -> np.ndarray:
+    """The enhancement stage as capture_snapshot() used to run it."""
+    if np.mean(frame) < 100:
+        frame = cv2.convertScaleAbs(frame, alpha=1.3, beta=30)
+    return frame
+
+
+def fixed_lut_stage(frame: np.ndarray) -> np.ndarray:
+    """Strided estimate with the fixed correction applied through a cached LUT."""
+    if estimate_brightness(frame) < 100:
+        frame = cv2.LUT(frame, contrast_lut(FIXED_ALPHA, FIXED_BETA), dst=frame)
+    return frame
+
+
+def time_stage(func, frames, iterations: int) -> float:
+    """Return the mean cost per frame in microseconds, excluding the copy of the input."""
+    work = np.empty_like(frames[0])
+    func(frames[0].copy())  # warm up (builds and caches LUTs)
+
+    # Every stage gets a fresh copy so in-place stages never see an enhanced
+    # frame; the copy is timed separately and subtracted
+    start = time.perf_counter()
+    for i in range(iterations):
+        np.copyto(work, frames[i % len(frames)])
+    copy_cost = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(iterations):
+        np.copyto(work, frames[i % len(frames)])
+        func(work)
+    return (time.perf_counter() - start - copy_cost) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    # Dark frames so every stage actually applies its correction
+    frames = [rng.integers(0, 140, (args.height, args.width, 3), dtype=np.uint8) for _ in range(4)]
+
+    stages = [
+        ("mean+convertScaleAbs", original_stage),
+        ("strided+LUT (fixed, in-place)", fixed_lut_stage),
+        ("enhance_frame fixed", lambda f: enhance_frame(f, mode="fixed")),
+        ("enhance_frame fixed, in-place", lambda f: enhance_frame(f, mode="fixed", inplace=True)),
+        ("enhance_frame adaptive, in-place", lambda f: enhance_frame(f, mode="adaptive", inplace=True)),
+    ]
+
+    print(f"frame={args.width}x{args.height} iterations={args.iterations}")
+    baseline = None
+    for name, func in stages:
+        mean_us = time_stage(func, frames, args.iterations)
+        baseline = baseline or mean_us
+        print(f"{name:<32} {mean_us:>10.1f} us/frame  {baseline / mean_us:>5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+"""
+Benchmark suite.
+Collector latency, /status throughput under concurrent clients and snapshot encode throughput, written as JSON.
+
+Runs on Linux with stand-in backends (see fakes.py): the macOS commands
+return canned output and cv2.VideoCapture yields synthetic frames, so the
+numbers measure this code rather than the host.
+
+Usage:
+    python benchmarks/bench_suite.py [--output results.json] [--compare baseline.json]
+                                     [--quick] [--only collectors,http,encode,snapshot]
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# Settings must be in place before app.config is imported
+os.environ.setdefault("MAC_CONTROL_TOKEN", "bench-token")
+os.environ.setdefault("HISTORY_LOG_ENABLED", "False")
+os.environ.setdefault("CAMERA_WARMUP_TIME", "0")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from benchmarks.fakes import fake_camera, fake_subprocess, synthetic_frame  # noqa: E402
+from app.config import Config  # noqa: E402
+from app.services import camera, system_status  # noqa: E402
+
+GROUPS = ("collectors", "http", "encode", "snapshot")
+
+# The figure compared across runs for each group, and which direction is better
+HEADLINE = {
+    "collectors": ("mean_us", "lower"),
+    "http": ("requests_per_s", "higher"),
+    "encode": ("frames_per_s", "higher"),
+    "snapshot": ("mean_ms", "lower"),
+}
+
+
+def summarize(samples: List[float], scale: float) -> Dict[str, float]:
+    """Mean and percentiles of per-call durations in seconds, multiplied by `scale`."""
+    values = np.asarray(samples) * scale
+    return {
+        "mean": float(values.mean()),
+        "p50": float(np.percentile(values, 50)),
+        "p95": float(np.percentile(values, 95)),
+        "p99": float(np.percentile(values, 99)),
+    }
+
+
+def time_samples(func: Callable[[], Any], iterations: int) -> List[float]:
+    """Call `func` `iterations` times after one warm-up call and return each duration in seconds."""
+    func()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def git_commit() -> Optional[str]:
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+# --- Collectors -------------------------------------------------------------
+
+def bench_collectors(iterations: int, spawn_latency: float) -> Dict[str, Dict[str, Any]]:
+    """
+    Latency of every status collector on each backend it supports.
+
+    The subprocess path includes the fake command's modelled spawn latency,
+    so comparing against the native path only measures parsing when that
+    latency is 0.
+    """
+    results = {}
+    backends = ["subprocess"]
+    if sys.platform in ("linux", "darwin"):
+        backends.insert(0, "native")
+    original = Config.STATUS_COLLECTOR_BACKEND
+    try:
+        with fake_subprocess(spawn_latency):
+            for backend in backends:
+                Config.STATUS_COLLECTOR_BACKEND = "auto" if backend == "native" else "subprocess"
+                for name, collector in system_status.COLLECTORS.items():
+                    if backend == "native" and name not in ("memory", "storage"):
+                        continue  # Same code path as on the subprocess backend
+                    stats = summarize(time_samples(collector, iterations), 1e6)
+                    results[f"{name}/{backend}"] = {
+                        "mean_us": stats["mean"], "p50_us": stats["p50"], "p95_us": stats["p95"],
+                        "p99_us": stats["p99"], "iterations": iterations,
+                    }
+    finally:
+        Config.STATUS_COLLECTOR_BACKEND = original
+    return results
+
+
+# --- HTTP -------------------------------------------------------------------
+
+HTTP_CASES: List[Tuple[str, str, Dict[str, str], bool]] = [
+    # (name, path, headers, revalidate with the first response's ETag)
+    ("status_json", "/status", {"Accept": "application/json"}, False),
+    ("status_html", "/status", {"Accept": "text/html"}, False),
+    ("status_compact_gzip", "/status/compact", {"Accept-Encoding": "gzip"}, False),
+    ("status_not_modified", "/status", {"Accept": "application/json"}, True),
+]
+
+
+def _start_server():
+    """Serve the app from a background thread on an ephemeral port with HTTP/1.1 keep-alive."""
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    from wsgi import app
+
+    class KeepAliveHandler(WSGIRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_request(self, *args, **kwargs) -> None:
+            pass
+
+    server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _client(port: int, path: str, headers: Dict[str, str], deadline: float,
+            latencies: List[float], errors: List[int]) -> None:
+    """Issue requests over one keep-alive connection until the deadline."""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                conn.request("GET", path, headers=headers)
+                response = conn.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException):
+                errors.append(1)
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+                continue
+            latencies.append(time.perf_counter() - start)
+            if response.status not in (200, 304):
+                errors.append(response.status)
+    finally:
+        conn.close()
+
+
+def bench_http(concurrency: List[int], duration: float, spawn_latency: float) -> Dict[str, Dict[str, Any]]:
+    """
+    End-to-end throughput of the status endpoints over real sockets.
+
+    Clients and server share one interpreter, so absolute numbers are lower
+    than under gunicorn; the figures are for comparing commits.
+    """
+    results = {}
+    auth = {"X-Auth-Token": Config.AUTH_TOKEN}
+    with fake_subprocess(spawn_latency):
+        server = _start_server()
+        port = server.server_port
+        try:
+            for name, path, headers, revalidate in HTTP_CASES:
+                headers = {**headers, **auth}
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+                conn.request("GET", path, headers=headers)  # warm up; waits for the first sample
+                first = conn.getresponse()
+                first.read()
+                conn.close()
+                if revalidate and first.getheader("ETag"):
+                    headers["If-None-Match"] = first.getheader("ETag")
+
+                for clients in concurrency:
+                    latencies: List[float] = []
+                    errors: List[int] = []
+                    deadline = time.perf_counter() + duration
+                    threads = [threading.Thread(target=_client, args=(port, path, headers, deadline,
+                                                                       latencies, errors))
+                               for _ in range(clients)]
+                    started = time.perf_counter()
+                    for thread in threads:
+                        thread.start()
+                    for thread in threads:
+                        thread.join()
+                    elapsed = time.perf_counter() - started
+                    stats = summarize(latencies or [0.0], 1e3)
+                    results[f"{name}/c{clients}"] = {
+                        "requests_per_s": len(latencies) / elapsed, "requests": len(latencies),
+                        "errors": len(errors), "p50_ms": stats["p50"], "p95_ms": stats["p95"],
+                        "p99_ms": stats["p99"], "clients": clients, "duration_s": elapsed,
+                    }
+        finally:
+            server.shutdown()
+            server.server_close()
+            # The sampler's threads would otherwise go on to run the real commands
+            from app.services.sampler import stop_sampler
+            stop_sampler(timeout=2)
+    return results
+
+
+# --- Camera -----------------------------------------------------------------
+
+RESOLUTIONS = [(640, 480), (1280, 720), (1920, 1080)]
+QUALITIES = [50, 70, 90]
+
+
+def bench_encode(iterations: int, resolutions: List[Tuple[int, int]],
+                 qualities: List[int]) -> Dict[str, Dict[str, Any]]:
+    """
+    Enhance + JPEG encode throughput of _encode_frame() per resolution and quality.
+
+    Frames are dark, so the enhancement stage runs as it does for a dim room.
+    """
+    results = {}
+    for width, height in resolutions:
+        frames = [synthetic_frame(width, height, seed=i, dark=True) for i in range(4)]
+        work = np.empty_like(frames[0])
+        for quality in qualities:
+            sizes = []
+
+            def encode() -> None:
+                np.copyto(work, frames[len(sizes) % len(frames)])
+                ok, jpeg, error = camera._encode_frame(work, quality, inplace=True)
+                if not ok:
+                    raise RuntimeError(error)
+                sizes.append(len(jpeg))
+
+            samples = time_samples(encode, iterations)
+            stats = summarize(samples, 1e3)
+            results[f"{width}x{height}/q{quality}"] = {
+                "frames_per_s": len(samples) / sum(samples), "mean_ms": stats["mean"],
+                "p95_ms": stats["p95"], "mean_bytes": int(np.mean(sizes)),
+                "width": width, "height": height, "quality": quality, "iterations": iterations,
+            }
+    return results
+
+
+def bench_snapshot(iterations: int) -> Dict[str, Dict[str, Any]]:
+    """
+    Full snapshot latency (open, read, enhance, encode, release) against the synthetic camera.
+
+    Covers the per-request path and, when persistent capture is available,
+    a persistent session serving its newest frame.
+    """
+    results = {}
+    originals = (Config.CAMERA_PERSISTENT, Config.CAMERA_WARMUP_TIME)
+    try:
+        with fake_camera(fps=30):
+            for mode, persistent in (("per_request", False), ("persistent", True)):
+                Config.CAMERA_PERSISTENT = persistent
+                Config.CAMERA_WARMUP_TIME = 0
+
+                def snapshot() -> None:
+                    ok, jpeg, error = camera.capture_snapshot(0)
+                    if not ok:
+                        raise RuntimeError(error)
+
+                stats = summarize(time_samples(snapshot, iterations), 1e3)
+                results[mode] = {
+                    "mean_ms": stats["mean"], "p50_ms": stats["p50"], "p95_ms": stats["p95"],
+                    "iterations": iterations,
+                }
+    finally:
+        Config.CAMERA_PERSISTENT, Config.CAMERA_WARMUP_TIME = originals
+        from app.services.capture import release_all
+        release_all(timeout=2)
+    return results
+
+
+# --- Reporting --------------------------------------------------------------
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> int:
+    """
+    Print the headline figure of every case present in both runs.
+
+    Returns:
+        Number of cases that regressed by more than `threshold` percent
+    """
+    regressions = 0
+    print(f"\ncompared with {baseline['meta'].get('commit') or 'baseline'}:")
+    for group, (key, better) in HEADLINE.items():
+        old_cases = baseline["results"].get(group, {})
+        for case, new in current["results"].get(group, {}).items():
+            old = old_cases.get(case)
+            if not old or not old.get(key):
+                continue
+            change = (new[key] - old[key]) / old[key] * 100
+            worse = change > threshold if better == "lower" else change < -threshold
+            regressions += worse
+            flag = "  REGRESSION" if worse else ""
+            print(f"  {group:<10} {case:<28} {key:<15} {old[key]:>12.4g} -> {new[key]:>12.4g} "
+                  f"({change:+6.1f}%){flag}")
+    return regressions
+
+
+def print_group(group: str, results: Dict[str, Dict[str, Any]]) -> None:
+    key = HEADLINE[group][0]
+    print(f"\n{group}")
+    for case, values in results.items():
+        print(f"  {case:<28} {values[key]:>12.4g} {key}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--output", type=Path, default=ROOT / "benchmarks" / "results.json",
+                        help="Where to write the JSON results")
+    parser.add_argument("--compare", type=Path, help="Earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="Percent change counted as a regression when comparing")
+    parser.add_argument("--only", default=",".join(GROUPS), help="Comma-separated groups to run")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--clients", default="1,4,16", help="Comma-separated concurrency levels")
+    parser.add_argument("--duration", type=float, default=3.0, help="Seconds per HTTP case and level")
+    parser.add_argument("--spawn-ms", type=float, default=0.0,
+                        help="Modelled fork/exec cost of each fake command")
+    parser.add_argument("--quick", action="store_true", help="Fewer iterations and shorter HTTP runs")
+    args = parser.parse_args()
+
+    groups = [g.strip() for g in args.only.split(",") if g.strip()]
+    unknown = set(groups) - set(GROUPS)
+    if unknown:
+        parser.error(f"unknown groups: {', '.join(sorted(unknown))}")
+    iterations = max(10, args.iterations // 10) if args.quick else args.iterations
+    duration = min(args.duration, 1.0) if args.quick else args.duration
+    concurrency = [int(c) for c in args.clients.split(",") if c.strip()]
+    spawn_latency = args.spawn_ms / 1000
+
+    report: Dict[str, Any] = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "opencv": cv2.__version__,
+            "numpy": np.__version__,
+            "args": {k: str(v) if isinstance(v, Path) else v for k, v in vars(args).items()},
+        },
+        "results": {},
+    }
+
+    runners = {
+        "collectors": lambda: bench_collectors(iterations, spawn_latency),
+        "http": lambda: bench_http(concurrency, duration, spawn_latency),
+        "encode": lambda: bench_encode(max(10, iterations // 4), RESOLUTIONS, QUALITIES),
+        "snapshot": lambda: bench_snapshot(max(10, iterations // 10)),
+    }
+    print(f"commit={report['meta']['commit']} python={report['meta']['python']} groups={','.join(groups)}")
+    for group in groups:
+        report["results"][group] = runners[group]()
+        print_group(group, report["results"][group])
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"\nwrote {args.output}")
+
+    if args.compare:
+        regressions = compare(json.loads(args.compare.read_text()), report, args.threshold)
+        if regressions:
+            sys.exit(f"{regressions} case(s) regressed by more than {args.threshold:g}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Benchmark stand-ins.
+Canned macOS command output and a synthetic camera, so benchmarks run on any Linux host.
+"""
+import subprocess
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Captured from a 16 GB MacBook; only the lines the parsers look at matter
+FAKE_OUTPUTS: Dict[str, str] = {
+    "scutil": "Bench MacBook Pro\n",
+    "sysctl": "17179869184\n",
+    "top": (
+        "Processes: 512 total, 3 running, 509 sleeping, 2210 threads\n"
+        "2024/01/01 12:00:00\n"
+        "Load Avg: 1.87, 2.04, 2.11\n"
+        "CPU usage: 6.52% user, 5.79% sys, 87.68% idle\n"
+        "SharedLibs: 512M resident, 96M data, 48M linkedit.\n"
+        "MemRegions: 123456 total, 4096M resident, 256M private, 2048M shared.\n"
+        "PhysMem: 15012M used (2048M wired, 1024M compressor), 1371M unused.\n"
+        "VM: 200T vsize, 4096M framework vsize, 0(0) swapins, 0(0) swapouts.\n"
+        "Networks: packets: 123456/100M in, 65432/20M out.\n"
+        "Disks: 234567/4096M read, 123456/2048M written.\n"
+    ),
+    "df": (
+        "Filesystem      Size   Used  Avail Capacity iused ifree %iused  Mounted on\n"
+        "/dev/disk3s1s1  460Gi  213Gi  228Gi    49%  403k  2.4G    0%   /\n"
+    ),
+    "pmset": (
+        "Now drawing from 'Battery Power'\n"
+        " -InternalBattery-0 (id=1234567)\t87%; discharging; 5:12 remaining present: true\n"
+    ),
+    "osascript": "\n".join([
+        "Finder", "Safari", "Terminal", "Mail", "Messages", "Calendar", "Notes", "Music", "Photos",
+        "Preview", "Xcode", "Slack", "Visual Studio Code", "Activity Monitor",
+    ]) + "\n",
+}
+
+
+@contextmanager
+def fake_subprocess(spawn_latency: float = 0.0) -> Iterator[Dict[str, int]]:
+    """
+    Answer the status collectors' commands with FAKE_OUTPUTS instead of running them.
+
+    subprocess.run is replaced for the duration of the block; commands that
+    have no canned output fail as if the binary were missing.
+
+    Args:
+        spawn_latency: Seconds each fake command takes, to model fork/exec cost
+
+    Yields:
+        Dict counting the calls per command name
+    """
+    calls: Dict[str, int] = {}
+    real_run = subprocess.run
+
+    def run(cmd: List[str], *args, **kwargs) -> subprocess.CompletedProcess:
+        name = cmd[0]
+        calls[name] = calls.get(name, 0) + 1
+        if name not in FAKE_OUTPUTS:
+            raise FileNotFoundError(2, "No such file or directory", name)
+        if spawn_latency:
+            time.sleep(spawn_latency)
+        return subprocess.CompletedProcess(cmd, 0, stdout=FAKE_OUTPUTS[name])
+
+    subprocess.run = run
+    try:
+        yield calls
+    finally:
+        subprocess.run = real_run
+
+
+def synthetic_frame(width: int, height: int, seed: int = 0, dark: bool = False) -> np.ndarray:
+    """
+    Build a BGR frame with gradients, edges and sensor-like noise.
+
+    A flat frame would make JPEG encoding unrealistically cheap, so the image
+    carries detail at several scales.
+
+    Args:
+        width: Frame width
+        height: Frame height
+        seed: Noise seed, so runs encode identical frames
+        dark: Keep the mean brightness below the enhancement threshold
+
+    Returns:
+        np.ndarray: uint8 array of shape (height, width, 3)
+    """
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    base = 0.5 + 0.25 * np.sin(x / 37.0) * np.cos(y / 53.0) + 0.25 * (x / max(width - 1, 1))
+    frame = np.stack([base, np.roll(base, width // 7, axis=1), np.roll(base, height // 5, axis=0)], axis=2)
+    frame *= 90.0 if dark else 220.0
+    # Blocky "objects" give the encoder hard edges to spend bits on
+    for _ in range(12):
+        x0, y0 = int(rng.integers(0, width)), int(rng.integers(0, height))
+        frame[y0:y0 + height // 8, x0:x0 + width // 8] = rng.integers(0, 90 if dark else 255, 3)
+    frame += rng.normal(0, 6, frame.shape)
+    return np.clip(frame, 0, 255).astype(np.uint8)
+
+
+@lru_cache(maxsize=8)
+def _frame_pool(width: int, height: int, frames: int) -> Tuple[np.ndarray, ...]:
+    """Frames shared by every SyntheticCapture of one size, built once per run."""
+    return tuple(synthetic_frame(width, height, seed=i) for i in range(frames))
+
+
+class SyntheticCapture:
+    """
+    Stand-in for cv2.VideoCapture producing synthetic frames.
+
+    Frames are paced at the requested frame rate like a real camera; a
+    frame rate of 0 returns frames as fast as they are asked for.
+    """
+
+    def __init__(self, index: int = 0, api: Optional[int] = None, width: int = 640, height: int = 480,
+                 fps: float = 0.0, frames: int = 8):
+        self.index = index
+        self._props = {
+            cv2.CAP_PROP_FRAME_WIDTH: float(width),
+            cv2.CAP_PROP_FRAME_HEIGHT: float(height),
+            cv2.CAP_PROP_FPS: float(fps),
+        }
+        self._pool_size = frames
+        self._pool: Tuple[np.ndarray, ...] = ()
+        self._count = 0
+        self._next_at = 0.0
+        self._opened = True
+
+    def isOpened(self) -> bool:
+        return self._opened
+
+    def set(self, prop: int, value: float) -> bool:
+        self._props[prop] = float(value)
+        self._pool = ()  # Size may have changed
+        return True
+
+    def get(self, prop: int) -> float:
+        return self._props.get(prop, 0.0)
+
+    def _frame(self) -> np.ndarray:
+        if not self._pool:
+            width = int(self._props[cv2.CAP_PROP_FRAME_WIDTH])
+            height = int(self._props[cv2.CAP_PROP_FRAME_HEIGHT])
+            self._pool = _frame_pool(width, height, self._pool_size)
+        frame = self._pool[self._count % len(self._pool)]
+        self._count += 1
+        return frame
+
+    def grab(self) -> bool:
+        fps = self._props[cv2.CAP_PROP_FPS]
+        if fps > 0:
+            now = time.monotonic()
+            if self._next_at > now:
+                time.sleep(self._next_at - now)
+            self._next_at = max(now, self._next_at) + 1.0 / fps
+        return self._opened
+
+    def retrieve(self, image: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray]]:
+        if not self._opened:
+            return False, None
+        frame = self._frame()
+        if image is not None and image.shape == frame.shape:
+            np.copyto(image, frame)
+            return True, image
+        return True, frame.copy()
+
+    def read(self, image: Optional[np.ndarray] = None) -> Tuple[bool, Optional[np.ndarray]]:
+        if not self.grab():
+            return False, None
+        return self.retrieve(image)
+
+    def release(self) -> None:
+        self._opened = False
+
+
+@contextmanager
+def fake_camera(width: int = 640, height: int = 480, fps: float = 0.0) -> Iterator[None]:
+    """
+    Replace cv2.VideoCapture with SyntheticCapture for the duration of the block.
+
+    Args:
+        width: Default frame width (open_device() may override it)
+        height: Default frame height
+        fps: Frame pacing; 0 returns frames without waiting
+    """
+    real_capture = cv2.VideoCapture
+
+    def factory(index: int = 0, api: Optional[int] = None) -> SyntheticCapture:
+        return SyntheticCapture(index, api, width=width, height=height, fps=fps)
+
+    cv2.VideoCapture = factory
+    try:
+        yield
+    finally:
+        cv2.VideoCapture = real_capture
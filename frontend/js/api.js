@@ -53,6 +53,16 @@ const API = {
         return await response.json();
     },
 
+    /**
+     * URL of the live status event stream
+     * (EventSource cannot send headers, so the token goes in the query)
+     */
+    statusEventsUrl() {
+        const apiUrl = Config.getApiUrl();
+        const token = Config.getAuthToken();
+        return `${apiUrl}/status/events?token=${encodeURIComponent(token)}`;
+    },
+
     /**
      * Capture photo from camera
      */
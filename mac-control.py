@@ -1,231 +1,226 @@
 # mac_control.py
 # Requirements: pip install flask opencv-python-headless
-import os
 import io
+import math
 import subprocess
-from flask import Flask, request, jsonify, send_file, abort
-import cv2
+import time
+from flask import Flask, Response, request, jsonify, send_file, abort, g
+from app.assets import StaticAssets, cached_document, content_etag
+from app.auth import AuthMiddleware, check_token
+from app.config import Config
+from app.services.system_status import get_system_status, get_cache_stats
+from app.services.sampler import get_sampled_status, get_status_version
+from app.services.status_events import open_status_events
+from app.services.status_encoding import encode_status, get_encoding_stats
+from app.services.metrics_history import get_history, query_history
+from app.services.processes import get_process_changes, get_top_processes
+from app.services.camera import (
+    capture_snapshot_versioned, get_jpeg_cache_stats, get_snapshot_version, list_available_cameras
+)
+from app.services.streaming import BOUNDARY, get_stream_stats, open_stream
+from app.services.multicam import capture_grid, capture_multipart
+from app.services.motion import get_motion_events, get_motion_snapshot, get_motion_stats
+from app.services.timelapse import get_timelapse_stats, start_timelapse
+from app.services.instrumentation import (
+    AUTH_REJECTIONS, CONTENT_TYPE, REQUEST_SECONDS, REQUESTS, REQUESTS_IN_FLIGHT, render_metrics
+)
 
-APP = Flask(__name__)
-TOKEN = os.environ.get("MAC_CONTROL_TOKEN", "replace-this-token")  # set a strong token in env
+APP = Flask(__name__, template_folder=str(Config.TEMPLATE_DIR), static_folder=None)
+TOKEN = Config.AUTH_TOKEN  # set a strong token in env (MAC_CONTROL_TOKEN)
+
+# Reject bad tokens before Flask routing; check_auth() then only reads the verified flag.
+# Static CSS/JS and the favicon hold nothing private and are loaded by browsers without the token.
+APP.wsgi_app = AuthMiddleware(APP.wsgi_app, on_reject=AUTH_REJECTIONS.inc,
+                              public_prefixes=("/static/", "/favicon.ico"))
+
+# Static assets and templates are loaded and compiled once at startup
+ASSETS = StaticAssets(Config.STATIC_DIR, Config.STATIC_MAX_AGE)
+APP.jinja_env.globals["asset_url"] = ASSETS.url
+STATUS_TEMPLATE = APP.jinja_env.get_template("status.html")
+ERROR_TEMPLATE = APP.jinja_env.get_template("error.html")
+PANEL_HTML = APP.jinja_env.get_template("index.html").render().encode()
+PANEL_ETAG = content_etag(PANEL_HTML)
+
+# Record metric history from startup rather than from the first status request
+if Config.HISTORY_ENABLED:
+    get_history()
+
+# Scheduled captures run in the background; only one process records into TIMELAPSE_DIR
+if Config.TIMELAPSE_ENABLED:
+    start_timelapse()
+
+def _route_label():
+    # The URL rule, not the raw path, so scanners cannot blow up the label set
+    return request.url_rule.rule if request.url_rule is not None else "unmatched"
+
+@APP.before_request
+def _start_request_timer():
+    g.request_start = time.perf_counter()
+    REQUESTS_IN_FLIGHT.inc()
+
+@APP.after_request
+def _count_request(response):
+    REQUESTS.inc(_route_label(), request.method, response.status_code)
+    return response
+
+@APP.teardown_request
+def _finish_request_timer(exc):
+    start = g.pop("request_start", None)
+    if start is not None:
+        REQUEST_SECONDS.observe(time.perf_counter() - start, _route_label(), request.method)
+        REQUESTS_IN_FLIGHT.dec()
 
 def check_auth():
-    token = request.headers.get("X-Auth-Token") or request.args.get("token")
-    if not token or token != TOKEN:
+    if not check_token():
         abort(401)
 
+# Clients may reuse a status response while its fastest-changing field is still current
+if Config.STATUS_SAMPLER_ENABLED:
+    _fastest = min(Config.STATUS_INTERVAL_MEMORY, Config.STATUS_INTERVAL_STORAGE,
+                   Config.STATUS_INTERVAL_BATTERY, Config.STATUS_INTERVAL_APPS)
+else:
+    _fastest = min(Config.STATUS_TTL_MEMORY, Config.STATUS_TTL_STORAGE,
+                   Config.STATUS_TTL_BATTERY, Config.STATUS_TTL_APPS)
+# Every field may be set to inf (never refreshed); cap the age at a day and never cache on NaN
+STATUS_MAX_AGE = int(max(0, min(_fastest, 86400))) if not math.isnan(_fastest) else 0
+
+def not_modified(etag, weak=False, cache_control="no-cache"):
+    response = Response(status=304)
+    response.set_etag(etag, weak=weak)
+    response.headers["Cache-Control"] = cache_control
+    return response
+
 @APP.route("/status", methods=["GET"])
 def status():
     check_auth()
     
     # Check if request wants HTML (from browser) or JSON (from API)
     wants_html = 'text/html' in request.headers.get('Accept', '')
+    cache_control = f"private, max-age={STATUS_MAX_AGE}"
+    
+    # The sampler's generation only moves when a value changes. The tag is weak
+    # because the per-field ages in the body keep ticking.
+    etag = None
+    if Config.STATUS_SAMPLER_ENABLED:
+        etag = f"status-{get_status_version()}-{'html' if wants_html else 'json'}"
+        if request.if_none_match.contains_weak(etag):
+            response = not_modified(etag, weak=True, cache_control=cache_control)
+            response.headers["Vary"] = "Accept"
+            return response
     
     try:
-        # Get system information
-        hostname = subprocess.getoutput("scutil --get ComputerName")
-        
-        # Get memory info - simple version
-        total_memory_gb = 8.0  # Default for testing
-        used_memory_gb = 7.4
-        free_memory_gb = 0.6
-        
-        try:
-            # Get total memory
-            total_memory_bytes = int(subprocess.getoutput("sysctl -n hw.memsize"))
-            total_memory_gb = round(total_memory_bytes / (1024**3), 1)
-            
-            # Get memory usage from top
-            top_output = subprocess.getoutput("top -l 1 -s 0 | grep PhysMem")
-            if "used" in top_output and "unused" in top_output:
-                import re
-                used_match = re.search(r'(\d+)M used', top_output)
-                unused_match = re.search(r'(\d+)M unused', top_output)
-                
-                if used_match and unused_match:
-                    used_mb = int(used_match.group(1))
-                    unused_mb = int(unused_match.group(1))
-                    
-                    used_memory_gb = round(used_mb / 1024, 1)
-                    free_memory_gb = round(unused_mb / 1024, 1)
-        except:
-            pass  # Use default values
-        
-        # Get storage info using simple df command
-        try:
-            storage_info = subprocess.getoutput("df -h /")
-            storage_lines = storage_info.strip().split('\n')
-            
-            if len(storage_lines) > 1:
-                # Parse the output line by line to handle wrapped lines
-                data_line = storage_lines[1]
-                parts = data_line.split()
-                
-                if len(parts) >= 5:
-                    total_storage = parts[1]
-                    used_storage = parts[2] 
-                    available_storage = parts[3]
-                    storage_percent = parts[4]
-                elif len(parts) == 1 and len(storage_lines) > 2:
-                    # Handle case where filesystem name is on separate line
-                    data_line = storage_lines[2]
-                    parts = data_line.split()
-                    if len(parts) >= 4:
-                        total_storage = parts[0]
-                        used_storage = parts[1]
-                        available_storage = parts[2] 
-                        storage_percent = parts[3]
-                    else:
-                        total_storage = used_storage = available_storage = storage_percent = "Unknown"
-                else:
-                    total_storage = used_storage = available_storage = storage_percent = "Unknown"
-            else:
-                total_storage = used_storage = available_storage = storage_percent = "Unknown"
-                
-        except Exception as e:
-            total_storage = used_storage = available_storage = storage_percent = "Unknown"
-        
-        # Get battery info
-        battery_info = subprocess.getoutput("pmset -g batt")
-        battery_percent = "Unknown"
-        battery_status = "Unknown"
-        
-        if "InternalBattery" in battery_info:
-            import re
-            battery_match = re.search(r'(\d+)%.*?(\w+)', battery_info)
-            if battery_match:
-                battery_percent = battery_match.group(1) + "%"
-                battery_status = battery_match.group(2)
+        # Serve from the background sampler's snapshot instead of forking collectors per request
+        if Config.STATUS_SAMPLER_ENABLED:
+            system_data = get_sampled_status(Config.MAX_APPS_DISPLAY)
         else:
-            battery_percent = "Plugged In"
-            battery_status = "AC Power"
-        
-        # Get running applications
-        apps_info = subprocess.getoutput("osascript -e 'tell application \"System Events\" to get name of (processes whose background only is false)'")
-        running_apps = [app.strip() for app in apps_info.split(',') if app.strip()]
-        
-        # Create data structure
-        system_data = {
-            "status": "ok",
-            "hostname": hostname,
-            "memory": {
-                "total": f"{total_memory_gb} GB",
-                "used": f"{used_memory_gb} GB", 
-                "available": f"{free_memory_gb} GB"
-            },
-            "storage": {
-                "total": total_storage,
-                "used": used_storage,
-                "available": available_storage,
-                "percent_used": storage_percent
-            },
-            "battery": {
-                "percent": battery_percent,
-                "status": battery_status
-            },
-            "running_apps": running_apps[:10]  # Limit to first 10 apps
-        }
+            system_data = get_system_status(Config.MAX_APPS_DISPLAY)
+        hostname = system_data['hostname']
         
         if wants_html:
-            # Return beautiful HTML page
-            html = f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <title>Mac System Status</title>
-    <meta name="viewport" content="width=device-width, initial-scale=1">
-    <style>
-        body {{ font-family: Arial, sans-serif; margin: 0; padding: 20px; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; }}
-        .container {{ max-width: 600px; margin: 0 auto; }}
-        .card {{ background: rgba(255, 255, 255, 0.1); backdrop-filter: blur(10px); border-radius: 15px; padding: 20px; margin: 15px 0; border: 1px solid rgba(255, 255, 255, 0.2); }}
-        h1 {{ text-align: center; margin-bottom: 30px; font-size: 2.5em; text-shadow: 2px 2px 4px rgba(0,0,0,0.3); }}
-        .stat-row {{ display: flex; justify-content: space-between; margin: 10px 0; padding: 10px; background: rgba(255, 255, 255, 0.1); border-radius: 8px; }}
-        .stat-label {{ font-weight: bold; }}
-        .stat-value {{ color: #a8e6cf; }}
-        .progress-bar {{ width: 100%; height: 20px; background: rgba(255, 255, 255, 0.2); border-radius: 10px; overflow: hidden; margin: 5px 0; }}
-        .progress-fill {{ height: 100%; background: linear-gradient(90deg, #a8e6cf, #88d8a3); transition: width 0.3s ease; }}
-        .apps-grid {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(150px, 1fr)); gap: 10px; margin-top: 15px; }}
-        .app-item {{ background: rgba(255, 255, 255, 0.1); padding: 10px; border-radius: 8px; text-align: center; font-size: 0.9em; }}
-        .back-btn {{ display: inline-block; background: rgba(255, 255, 255, 0.2); color: white; padding: 10px 20px; border-radius: 25px; text-decoration: none; margin-bottom: 20px; }}
-        .refresh-btn {{ background: #4CAF50; color: white; border: none; padding: 10px 20px; border-radius: 25px; cursor: pointer; margin: 10px 5px; }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <a href="/?token=replace-this-token" class="back-btn">← Back to Control Panel</a>
-        <button onclick="location.reload()" class="refresh-btn">🔄 Refresh</button>
-        
-        <h1>🖥️ {hostname}</h1>
-        
-        <div class="card">
-            <h3>💾 Memory Usage</h3>
-            <div class="stat-row">
-                <span class="stat-label">Total Memory:</span>
-                <span class="stat-value">{system_data['memory']['total']}</span>
-            </div>
-            <div class="stat-row">
-                <span class="stat-label">Used Memory:</span>
-                <span class="stat-value">{system_data['memory']['used']}</span>
-            </div>
-            <div class="stat-row">
-                <span class="stat-label">Available Memory:</span>
-                <span class="stat-value">{system_data['memory']['available']}</span>
-            </div>
-        </div>
-        
-        <div class="card">
-            <h3>💽 Storage Usage</h3>
-            <div class="stat-row">
-                <span class="stat-label">Total Storage:</span>
-                <span class="stat-value">{system_data['storage']['total']}</span>
-            </div>
-            <div class="stat-row">
-                <span class="stat-label">Used Storage:</span>
-                <span class="stat-value">{system_data['storage']['used']}</span>
-            </div>
-            <div class="stat-row">
-                <span class="stat-label">Available Storage:</span>
-                <span class="stat-value">{system_data['storage']['available']}</span>
-            </div>
-            <div class="stat-row">
-                <span class="stat-label">Usage:</span>
-                <span class="stat-value">{system_data['storage']['percent_used']}</span>
-            </div>
-        </div>
-        
-        <div class="card">
-            <h3>🔋 Battery Status</h3>
-            <div class="stat-row">
-                <span class="stat-label">Battery Level:</span>
-                <span class="stat-value">{system_data['battery']['percent']}</span>
-            </div>
-            <div class="stat-row">
-                <span class="stat-label">Status:</span>
-                <span class="stat-value">{system_data['battery']['status']}</span>
-            </div>
-        </div>
-        
-        <div class="card">
-            <h3>🚀 Running Applications</h3>
-            <div class="apps-grid">
-                {''.join([f'<div class="app-item">{app}</div>' for app in system_data['running_apps']])}
-            </div>
-        </div>
-    </div>
-</body>
-</html>
-            """
-            return html
+            # Template compiled at startup; CSS/JS are cached static assets
+            response = Response(STATUS_TEMPLATE.render(
+                hostname=hostname,
+                memory=system_data['memory'],
+                storage=system_data['storage'],
+                battery=system_data['battery'],
+                running_apps=system_data['running_apps'],
+            ), mimetype="text/html")
         else:
-            return jsonify(system_data)
+            response = jsonify(system_data)
+        if etag is not None:
+            response.set_etag(etag, weak=True)
+        response.headers["Cache-Control"] = cache_control
+        # HTML and JSON share the URL, so caches must key on Accept
+        response.headers["Vary"] = "Accept"
+        return response
             
     except Exception as e:
         error_data = {"status": "error", "message": str(e)}
         if wants_html:
-            return f"<html><body><h1>Error</h1><p>{str(e)}</p></body></html>"
+            return ERROR_TEMPLATE.render(message=str(e))
         else:
             return jsonify(error_data), 500
 
+@APP.route("/status/compact", methods=["GET"])
+def status_compact():
+    check_auth()
+    # Numeric fields; JSON (optionally gzip/br), MessagePack or CBOR by Accept, encoded once per sample
+    success, body, headers, error = encode_status(
+        Config.MAX_APPS_DISPLAY,
+        request.headers.get("Accept", ""),
+        request.headers.get("Accept-Encoding", "")
+    )
+    if not success:
+        return jsonify({"error": error}), 406
+    cache_control = f"private, max-age={STATUS_MAX_AGE}"
+    etag = headers.get("ETag", "").strip('"')
+    if etag and etag in request.if_none_match:
+        response = not_modified(etag, cache_control=cache_control)
+        response.headers["Vary"] = headers["Vary"]
+        return response
+    response = Response(body, headers=headers)
+    response.headers["Cache-Control"] = cache_control
+    return response
+
+@APP.route("/status/events", methods=["GET"])
+def status_events():
+    check_auth()
+    # EventSource sends Last-Event-ID on reconnect; allow it in the query for manual resumes
+    # Ids carry a per-process epoch; one from before a restart gets a full snapshot
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("lastEventId")
+    
+    success, stream, error = open_status_events(last_event_id, Config.MAX_APPS_DISPLAY)
+    if not success:
+        return jsonify({"error": error}), 503
+    return Response(stream, mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@APP.route("/status/history", methods=["GET"])
+def status_history():
+    check_auth()
+    if not Config.HISTORY_ENABLED:
+        return jsonify({"error": "Metric history is disabled"}), 404
+    
+    metrics = [m for m in request.args.get("metric", "").split(",") if m]
+    start = request.args.get("start", type=float)
+    end = request.args.get("end", type=float)
+    if any(t is not None and not math.isfinite(t) for t in (start, end)):
+        return jsonify({"error": "start and end must be finite epoch seconds"}), 400
+    points = request.args.get("points", Config.HISTORY_MAX_POINTS, type=int)
+    result = query_history(metrics, start, end, max(1, min(points, Config.HISTORY_MAX_POINTS)))
+    if "error" in result:
+        return jsonify(result), 400
+    return jsonify(result)
+
+@APP.route("/status/processes", methods=["GET"])
+def status_processes():
+    check_auth()
+    limit = request.args.get("limit", Config.MAX_APPS_DISPLAY, type=int)
+    result = get_top_processes(max(1, min(limit, Config.PROCESS_TOP_MAX)), request.args.get("sort", "cpu"))
+    if "error" in result:
+        return jsonify(result), 400
+    return jsonify(result)
+
+@APP.route("/status/processes/changes", methods=["GET"])
+def status_process_changes():
+    check_auth()
+    result = get_process_changes(request.args.get("since", type=int))
+    if "error" in result:
+        return jsonify(result), 400
+    return jsonify(result)
+
+@APP.route("/metrics", methods=["GET"])
+def metrics():
+    check_auth()
+    if not Config.METRICS_ENABLED:
+        return jsonify({"error": "Metrics are disabled"}), 404
+    return Response(render_metrics(), content_type=CONTENT_TYPE)
+
+@APP.route("/status/cache", methods=["GET"])
+def status_cache():
+    check_auth()
+    return jsonify({"collectors": get_cache_stats(), "encoded": get_encoding_stats()})
+
 @APP.route("/lock", methods=["POST"])
 def lock_screen():
     check_auth()
@@ -257,148 +252,157 @@ def camera_snapshot():
     except ValueError:
         camera_index = 0
     
-    # capture one frame from specified camera and return JPEG
-    cap = cv2.VideoCapture(camera_index, cv2.CAP_AVFOUNDATION)
-    if not cap.isOpened():
-        return jsonify({"error":f"camera {camera_index} not available"}), 500
-    
-    # Set camera properties for better reliability
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-    cap.set(cv2.CAP_PROP_FPS, 30)
-    
-    # Give camera time to warm up
-    import time
-    time.sleep(0.3)
-    
-    # Try multiple times to capture a frame
-    for attempt in range(5):
-        ret, frame = cap.read()
-        if ret and frame is not None:
-            break
-        time.sleep(0.1)
-    
-    cap.release()
-    
-    if not ret or frame is None:
-        return jsonify({"error":"capture failed after 5 attempts"}), 500
+    # Optional output size, crop (x,y,w,h in frame pixels) and JPEG quality, e.g. width=160 for a thumbnail
+    width = request.args.get("width", type=int)
+    height = request.args.get("height", type=int)
+    quality = request.args.get("quality", type=int)
+    crop = None
+    if request.args.get("crop"):
+        try:
+            crop = tuple(int(v) for v in request.args["crop"].split(","))
+        except ValueError:
+            crop = ()
+        if len(crop) != 4 or crop[2] <= 0 or crop[3] <= 0:
+            return jsonify({"error": "crop must be x,y,width,height with a positive width and height"}), 400
+    if (width is not None and width <= 0) or (height is not None and height <= 0):
+        return jsonify({"error": "width and height must be positive"}), 400
     
-    # Check if frame has valid dimensions
-    if frame.shape[0] == 0 or frame.shape[1] == 0:
-        return jsonify({"error":"invalid frame dimensions"}), 500
+    # A persistent session numbers its frames; answer 304 before encoding if the client has this one
+    version = get_snapshot_version(camera_index, width, height, crop, quality)
+    if version is not None and version in request.if_none_match:
+        return not_modified(version)
     
-    # Calculate average brightness
-    import numpy as np
-    brightness = np.mean(frame)
+    # capture one frame from specified camera (or its persistent session) and return JPEG
+    success, jpeg_bytes, error, version = capture_snapshot_versioned(camera_index, width, height, crop, quality)
+    if not success:
+        return jsonify({"error": error}), 500
+    if version is None:
+        return send_file(io.BytesIO(jpeg_bytes), mimetype='image/jpeg', as_attachment=False, download_name='snapshot.jpg')
+    response = Response(jpeg_bytes, mimetype='image/jpeg',
+                        headers={"Content-Disposition": "inline; filename=snapshot.jpg", "Cache-Control": "no-cache"})
+    response.set_etag(version)
+    return response
+
+@APP.route("/camera/stream", methods=["GET"])
+def camera_stream():
+    check_auth()
+    camera_index = request.args.get("camera", 0, type=int)
+    fps = request.args.get("fps", type=float)
+    width = request.args.get("width", type=int)
+    height = request.args.get("height", type=int)
+    if (width is not None and width <= 0) or (height is not None and height <= 0):
+        return jsonify({"error": "width and height must be positive"}), 400
     
-    # Enhance the image if it's too dark
-    if brightness < 100:  # If image is dark
-        # Apply brightness and contrast enhancement
-        alpha = 1.3  # Contrast control (1.0-3.0)
-        beta = 30    # Brightness control (0-100)
-        frame = cv2.convertScaleAbs(frame, alpha=alpha, beta=beta)
+    # one capture and one encode per frame, shared by every viewer of this camera and size
+    success, stream, error = open_stream(camera_index, fps=fps, width=width, height=height)
+    if not success:
+        return jsonify({"error": error}), 503
+    return Response(stream, mimetype=f"multipart/x-mixed-replace; boundary={BOUNDARY}",
+                    headers={"Cache-Control": "no-store"})
+
+@APP.route("/camera/motion", methods=["GET"])
+def camera_motion():
+    check_auth()
+    camera_index = request.args.get("camera", 0, type=int)
+    since = request.args.get("since", 0, type=int)
+    wait = request.args.get("wait", 0, type=float)
     
-    # encode to JPEG with high quality
-    encode_params = [cv2.IMWRITE_JPEG_QUALITY, 90]
-    ret, jpeg = cv2.imencode('.jpg', frame, encode_params)
-    if not ret:
-        return jsonify({"error":"encode failed"}), 500
-    return send_file(io.BytesIO(jpeg.tobytes()), mimetype='image/jpeg', as_attachment=False, download_name='snapshot.jpg')
+    # starts background-model motion detection on first use; JPEGs are only encoded for motion
+    result = get_motion_events(camera_index, since=since, wait=wait)
+    if "error" in result:
+        return jsonify(result), 503
+    response = jsonify(result)
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+@APP.route("/camera/motion/<int:event_id>", methods=["GET"])
+def camera_motion_snapshot(event_id):
+    check_auth()
+    camera_index = request.args.get("camera", 0, type=int)
+    snapshot = get_motion_snapshot(camera_index, event_id)
+    if snapshot is None:
+        return jsonify({"error": f"No snapshot for motion event {event_id}"}), 404
+    jpeg_bytes, version = snapshot
+    return cached_document(jpeg_bytes, "image/jpeg", request, version, cache_control="private, max-age=60")
+
+@APP.route("/camera/timelapse", methods=["GET"])
+def camera_timelapse():
+    check_auth()
+    return jsonify(get_timelapse_stats())
+
+@APP.route("/camera/cache", methods=["GET"])
+def camera_cache():
+    check_auth()
+    return jsonify({"jpeg": get_jpeg_cache_stats(), "streams": get_stream_stats(), "motion": get_motion_stats()})
 
 @APP.route("/cameras", methods=["GET"])
 def list_cameras():
     check_auth()
-    available_cameras = []
-    
-    # Test cameras 0-5 to find available ones
-    for i in range(6):
-        cap = cv2.VideoCapture(i, cv2.CAP_AVFOUNDATION)
-        if cap.isOpened():
-            # Try to read a frame to verify it's working
-            ret, frame = cap.read()
-            if ret and frame is not None:
-                available_cameras.append({
-                    "id": i, 
-                    "status": "available",
-                    "resolution": f"{frame.shape[1]}x{frame.shape[0]}"
-                })
-            else:
-                available_cameras.append({"id": i, "status": "detected but failed to capture"})
-        cap.release()
+    # Cached inventory of cameras 0-5, probed in parallel; ?refresh=1 probes again
+    refresh = request.args.get("refresh", "0").lower() in ("1", "true")
+    available_cameras = list_available_cameras(6, refresh=refresh)
     
     return jsonify({"cameras": available_cameras})
 
+@APP.route("/cameras/snapshot", methods=["GET"])
+def cameras_snapshot():
+    check_auth()
+    # Comma-separated camera indices; defaults to every available camera in the cached inventory
+    if request.args.get("cameras"):
+        try:
+            camera_ids = list(dict.fromkeys(int(c) for c in request.args["cameras"].split(",") if c.strip()))
+        except ValueError:
+            return jsonify({"error": "cameras must be comma-separated camera indices"}), 400
+    else:
+        camera_ids = [c["id"] for c in list_available_cameras(6) if c.get("status") == "available"]
+    if not camera_ids:
+        return jsonify({"error": "No cameras available"}), 503
+    if len(camera_ids) > Config.CAMERA_MULTI_MAX:
+        return jsonify({"error": f"At most {Config.CAMERA_MULTI_MAX} cameras per request"}), 400
+    
+    fmt = request.args.get("format", "grid").lower()
+    quality = request.args.get("quality", type=int)
+    width = request.args.get("tile_width" if fmt == "grid" else "width", type=int)
+    if width is not None and width <= 0:
+        return jsonify({"error": "width must be positive"}), 400
+    
+    # every camera is grabbed at the same moment, then tiled into one JPEG or sent as one part each
+    if fmt == "grid":
+        success, body, error, capture = capture_grid(camera_ids, width, quality)
+        mimetype = "image/jpeg"
+    elif fmt == "multipart":
+        success, body, error, boundary, capture = capture_multipart(camera_ids, width, quality)
+        mimetype = f"multipart/mixed; boundary={boundary}"
+    else:
+        return jsonify({"error": "format must be grid or multipart"}), 400
+    if not success:
+        return jsonify({"error": error}), 503
+    headers = {
+        "Cache-Control": "no-store",
+        "X-Cameras": ",".join(str(c) for c in camera_ids),
+        "X-Camera-Skew-Ms": f"{capture.skew * 1000:.1f}",
+    }
+    if capture.failed:
+        headers["X-Cameras-Failed"] = ",".join(str(c) for c in capture.failed)
+    return Response(body, content_type=mimetype, headers=headers)
+
+@APP.route("/static/<path:filename>", methods=["GET"])
+def static_asset(filename):
+    response = ASSETS.response(filename, request)
+    if response is None:
+        abort(404)
+    return response
+
+@APP.route("/favicon.ico", methods=["GET"])
+def favicon():
+    # There is no icon; answer browsers' automatic fetch with an empty, cacheable response
+    return Response(status=204, headers={"Cache-Control": "public, max-age=86400"})
+
 @APP.route("/", methods=["GET"])
 def web_interface():
     check_auth()
-    # Simple web interface with buttons
-    html = """
-<!DOCTYPE html>
-<html>
-<head>
-    <title>Mac Control</title>
-    <meta name="viewport" content="width=device-width, initial-scale=1">
-    <style>
-        body { font-family: Arial, sans-serif; padding: 20px; background: #f0f0f0; }
-        .container { max-width: 400px; margin: 0 auto; background: white; padding: 20px; border-radius: 10px; }
-        h1 { text-align: center; color: #333; }
-        .button { 
-            display: block; width: 100%; padding: 15px; margin: 10px 0; 
-            font-size: 18px; border: none; border-radius: 5px; cursor: pointer; 
-            text-decoration: none; text-align: center; color: white;
-        }
-        .status { background: #007bff; }
-        .camera { background: #28a745; }
-        .lock { background: #ffc107; color: black; }
-        .restart { background: #dc3545; }
-        .result { margin: 10px 0; padding: 10px; background: #e9ecef; border-radius: 5px; }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <h1>🖥️ Mac Control</h1>
-        
-        <a href="/status?token=replace-this-token" class="button status">📊 Check Status</a>
-        
-        <a href="/camera?token=replace-this-token" class="button camera">📸 Take Photo (Default)</a>
-        
-        <a href="/camera?token=replace-this-token&camera=1" class="button camera">💻 Take Photo (Mac Camera)</a>
-        
-        <a href="/cameras?token=replace-this-token" class="button camera">📷 List Cameras</a>
-        
-        <button onclick="lockScreen()" class="button lock">🔒 Lock Screen</button>
-        
-        <button onclick="restartMac()" class="button restart">🔄 Restart Mac</button>
-        
-        <div id="result" class="result" style="display:none;"></div>
-    </div>
-
-    <script>
-        function lockScreen() {
-            fetch('/lock?token=replace-this-token', { method: 'POST' })
-                .then(response => response.json())
-                .then(data => showResult('Lock: ' + JSON.stringify(data)))
-                .catch(error => showResult('Error: ' + error));
-        }
-        
-        function restartMac() {
-            if (confirm('Are you sure you want to restart the Mac?')) {
-                fetch('/restart?token=replace-this-token', { method: 'POST' })
-                    .then(response => response.json())
-                    .then(data => showResult('Restart: ' + JSON.stringify(data)))
-                    .catch(error => showResult('Error: ' + error));
-            }
-        }
-        
-        function showResult(message) {
-            document.getElementById('result').style.display = 'block';
-            document.getElementById('result').innerHTML = message;
-        }
-    </script>
-</body>
-</html>
-    """
-    return html
+    # The panel carries no per-request values (panel.js reads the token from the URL), so it is built once
+    return cached_document(PANEL_HTML, "text/html", request, PANEL_ETAG)
 
 if __name__ == "__main__":
     import logging
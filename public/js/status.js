@@ -2,107 +2,142 @@
  * Status page JavaScript
  */
 
+// Open live event stream (null when polling)
+let statusEvents = null;
+
 // Load status on page load
 document.addEventListener('DOMContentLoaded', () => {
     if (Config.isConfigured()) {
-        loadStatus();
+        loadStatus().then(subscribeStatus);
     }
 });
 
 /**
- * Load and display system status
+ * Build the status cards once; values are filled in by field
  */
-async function loadStatus() {
-    const contentEl = document.getElementById('statusContent');
-    const hostnameEl = document.getElementById('hostname');
-    
-    try {
-        const data = await API.getStatus();
-        
-        // Update hostname
-        hostnameEl.textContent = `🖥️ ${data.hostname}`;
-        
-        // Build status HTML
-        const html = `
-            <!-- Memory Card -->
-            <div class="info-card">
-                <div class="card-header">
-                    <span class="card-icon-large">💾</span>
-                    <h3>Memory Usage</h3>
+function renderStatusSkeleton(contentEl) {
+    contentEl.innerHTML = `
+        <!-- Memory Card -->
+        <div class="info-card">
+            <div class="card-header">
+                <span class="card-icon-large">💾</span>
+                <h3>Memory Usage</h3>
+            </div>
+            <div class="stat-list">
+                <div class="stat-item">
+                    <span class="stat-label">Total Memory</span>
+                    <span class="stat-value" data-field="memory.total"></span>
                 </div>
-                <div class="stat-list">
-                    <div class="stat-item">
-                        <span class="stat-label">Total Memory</span>
-                        <span class="stat-value">${data.memory.total}</span>
-                    </div>
-                    <div class="stat-item">
-                        <span class="stat-label">Used Memory</span>
-                        <span class="stat-value stat-warning">${data.memory.used}</span>
-                    </div>
-                    <div class="stat-item">
-                        <span class="stat-label">Available Memory</span>
-                        <span class="stat-value stat-success">${data.memory.available}</span>
-                    </div>
+                <div class="stat-item">
+                    <span class="stat-label">Used Memory</span>
+                    <span class="stat-value stat-warning" data-field="memory.used"></span>
+                </div>
+                <div class="stat-item">
+                    <span class="stat-label">Available Memory</span>
+                    <span class="stat-value stat-success" data-field="memory.available"></span>
                 </div>
             </div>
+        </div>
 
-            <!-- Storage Card -->
-            <div class="info-card">
-                <div class="card-header">
-                    <span class="card-icon-large">💽</span>
-                    <h3>Storage Usage</h3>
+        <!-- Storage Card -->
+        <div class="info-card">
+            <div class="card-header">
+                <span class="card-icon-large">💽</span>
+                <h3>Storage Usage</h3>
+            </div>
+            <div class="stat-list">
+                <div class="stat-item">
+                    <span class="stat-label">Total Storage</span>
+                    <span class="stat-value" data-field="storage.total"></span>
                 </div>
-                <div class="stat-list">
-                    <div class="stat-item">
-                        <span class="stat-label">Total Storage</span>
-                        <span class="stat-value">${data.storage.total}</span>
-                    </div>
-                    <div class="stat-item">
-                        <span class="stat-label">Used Storage</span>
-                        <span class="stat-value stat-warning">${data.storage.used}</span>
-                    </div>
-                    <div class="stat-item">
-                        <span class="stat-label">Available Storage</span>
-                        <span class="stat-value stat-success">${data.storage.available}</span>
-                    </div>
-                    <div class="stat-item">
-                        <span class="stat-label">Usage Percentage</span>
-                        <span class="stat-value">${data.storage.percent_used}</span>
-                    </div>
+                <div class="stat-item">
+                    <span class="stat-label">Used Storage</span>
+                    <span class="stat-value stat-warning" data-field="storage.used"></span>
                 </div>
-            </div>
-
-            <!-- Battery Card -->
-            <div class="info-card">
-                <div class="card-header">
-                    <span class="card-icon-large">🔋</span>
-                    <h3>Battery Status</h3>
+                <div class="stat-item">
+                    <span class="stat-label">Available Storage</span>
+                    <span class="stat-value stat-success" data-field="storage.available"></span>
                 </div>
-                <div class="stat-list">
-                    <div class="stat-item">
-                        <span class="stat-label">Battery Level</span>
-                        <span class="stat-value stat-success">${data.battery.percent}</span>
-                    </div>
-                    <div class="stat-item">
-                        <span class="stat-label">Status</span>
-                        <span class="stat-value">${data.battery.status}</span>
-                    </div>
+                <div class="stat-item">
+                    <span class="stat-label">Usage Percentage</span>
+                    <span class="stat-value" data-field="storage.percent_used"></span>
                 </div>
             </div>
+        </div>
 
-            <!-- Running Apps Card -->
-            <div class="info-card info-card-full">
-                <div class="card-header">
-                    <span class="card-icon-large">🚀</span>
-                    <h3>Running Applications</h3>
+        <!-- Battery Card -->
+        <div class="info-card">
+            <div class="card-header">
+                <span class="card-icon-large">🔋</span>
+                <h3>Battery Status</h3>
+            </div>
+            <div class="stat-list">
+                <div class="stat-item">
+                    <span class="stat-label">Battery Level</span>
+                    <span class="stat-value stat-success" data-field="battery.percent"></span>
                 </div>
-                <div class="apps-grid">
-                    ${data.running_apps.map(app => `<div class="app-badge">${app}</div>`).join('')}
+                <div class="stat-item">
+                    <span class="stat-label">Status</span>
+                    <span class="stat-value" data-field="battery.status"></span>
                 </div>
             </div>
-        `;
-        
-        contentEl.innerHTML = html;
+        </div>
+
+        <!-- Running Apps Card -->
+        <div class="info-card info-card-full">
+            <div class="card-header">
+                <span class="card-icon-large">🚀</span>
+                <h3>Running Applications</h3>
+            </div>
+            <div class="apps-grid" id="appsGrid"></div>
+        </div>
+    `;
+}
+
+/**
+ * Apply (possibly partial) status data, touching only the fields present
+ */
+function applyStatus(data) {
+    const contentEl = document.getElementById('statusContent');
+    if (!contentEl.querySelector('[data-field]')) {
+        renderStatusSkeleton(contentEl);
+    }
+    
+    if (data.hostname !== undefined) {
+        document.getElementById('hostname').textContent = `🖥️ ${data.hostname}`;
+    }
+    
+    for (const group of ['memory', 'storage', 'battery']) {
+        if (!data[group]) continue;
+        for (const [key, value] of Object.entries(data[group])) {
+            const el = contentEl.querySelector(`[data-field="${group}.${key}"]`);
+            if (el && el.textContent !== String(value)) {
+                el.textContent = value;
+            }
+        }
+    }
+    
+    if (data.running_apps) {
+        const grid = document.getElementById('appsGrid');
+        grid.replaceChildren(...data.running_apps.map(app => {
+            const badge = document.createElement('div');
+            badge.className = 'app-badge';
+            badge.textContent = app;
+            return badge;
+        }));
+    }
+}
+
+/**
+ * Load and display system status
+ */
+async function loadStatus() {
+    const contentEl = document.getElementById('statusContent');
+    
+    try {
+        const data = await API.getStatus();
+        applyStatus(data);
+        return true;
     } catch (error) {
         contentEl.innerHTML = `
             <div class="info-card">
@@ -117,5 +152,26 @@ async function loadStatus() {
                 </p>
             </div>
         `;
+        return false;
     }
 }
+
+/**
+ * Receive status changes as they are sampled instead of polling
+ */
+function subscribeStatus(loaded) {
+    if (!loaded || statusEvents || typeof EventSource === 'undefined') {
+        return;
+    }
+    
+    const onEvent = (event) => applyStatus(JSON.parse(event.data));
+    statusEvents = new EventSource(API.statusEventsUrl());
+    statusEvents.addEventListener('snapshot', onEvent);
+    statusEvents.addEventListener('delta', onEvent);
+    statusEvents.onerror = () => {
+        // EventSource retries on its own; give up only once it has closed
+        if (statusEvents.readyState === EventSource.CLOSED) {
+            statusEvents = null;
+        }
+    };
+}
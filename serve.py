@@ -0,0 +1,126 @@
+"""
+Production server entry point for Mac Control.
+Runs the app under gunicorn with threaded workers configured from Config.
+
+Usage:
+    python serve.py
+    SERVER_MODE=asgi python serve.py
+
+Requirements: pip install gunicorn (or uvicorn for SERVER_MODE=asgi)
+"""
+import sys
+from app.config import Config
+
+
+def shutdown_services() -> None:
+    """Stop the time-lapse recorder, release cameras and stop background samplers in the current process."""
+    from app.services.capture import release_all
+    from app.services.sampler import stop_sampler
+    from app.services.timelapse import stop_timelapse
+
+    stop_timelapse(timeout=2.0)
+    release_all(timeout=2.0)
+    stop_sampler(timeout=2.0)
+
+
+def _worker_exit(server, worker) -> None:
+    """gunicorn hook: clean up a worker's services during graceful shutdown."""
+    shutdown_services()
+
+
+def gunicorn_options() -> dict:
+    """
+    Build gunicorn settings from Config.
+
+    Caches, the status sampler and open camera devices live in each worker
+    process, so extra workers duplicate them and compete for the cameras.
+    Scale with threads first and keep SERVER_WORKERS at 1 unless cameras
+    are not used.
+    """
+    return {
+        "bind": f"{Config.HOST}:{Config.PORT}",
+        "worker_class": "gthread",
+        "workers": Config.SERVER_WORKERS,
+        "threads": Config.SERVER_THREADS,
+        "keepalive": Config.SERVER_KEEPALIVE,
+        "timeout": Config.SERVER_TIMEOUT,
+        "graceful_timeout": Config.SERVER_GRACEFUL_TIMEOUT,
+        "backlog": Config.SERVER_BACKLOG,
+        "loglevel": Config.LOG_LEVEL.lower(),
+        "accesslog": "-",
+        "errorlog": "-",
+        # Load the app after forking so no worker inherits another's threads
+        "preload_app": False,
+        "worker_exit": _worker_exit,
+    }
+
+
+def serve_asgi() -> None:
+    """
+    Serve the asyncio app (app/asgi.py) with uvicorn.
+
+    Status requests, event streams and MJPEG viewers wait as coroutines on
+    one event loop instead of each holding a server thread. The app's
+    lifespan handler stops the services on shutdown.
+    """
+    try:
+        import uvicorn
+    except ImportError:
+        sys.exit("uvicorn is required for SERVER_MODE=asgi: pip install uvicorn")
+
+    Config.init_app()
+    print(f"Starting Mac Control (asgi) on http://{Config.HOST}:{Config.PORT} "
+          f"({Config.SERVER_WORKERS} worker(s))")
+    uvicorn.run(
+        "app.asgi:application",
+        host=Config.HOST,
+        port=Config.PORT,
+        workers=Config.SERVER_WORKERS,
+        backlog=Config.SERVER_BACKLOG,
+        timeout_keep_alive=Config.SERVER_KEEPALIVE,
+        timeout_graceful_shutdown=Config.SERVER_GRACEFUL_TIMEOUT,
+        log_level=Config.LOG_LEVEL.lower(),
+    )
+
+
+def main() -> None:
+    if Config.SERVER_MODE == "asgi":
+        serve_asgi()
+        return
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        sys.exit("gunicorn is required for the production server: pip install gunicorn")
+
+    class MacControlApplication(BaseApplication):
+        """Embedded gunicorn application serving wsgi:app."""
+
+        def __init__(self, options: dict):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from wsgi import app
+            return app
+
+    long_lived = Config.STATUS_EVENTS_MAX_SUBSCRIBERS + Config.STREAM_MAX_VIEWERS
+    if long_lived > Config.SERVER_THREADS // 2:
+        print(f"Warning: up to {long_lived} event/stream connections may hold threads out of "
+              f"{Config.SERVER_THREADS}; lower STATUS_EVENTS_MAX_SUBSCRIBERS/STREAM_MAX_VIEWERS "
+              "or use SERVER_MODE=asgi", file=sys.stderr)
+    if Config.SERVER_WORKERS > 1 and Config.CAMERA_PERSISTENT:
+        print("Warning: each worker keeps its own camera sessions; "
+              "use SERVER_WORKERS=1 with persistent cameras", file=sys.stderr)
+
+    Config.init_app()
+    print(f"Starting Mac Control on http://{Config.HOST}:{Config.PORT} "
+          f"({Config.SERVER_WORKERS} worker(s) x {Config.SERVER_THREADS} threads)")
+    MacControlApplication(gunicorn_options()).run()
+
+
+if __name__ == "__main__":
+    main()
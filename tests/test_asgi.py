@@ -0,0 +1,144 @@
+"""
+Tests for the ASGI app, driven in-process without a server.
+"""
+import asyncio
+import json
+
+import cv2
+import numpy as np
+import pytest
+
+from app.asgi import application
+from app.config import Config
+from app.services import async_services
+from app.services.async_services import get_async_stream_count
+from app.services.capture import release_all
+from benchmarks.fakes import fake_camera
+
+
+async def _call(path, query="", token=Config.AUTH_TOKEN, headers=(), max_chunks=None):
+    """Run one request; streaming responses are cut off after `max_chunks` body chunks."""
+    raw_headers = [(k.lower().encode(), v.encode()) for k, v in headers]
+    if token:
+        raw_headers.append((b"x-auth-token", token.encode()))
+    scope = {"type": "http", "method": "GET", "path": path, "query_string": query.encode(),
+             "headers": raw_headers, "client": ("127.0.0.1", 50000)}
+    response = {"status": None, "headers": {}, "chunks": []}
+    enough = asyncio.Event()
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await enough.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {k.decode(): v.decode() for k, v in message["headers"]}
+        elif message.get("body"):
+            response["chunks"].append(message["body"])
+            if max_chunks is not None and len(response["chunks"]) >= max_chunks:
+                enough.set()
+
+    await asyncio.wait_for(application(scope, receive, send), 20)
+    return response
+
+
+def _run(*args, **kwargs):
+    return asyncio.run(_call(*args, **kwargs))
+
+
+@pytest.fixture
+def camera(monkeypatch):
+    monkeypatch.setattr(Config, "CAMERA_WARMUP_TIME", 0.0)
+    with fake_camera(fps=30):
+        yield
+    release_all(timeout=2.0)
+
+
+def test_rejects_missing_token():
+    response = _run("/status", token=None)
+
+    assert response["status"] == 401
+    assert json.loads(b"".join(response["chunks"]))["error"] == "Unauthorized"
+
+
+def test_favicon_needs_no_token():
+    response = _run("/favicon.ico", token=None)
+
+    assert response["status"] == 204
+    assert "content-length" not in response["headers"]
+
+
+def test_unknown_path():
+    assert _run("/nope")["status"] == 404
+
+
+def test_status():
+    response = _run("/status", "max_apps=3")
+
+    assert response["status"] == 200
+    status = json.loads(b"".join(response["chunks"]))
+    assert status["status"] == "ok"
+    assert {"hostname", "memory", "storage", "battery", "running_apps"} <= set(status)
+    assert len(status["running_apps"]) <= 3
+
+
+def test_max_apps_is_capped(monkeypatch):
+    async def many_apps():
+        return [f"App {i}" for i in range(50)]
+
+    monkeypatch.setitem(async_services._COLLECTORS, "running_apps", (many_apps, "STATUS_TTL_APPS"))
+    monkeypatch.setattr(async_services, "_cache", async_services.AsyncTTLCache())
+    monkeypatch.setattr(Config, "MAX_APPS_DISPLAY", 5)
+
+    response = _run("/status", "max_apps=1000000")
+
+    assert len(json.loads(b"".join(response["chunks"]))["running_apps"]) == 5
+
+
+def test_camera_stream_rejects_bad_size():
+    assert _run("/camera/stream", "width=0")["status"] == 400
+    assert _run("/camera/stream", "height=-1")["status"] == 400
+
+
+def test_camera_stream_ignores_nan_fps(camera):
+    response = _run("/camera/stream", "camera=0&fps=nan&width=160", max_chunks=2)
+
+    assert response["status"] == 200
+    assert len(response["chunks"]) == 2
+    assert get_async_stream_count() == 0
+
+
+def test_camera_snapshot(camera):
+    response = _run("/camera", "camera=0&width=160")
+
+    assert response["status"] == 200
+    assert response["headers"]["content-type"] == "image/jpeg"
+    image = cv2.imdecode(np.frombuffer(b"".join(response["chunks"]), np.uint8), cv2.IMREAD_COLOR)
+    assert image.shape[1] == 160
+
+
+def test_camera_stream_ends_on_disconnect(camera):
+    response = _run("/camera/stream", "camera=0&fps=30&width=160", max_chunks=3)
+
+    assert response["status"] == 200
+    assert response["headers"]["content-type"].startswith("multipart/x-mixed-replace")
+    assert all(chunk.startswith(b"--frame\r\nContent-Type: image/jpeg") for chunk in response["chunks"])
+    assert get_async_stream_count() == 0
+
+
+def test_status_events_start_with_snapshot():
+    response = _run("/status/events", max_chunks=1)
+
+    assert response["status"] == 200
+    assert response["headers"]["content-type"] == "text/event-stream"
+    message = response["chunks"][0].decode()
+    assert "event: snapshot" in message
+    data = json.loads(next(line for line in message.splitlines() if line.startswith("data: "))[6:])
+    assert "memory" in data
+    assert get_async_stream_count() == 0
@@ -0,0 +1,100 @@
+"""
+Tests for token verification, the wrong-token limiter and the auth middleware.
+"""
+from app import auth
+from app.auth import AuthMiddleware, FailureLimiter, TokenVerifier
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(auth.time, "monotonic", clock)
+    return clock
+
+
+def test_verifier_accepts_every_configured_token():
+    verifier = TokenVerifier(["old", "new", "", "new"])
+
+    assert verifier.verify("old")
+    assert verifier.verify("new")
+    assert not verifier.verify("other")
+    assert not verifier.verify("")
+    assert not verifier.verify(None)
+
+
+def test_limiter_refills_over_time(monkeypatch):
+    clock = _clock(monkeypatch)
+    limiter = FailureLimiter(burst=2, rate=0.5, max_clients=10)
+
+    assert not limiter.limited("a")
+    limiter.fail("a")
+    limiter.fail("a")
+    assert limiter.limited("a")
+
+    clock.now += 1.0  # Half an attempt regained
+    assert limiter.limited("a")
+    clock.now += 1.0
+    assert not limiter.limited("a")
+    # Never refills beyond the burst
+    clock.now += 100.0
+    limiter.fail("a")
+    limiter.fail("a")
+    assert limiter.limited("a")
+
+
+def test_limiter_evicts_least_recently_seen(monkeypatch):
+    _clock(monkeypatch)
+    limiter = FailureLimiter(burst=1, rate=0.01, max_clients=2)
+    limiter.fail("a")
+    limiter.fail("b")
+    limiter.fail("a")  # "a" is now the most recently seen
+    limiter.fail("c")
+
+    assert limiter.clients == 2
+    assert limiter.limited("a") and limiter.limited("c")
+    assert not limiter.limited("b")
+
+
+def _middleware():
+    def app(environ, start_response):
+        start_response("200 OK", [("Content-Type", "text/plain")])
+        return [b"ok"]
+
+    return AuthMiddleware(app, verifier=TokenVerifier(["secret"]),
+                          limiter=FailureLimiter(burst=3, rate=0.01, max_clients=10))
+
+
+def _status(middleware, path="/status", token=None, client="10.0.0.1"):
+    environ = {"REQUEST_METHOD": "GET", "PATH_INFO": path, "REMOTE_ADDR": client, "QUERY_STRING": ""}
+    if token is not None:
+        environ["HTTP_X_AUTH_TOKEN"] = token
+    statuses = []
+    middleware(environ, lambda status, headers: statuses.append(status))
+    return int(statuses[0].split()[0])
+
+
+def test_tokenless_requests_do_not_lock_the_client_out():
+    middleware = _middleware()
+    # A browser fetching /favicon.ico and similar sends no token
+    for _ in range(10):
+        assert _status(middleware, "/favicon.ico") == 401
+
+    assert _status(middleware, token="secret") == 200
+
+
+def test_wrong_tokens_are_limited_but_a_valid_token_still_passes():
+    middleware = _middleware()
+    for _ in range(3):
+        assert _status(middleware, token="guess") == 401
+
+    assert _status(middleware, token="guess") == 429
+    assert _status(middleware) == 429
+    assert _status(middleware, token="secret") == 200
+    assert _status(middleware, token="guess", client="10.0.0.2") == 401
@@ -0,0 +1,190 @@
+"""
+Tests for the TTL cache and the byte-budgeted LRU.
+"""
+import threading
+import time
+
+import pytest
+
+from app.services import cache
+from app.services.cache import ByteBudgetLRU, TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class SlowLoader:
+    """Blocks until released, counting calls."""
+
+    def __init__(self, value="fresh"):
+        self.value = value
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        assert self.release.wait(5.0)
+        return self.value
+
+
+def _concurrently(count, target):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(target())) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def test_concurrent_misses_share_one_load():
+    ttl_cache = TTLCache()
+    loader = SlowLoader()
+    threads, results = _concurrently(8, lambda: ttl_cache.get("memory", loader, ttl=60))
+    assert loader.started.wait(5.0)
+
+    loader.release.set()
+    for thread in threads:
+        thread.join(5.0)
+
+    assert loader.calls == 1
+    assert results == ["fresh"] * 8
+    stats = ttl_cache.stats()["memory"]
+    assert stats["misses"] == 1 and stats["refreshes"] == 1
+    assert stats["waits"] + stats["hits"] == 7
+
+
+def test_waiters_get_the_loader_error():
+    ttl_cache = TTLCache()
+    started, release = threading.Event(), threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(5.0)
+        raise OSError("vm_stat failed")
+
+    errors = []
+
+    def lookup():
+        try:
+            ttl_cache.get("memory", failing, ttl=60)
+        except OSError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=lookup)
+    leader.start()
+    assert started.wait(5.0)
+    follower = threading.Thread(target=lookup)
+    follower.start()
+    while ttl_cache.stats()["memory"]["waits"] == 0:
+        time.sleep(0.001)
+    release.set()
+    leader.join(5.0)
+    follower.join(5.0)
+
+    assert len(errors) == 2 and errors[0] is errors[1]
+    # Failures are not cached
+    assert ttl_cache.get("memory", lambda: "ok", ttl=60) == "ok"
+
+
+def test_waiter_times_out_while_the_load_runs():
+    ttl_cache = TTLCache()
+    loader = SlowLoader()
+    threads, _ = _concurrently(1, lambda: ttl_cache.get("battery", loader, ttl=60))
+    assert loader.started.wait(5.0)
+
+    with pytest.raises(TimeoutError):
+        ttl_cache.get("battery", loader, ttl=60, wait=0.05)
+
+    loader.release.set()
+    threads[0].join(5.0)
+    assert loader.calls == 1
+
+
+def test_in_flight_and_peek_do_not_load(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache.time, "monotonic", clock)
+    ttl_cache = TTLCache()
+
+    assert ttl_cache.in_flight("storage") is None
+    assert ttl_cache.peek("storage", "Unknown") == "Unknown"
+
+    ttl_cache.get("storage", lambda: "old", ttl=10)
+    clock.now += 20
+    # Expired values are still returned by peek
+    assert ttl_cache.peek("storage") == "old"
+
+    loader = SlowLoader("new")
+    threads, _ = _concurrently(1, lambda: ttl_cache.get("storage", loader, ttl=10))
+    assert loader.started.wait(5.0)
+    flight = ttl_cache.in_flight("storage")
+    assert flight is not None and not flight.done.is_set()
+    assert ttl_cache.peek("storage") == "old"
+
+    loader.release.set()
+    assert flight.done.wait(5.0)
+    threads[0].join(5.0)
+    assert flight.value == "new"
+    assert ttl_cache.in_flight("storage") is None
+    assert ttl_cache.peek("storage") == "new"
+
+
+def test_ttl_expiry_and_zero_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache.time, "monotonic", clock)
+    ttl_cache = TTLCache()
+    values = iter(range(10))
+
+    assert ttl_cache.get("apps", lambda: next(values), ttl=5) == 0
+    clock.now += 4
+    assert ttl_cache.get("apps", lambda: next(values), ttl=5) == 0
+    clock.now += 2
+    assert ttl_cache.get("apps", lambda: next(values), ttl=5) == 1
+    # A zero TTL loads every time and keeps nothing
+    assert ttl_cache.get("host", lambda: next(values), ttl=0) == 2
+    assert ttl_cache.get("host", lambda: next(values), ttl=0) == 3
+    assert ttl_cache.peek("host") is None
+
+
+def test_lru_evicts_least_recently_used_over_budget():
+    lru = ByteBudgetLRU(max_bytes=10)
+    lru.get("a", lambda: b"aaaa")
+    lru.get("b", lambda: b"bbbb")
+    lru.get("a", lambda: b"unused")  # "a" is now the most recently used
+
+    lru.get("c", lambda: b"cccc")
+
+    stats = lru.stats()
+    assert (stats["entries"], stats["bytes"], stats["evictions"]) == (2, 8, 1)
+    assert lru.get("a", lambda: b"reloaded") == b"aaaa"
+    assert lru.get("b", lambda: b"reloaded") == b"reloaded"
+
+
+def test_lru_skips_oversized_and_failed_values():
+    lru = ByteBudgetLRU(max_bytes=4)
+    lru.get("small", lambda: b"ok")
+
+    assert lru.get("big", lambda: b"x" * 5) == b"x" * 5
+    assert lru.get("failed", lambda: None) is None
+
+    stats = lru.stats()
+    assert (stats["entries"], stats["bytes"], stats["evictions"]) == (1, 2, 0)
+
+
+def test_lru_concurrent_misses_share_one_load():
+    lru = ByteBudgetLRU(max_bytes=1024)
+    loader = SlowLoader(b"jpeg")
+    threads, results = _concurrently(6, lambda: lru.get("frame", loader))
+    assert loader.started.wait(5.0)
+
+    loader.release.set()
+    for thread in threads:
+        thread.join(5.0)
+
+    assert loader.calls == 1
+    assert results == [b"jpeg"] * 6
@@ -0,0 +1,20 @@
+"""
+Tests for the encoded-JPEG cache shared by snapshots, streams and motion events.
+"""
+from app.services.camera import _encode_cached
+from app.services.capture import Frame
+from benchmarks.fakes import synthetic_frame
+
+
+def test_same_frame_is_encoded_once():
+    frame = Frame(1, 1000.0, synthetic_frame(64, 48, seed=1))
+
+    assert _encode_cached(7, frame) is _encode_cached(7, frame)
+
+
+def test_new_session_does_not_reuse_old_jpeg():
+    # Sequence numbers restart at 1 in every capture session
+    old = Frame(1, 1000.0, synthetic_frame(64, 48, seed=1))
+    new = Frame(1, 2000.0, synthetic_frame(64, 48, seed=2))
+
+    assert _encode_cached(8, old) != _encode_cached(8, new)
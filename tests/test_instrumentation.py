@@ -0,0 +1,55 @@
+"""
+Tests for the collector and cache metrics.
+"""
+import asyncio
+import subprocess
+
+import pytest
+
+from app.services import async_services, instrumentation, system_status
+from app.services.instrumentation import COLLECTOR_FAILURES, COLLECTOR_SECONDS, _Metric
+
+
+def _failures(name, reason):
+    return COLLECTOR_FAILURES._values.get((name, reason), 0)
+
+
+def _runs(name):
+    state = COLLECTOR_SECONDS._values.get((name,))
+    return sum(state[0]) if state else 0
+
+
+def _fail(*args, **kwargs):
+    raise subprocess.TimeoutExpired("pmset", 1)
+
+
+def test_metric_requires_lines():
+    with pytest.raises(TypeError):
+        _Metric("name", "documentation")
+
+
+def test_collector_reporting_unknown_counts_as_failure(monkeypatch):
+    monkeypatch.setattr(system_status, "_getoutput", _fail)
+    before, runs = _failures("battery", "unknown"), _runs("battery")
+
+    assert system_status._read_battery_info() == system_status._UNKNOWN["battery"]
+    assert _failures("battery", "unknown") == before + 1
+    assert _runs("battery") == runs + 1
+
+
+def test_async_collector_is_timed_and_counts_failures(monkeypatch):
+    async def fail(*args, **kwargs):
+        raise OSError("osascript not found")
+
+    monkeypatch.setattr(async_services, "run_command", fail)
+    before, runs = _failures("running_apps", "unknown"), _runs("running_apps")
+
+    assert asyncio.run(async_services._read_running_apps()) == []
+    assert _failures("running_apps", "unknown") == before + 1
+    assert _runs("running_apps") == runs + 1
+
+
+def test_cache_hit_ratio_counts_waits_as_hits(monkeypatch):
+    monkeypatch.setattr(instrumentation, "_cache_stats", lambda: {"c": {"hits": 2, "misses": 1, "waits": 1}})
+
+    assert dict(instrumentation._cache_hit_ratio()) == {("c",): 0.75}
@@ -0,0 +1,94 @@
+"""
+Tests for the in-memory metrics history and its fallback to the on-disk log.
+"""
+import numpy as np
+
+from app.services.metrics_history import MetricsHistory, RingSeries, downsample
+from app.services.metrics_log import MetricsLog
+
+
+def test_ring_series_recycles_slots():
+    series = RingSeries(step=10.0, capacity=3)
+    series.add(0.0, 1.0)
+    series.add(5.0, 3.0)
+    series.add(12.0, 2.0)
+
+    times, sums, counts, mins, maxes = series.window(0.0, 29.0)
+    assert times.tolist() == [0.0, 10.0]
+    assert sums.tolist() == [4.0, 2.0]
+    assert counts.tolist() == [2, 1]
+    assert (mins.tolist(), maxes.tolist()) == ([1.0, 2.0], [3.0, 2.0])
+
+    # Bucket 3 lands in bucket 0's slot and replaces it
+    series.add(31.0, 7.0)
+    times, sums, counts, _, _ = series.window(0.0, 40.0)
+    assert times.tolist() == [10.0, 30.0]
+    assert (sums.tolist(), counts.tolist()) == ([2.0, 7.0], [1, 1])
+
+
+def test_ring_series_ignores_samples_older_than_the_slot():
+    series = RingSeries(step=10.0, capacity=3)
+    series.add(31.0, 7.0)
+
+    series.add(1.0, 100.0)  # Bucket 0 maps to the slot now holding bucket 3
+
+    times, sums, _, _, maxes = series.window(0.0, 40.0)
+    assert times.tolist() == [30.0]
+    assert (sums.tolist(), maxes.tolist()) == ([7.0], [7.0])
+
+
+def test_downsample_merges_consecutive_slots():
+    times = np.array([0.0, 10.0, 20.0, 40.0])
+    sums = np.array([4.0, 2.0, 9.0, 5.0])
+    counts = np.array([2, 1, 3, 1])
+    mins = np.array([1.0, 2.0, 0.5, 5.0])
+    maxes = np.array([3.0, 2.0, 6.0, 5.0])
+
+    points = downsample(times, sums, counts, mins, maxes, 20.0)
+
+    # Averages are weighted by sample count, not by slot
+    assert points == [[0.0, 2.0, 1.0, 3.0], [20.0, 3.0, 0.5, 6.0], [40.0, 5.0, 5.0, 5.0]]
+    assert downsample(*[np.array([])] * 5, 20.0) == []
+
+
+def test_select_picks_the_finest_tier_that_reaches_back():
+    history = MetricsHistory([(1.0, 60), (10.0, 60), (60.0, 60)])
+    now = 100000.0
+
+    assert history._select("app_count", now - 30, now).step == 1.0
+    assert history._select("app_count", now - 60, now).step == 1.0
+    assert history._select("app_count", now - 61, now).step == 10.0
+    assert history._select("app_count", now - 3000, now).step == 60.0
+    # Beyond every tier's retention the coarsest one is used
+    assert history._select("app_count", now - 10**6, now).step == 60.0
+
+
+def test_ranges_before_startup_are_read_from_the_log(tmp_path):
+    log = MetricsLog(tmp_path, segment_bytes=1024, max_bytes=8192)
+    history = MetricsHistory([(1.0, 600)], log)
+    before = history.started_at - 100
+    for offset in range(3):
+        log.append("app_count", before + offset, 10.0 + offset)
+    history.record("app_count", history.started_at, 20.0)
+
+    earlier = history.query("app_count", before, history.started_at + 1, max_points=1000)
+    recent = history.query("app_count", history.started_at, history.started_at + 1, max_points=1000)
+
+    # Recorded samples are logged too, so the log covers both sides of the restart
+    assert earlier["source"] == "log"
+    assert [point[1] for point in earlier["points"]] == [10.0, 11.0, 12.0, 20.0]
+    assert recent["source"] == "memory"
+    assert [point[1] for point in recent["points"]] == [20.0]
+    log.close()
+
+
+def test_empty_log_range_falls_back_to_memory(tmp_path):
+    log = MetricsLog(tmp_path, segment_bytes=1024, max_bytes=8192)
+    history = MetricsHistory([(1.0, 600)], log)
+    history.record("app_count", history.started_at, 5.0)  # Also the log's only record
+
+    result = history.query("app_count", history.started_at - 100, history.started_at - 50, max_points=10)
+
+    assert result["source"] == "memory"
+    assert result["points"] == []
+    log.close()
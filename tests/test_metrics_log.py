@@ -0,0 +1,37 @@
+"""
+Tests for the on-disk metrics log.
+"""
+from app.services.metrics_log import MetricsLog
+
+
+def _log(tmp_path):
+    return MetricsLog(tmp_path, segment_bytes=1024, max_bytes=8192)
+
+
+def test_append_and_read_range(tmp_path):
+    log = _log(tmp_path)
+    for ts in range(10):
+        log.append("cpu", float(ts), ts * 10.0)
+
+    times, values = log.read("cpu", 3.0, 5.0)
+
+    assert times.tolist() == [3.0, 4.0, 5.0]
+    assert values.tolist() == [30.0, 40.0, 50.0]
+    log.close()
+
+
+def test_only_the_lock_holder_writes(tmp_path):
+    first, second = _log(tmp_path), _log(tmp_path)
+    first.append("cpu", 1.0, 1.0)
+    second.append("cpu", 2.0, 2.0)
+
+    assert first.writer and not second.writer
+    assert second.read("cpu", 0.0, 10.0)[0].tolist() == [1.0]
+
+    # The lock passes on once the holder closes, and the new writer appends after its records
+    first.close()
+    second.append("cpu", 3.0, 3.0)
+
+    assert second.writer
+    assert second.read("cpu", 0.0, 10.0)[0].tolist() == [1.0, 3.0]
+    second.close()
@@ -0,0 +1,124 @@
+"""
+Tests for the motion detector and the event lifecycle of a motion monitor.
+"""
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.services import motion
+from app.services.camera import _encode_cached
+from app.services.capture import Frame
+from app.services.motion import MotionDetector, MotionMonitor
+from benchmarks.fakes import synthetic_frame
+
+CAMERA = 97
+
+
+def _scene(block=None):
+    image = np.full((120, 160, 3), 60, dtype=np.uint8)
+    if block is not None:
+        x, y, w, h = block
+        image[y:y + h, x:x + w] = 230
+    return image
+
+
+def test_static_scene_scores_zero():
+    detector = MotionDetector(width=80)
+    detector.detect(_scene())
+
+    assert detector.detect(_scene()) == (0.0, [])
+
+
+def test_moved_block_is_boxed():
+    detector = MotionDetector(width=80)
+    detector.detect(_scene())
+
+    score, boxes = detector.detect(_scene((60, 40, 40, 40)))
+
+    assert score > 0
+    x, y, w, h = boxes[0]
+    # The box covers the block, with a margin of a few analysis pixels from blur and dilation
+    assert x <= 60 and y <= 40 and x + w >= 100 and y + h >= 80
+    assert x >= 60 - 16 and y >= 40 - 16 and x + w <= 100 + 16 and y + h <= 80 + 16
+
+
+class ScriptedDetector:
+    """Returns the queued (score, boxes) results in order."""
+
+    def __init__(self, results):
+        self.results = list(results)
+
+    def detect(self, image):
+        return self.results.pop(0)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _monitor(monkeypatch, results):
+    clock = Clock()
+    monkeypatch.setattr(motion.time, "time", clock)
+    monitor = MotionMonitor(SimpleNamespace(camera_id=CAMERA), ScriptedDetector(results), threshold=0.1,
+                            fps=10, cooldown=2.0, max_events=10, idle_timeout=60)
+    return monitor, clock
+
+
+def _frame(seq, clock):
+    return Frame(seq, clock.now, synthetic_frame(64, 48, seed=seq))
+
+
+def test_event_opens_holds_peak_and_closes_after_cooldown(monkeypatch):
+    monitor, clock = _monitor(monkeypatch, [
+        (0.0, []), (0.2, [(1, 1, 2, 2)]), (0.5, [(5, 5, 9, 9)]), (0.05, []), (0.05, []),
+    ])
+    frames = [_frame(seq, clock) for seq in range(1, 6)]
+
+    monitor._observe(frames[0].image, frames[0])
+    assert monitor.last_id == 0
+
+    clock.now += 0.1
+    monitor._observe(frames[1].image, frames[1])
+    event = monitor.get_event(monitor.last_id)
+    assert event.ended_at is None
+    assert event.jpeg == _encode_cached(CAMERA, frames[1])
+    assert (event.peak_score, event.boxes) == (0.2, [(1, 1, 2, 2)])
+
+    # A better frame within a second of the last encode is held, not described without its snapshot
+    clock.now += 0.3
+    monitor._observe(frames[2].image, frames[2])
+    assert event.jpeg == _encode_cached(CAMERA, frames[1])
+    assert (event.peak_score, event.boxes) == (0.2, [(1, 1, 2, 2)])
+
+    # Once the second is up the held frame is encoded, with its boxes
+    clock.now += 1.0
+    monitor._observe(frames[3].image, frames[3])
+    assert event.jpeg == _encode_cached(CAMERA, frames[2])
+    assert (event.peak_score, event.boxes, event.snapshots) == (0.5, [(5, 5, 9, 9)], 2)
+    assert event.ended_at is None
+
+    clock.now += 2.0
+    monitor._observe(frames[4].image, frames[4])
+    assert event.ended_at == pytest.approx(1000.4)
+    assert not event.to_dict()["active"]
+
+
+def test_held_frame_is_encoded_when_the_event_closes(monkeypatch):
+    monitor, clock = _monitor(monkeypatch, [(0.2, []), (0.6, [(2, 2, 3, 3)]), (0.0, [])])
+    frames = [_frame(seq, clock) for seq in range(11, 14)]
+
+    monitor._observe(frames[0].image, frames[0])
+    clock.now += 0.1
+    monitor._observe(frames[1].image, frames[1])
+    clock.now += 2.0
+    monitor._observe(frames[2].image, frames[2])
+
+    event = monitor.get_event(monitor.last_id)
+    assert event.ended_at is not None
+    assert event.jpeg == _encode_cached(CAMERA, frames[1])
+    assert event.boxes == [(2, 2, 3, 3)]
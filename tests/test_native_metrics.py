@@ -0,0 +1,86 @@
+"""
+Tests for the native memory and storage backends.
+"""
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.native_metrics import LinuxBackend, MetricsBackend
+
+MEMINFO = (
+    "MemTotal:       16384000 kB\n"
+    "MemFree:         1024000 kB\n"
+    "MemAvailable:    4096000 kB\n"
+    "Buffers:          512000 kB\n"
+    "Cached:          2048000 kB\n"
+)
+
+
+def _meminfo(tmp_path, text):
+    path = tmp_path / "meminfo"
+    path.write_text(text)
+    return str(path)
+
+
+def test_base_backend_requires_memory():
+    with pytest.raises(TypeError):
+        MetricsBackend()
+
+
+def test_linux_memory_uses_mem_available(tmp_path):
+    memory = LinuxBackend(_meminfo(tmp_path, MEMINFO)).memory()
+
+    assert memory == {
+        "total": 16384000 * 1024,
+        "used": (16384000 - 4096000) * 1024,
+        "available": 4096000 * 1024,
+    }
+
+
+def test_linux_memory_falls_back_to_mem_free(tmp_path):
+    # Kernels before 3.14 do not report MemAvailable
+    text = "".join(line + "\n" for line in MEMINFO.splitlines() if not line.startswith("MemAvailable"))
+
+    memory = LinuxBackend(_meminfo(tmp_path, text)).memory()
+
+    assert memory["available"] == 1024000 * 1024
+    assert memory["used"] == memory["total"] - memory["available"]
+
+
+def test_linux_memory_without_total_fails(tmp_path):
+    with pytest.raises(KeyError):
+        LinuxBackend(_meminfo(tmp_path, "MemFree: 1024 kB\n")).memory()
+
+
+def test_storage_matches_df(monkeypatch):
+    # 1000 blocks of 4 KiB: 600 free, of which 550 are available to unprivileged users
+    stat = SimpleNamespace(f_blocks=1000, f_bfree=600, f_bavail=550, f_frsize=4096)
+    monkeypatch.setattr(os, "statvfs", lambda path: stat)
+
+    storage = LinuxBackend().storage("/")
+
+    assert storage["total"] == 1000 * 4096
+    assert storage["used"] == 400 * 4096
+    assert storage["available"] == 550 * 4096
+    # Reserved blocks count as neither used nor available
+    assert storage["percent_used"] == round(400 * 100 / 950, 1)
+
+
+def test_storage_of_empty_volume(monkeypatch):
+    stat = SimpleNamespace(f_blocks=0, f_bfree=0, f_bavail=0, f_frsize=4096)
+    monkeypatch.setattr(os, "statvfs", lambda path: stat)
+
+    assert LinuxBackend().storage("/")["percent_used"] == 0.0
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="reads the host's /proc/meminfo")
+def test_linux_backend_reads_host():
+    backend = LinuxBackend()
+    memory = backend.memory()
+    storage = backend.storage("/")
+
+    assert memory["total"] > 0
+    assert 0 <= memory["available"] <= memory["total"]
+    assert storage["used"] + storage["available"] <= storage["total"]
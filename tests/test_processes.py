@@ -0,0 +1,124 @@
+"""
+Tests for the /proc process scanner and the process table built on it.
+"""
+import os
+import sys
+import time
+
+import pytest
+
+from app.services.processes import LinuxProcessReader, ProcessReader, ProcessSample, ProcessTable
+
+BOOT_TIME = 1700000000
+TICKS = os.sysconf("SC_CLK_TCK")
+
+
+def _write_proc(root, processes):
+    """Lay out a fake /proc with one stat file per (pid, comm, utime, stime, start_ticks, rss_pages)."""
+    root.mkdir(exist_ok=True)
+    (root / "stat").write_text(f"cpu  1 2 3 4\nbtime {BOOT_TIME}\n")
+    (root / "self").mkdir(exist_ok=True)  # Non-numeric entries are skipped
+    for pid, comm, utime, stime, start, rss in processes:
+        fields = ["S", "1", str(pid), str(pid), "0", "-1", "0", "0", "0", "0", "0",
+                  str(utime), str(stime), "0", "0", "20", "0", "1", "0", str(start), "0", str(rss)]
+        (root / str(pid)).mkdir(exist_ok=True)
+        (root / str(pid) / "stat").write_text(f"{pid} ({comm}) " + " ".join(fields) + " 0 0\n")
+
+
+class FakeReader(ProcessReader):
+    """Returns whatever samples the test sets."""
+
+    name = "fake"
+
+    def __init__(self):
+        self.samples = []
+
+    def scan(self):
+        return list(self.samples)
+
+
+def _sample(pid, cpu_seconds=0.0, rss=0, name=None, started_at=None):
+    started_at = time.time() - 100 if started_at is None else started_at
+    return ProcessSample(pid, name or f"proc-{pid}", cpu_seconds, rss, started_at)
+
+
+def test_base_reader_requires_scan():
+    with pytest.raises(TypeError):
+        ProcessReader()
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="uses sysconf clock ticks")
+def test_linux_reader_parses_stat(tmp_path):
+    _write_proc(tmp_path, [
+        (1, "init", 100, 50, 10, 1000),
+        (42, "Web Content (x) y", 300, 100, 2 * TICKS, 5),
+    ])
+
+    samples = {sample.pid: sample for sample in LinuxProcessReader(str(tmp_path)).scan()}
+
+    assert set(samples) == {1, 42}
+    # Command names may contain spaces and parentheses
+    assert samples[42].name == "Web Content (x) y"
+    assert samples[42].cpu_seconds == pytest.approx(400 / TICKS)
+    assert samples[42].rss == 5 * os.sysconf("SC_PAGE_SIZE")
+    assert samples[42].started_at == pytest.approx(BOOT_TIME + 2)
+
+
+def test_top_selects_by_cpu_and_memory():
+    reader = FakeReader()
+    reader.samples = [_sample(pid, cpu_seconds=10.0, rss=pid * 1000) for pid in range(1, 8)]
+    table = ProcessTable(reader, min_interval=0)
+    table.refresh()
+
+    # Between scans, CPU% comes from the change in CPU time
+    reader.samples = [s._replace(cpu_seconds=s.cpu_seconds + (1.0 if s.pid in (2, 5) else 0.0))
+                      for s in reader.samples]
+    time.sleep(0.01)
+    by_cpu = table.top(2, "cpu")
+    by_memory = table.top(3, "memory")
+
+    assert by_cpu["count"] == 7
+    assert {p["pid"] for p in by_cpu["processes"]} == {2, 5}
+    assert [p["pid"] for p in by_memory["processes"]] == [7, 6, 5]
+
+
+def test_changes_report_started_and_exited():
+    reader = FakeReader()
+    reader.samples = [_sample(1), _sample(2)]
+    table = ProcessTable(reader, min_interval=0)
+    table.refresh()
+    baseline = table.version
+
+    reader.samples = [_sample(1), _sample(3)]
+    changes = table.changes_since(baseline)
+
+    assert changes["version"] == baseline + 1
+    assert not changes["reset"]
+    assert [p["pid"] for p in changes["started"]] == [3]
+    assert [p["pid"] for p in changes["exited"]] == [2]
+    assert table.changes_since(changes["version"])["started"] == []
+
+
+def test_reused_pid_is_an_exit_and_a_start():
+    reader = FakeReader()
+    reader.samples = [_sample(7, name="old", started_at=1000.0)]
+    table = ProcessTable(reader, min_interval=0)
+    table.refresh()
+
+    reader.samples = [_sample(7, name="new", started_at=2000.0)]
+    changes = table.changes_since(table.version)
+
+    assert [p["name"] for p in changes["started"]] == ["new"]
+    assert [p["name"] for p in changes["exited"]] == ["old"]
+
+
+def test_unknown_version_gets_full_list():
+    reader = FakeReader()
+    reader.samples = [_sample(1), _sample(2)]
+    table = ProcessTable(reader, min_interval=0)
+
+    changes = table.changes_since(None)
+
+    assert changes["reset"]
+    assert {p["pid"] for p in changes["started"]} == {1, 2}
+    assert table.changes_since(table.version + 5)["reset"]
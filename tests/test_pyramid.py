@@ -0,0 +1,81 @@
+"""
+Tests for view sizing and the reused buffers of the frame pyramid.
+"""
+import numpy as np
+import pytest
+
+from app.services.pyramid import FramePyramid, fit_view
+from benchmarks.fakes import synthetic_frame
+
+SRC = (640, 480)
+
+
+@pytest.mark.parametrize("width, height, crop, expected", [
+    (None, None, None, ((0, 0, 640, 480), (640, 480))),
+    (320, None, None, ((0, 0, 640, 480), (320, 240))),
+    (None, 120, None, ((0, 0, 640, 480), (160, 120))),
+    (100, 100, None, ((0, 0, 640, 480), (100, 100))),
+    # The missing dimension follows the crop's aspect ratio
+    (50, None, (100, 100, 200, 100), ((100, 100, 200, 100), (50, 25))),
+])
+def test_fit_view_sizes(width, height, crop, expected):
+    assert fit_view(SRC, width, height, crop) == expected
+
+
+def test_fit_view_never_upscales():
+    assert fit_view(SRC, 1920)[1] == (640, 480)
+    assert fit_view(SRC, 400, None, (0, 0, 100, 50))[1] == (100, 50)
+    assert fit_view(SRC, 1000, 1000, (0, 0, 100, 50))[1] == (100, 50)
+
+
+@pytest.mark.parametrize("crop, rect", [
+    ((-20, -10, 100, 100), (0, 0, 100, 100)),
+    ((600, 400, 100, 100), (600, 400, 40, 80)),
+    ((5000, 5000, 10, 10), (639, 479, 1, 1)),
+    ((10, 10, 0, -5), (10, 10, 1, 1)),
+])
+def test_fit_view_clips_invalid_crops(crop, rect):
+    clipped, size = fit_view(SRC, None, None, crop)
+
+    assert clipped == rect
+    assert size == rect[2:]
+
+
+def test_render_uses_a_level_at_least_the_output_size():
+    pyramid = FramePyramid()
+    image = synthetic_frame(*SRC, seed=1)
+    pyramid.set_frame(1, image)
+
+    half = pyramid.render((0, 0, 640, 480), (320, 240))
+    assert half.shape == (240, 320, 3)
+    assert pyramid.builds == 1
+    # A same-size view of level 1 is copied, not resized
+    assert np.array_equal(half, pyramid._level(1))
+
+    assert pyramid.render((0, 0, 640, 480), (100, 75)).shape == (75, 100, 3)
+    assert pyramid.builds == 2  # Level 2 (160x120); level 3 would be smaller than the output
+    assert np.array_equal(pyramid.render((0, 0, 640, 480), (640, 480)), image)
+
+
+def test_buffers_are_reused_across_frames():
+    pyramid = FramePyramid()
+    first = synthetic_frame(*SRC, seed=1)
+    pyramid.set_frame(1, first)
+    output = pyramid.render((0, 0, 640, 480), (100, 75))
+    allocations, builds = pyramid.allocations, pyramid.builds
+
+    # The same frame again keeps its levels
+    pyramid.set_frame(1, first)
+    assert pyramid.render((0, 0, 640, 480), (100, 75)) is output
+    assert (pyramid.allocations, pyramid.builds) == (allocations, builds)
+
+    # A new frame of the same size rebuilds the levels into the same buffers
+    pyramid.set_frame(2, synthetic_frame(*SRC, seed=2))
+    assert pyramid.render((0, 0, 640, 480), (100, 75)) is output
+    assert pyramid.allocations == allocations
+    assert pyramid.builds == 2 * builds
+
+    # A resolution change drops the level buffers
+    pyramid.set_frame(3, synthetic_frame(320, 240, seed=3))
+    pyramid.render((0, 0, 320, 240), (50, 37))
+    assert pyramid.allocations > allocations
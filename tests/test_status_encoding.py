@@ -0,0 +1,85 @@
+"""
+Tests for the compact status encoding behind /status/compact.
+"""
+import json
+
+import pytest
+
+from app.config import Config
+from app.services import sampler, status_encoding
+from app.services.sampler import StatusSampler
+from app.services.status_encoding import compact_status, encode_status
+from app.services.system_status import _format_memory, _format_storage, _parse_storage
+
+GIB = 1024**3
+
+
+def _status():
+    return {
+        "hostname": "mac",
+        "memory": _format_memory({"total": 16 * GIB, "used": 7 * GIB + 123456789, "available": 9 * GIB - 123456789}),
+        "storage": _format_storage({"total": 500 * GIB, "used": 123456789012, "available": 300 * GIB,
+                                    "percent_used": 28.7}),
+        "battery": {"percent": "80%", "status": "charging"},
+        "running_apps": ["Finder"],
+    }
+
+
+def test_compact_sizes_are_raw_bytes():
+    compact = compact_status(_status())
+
+    # The display strings are rounded to 0.1 GB; the compact form is exact
+    assert compact["memory"]["used"] == 7 * GIB + 123456789
+    assert compact["storage"]["used"] == 123456789012
+    assert compact["storage"]["percent_used"] == 28.7
+    assert compact["battery"]["percent"] == 80.0
+
+
+def test_df_output_keeps_raw_sizes():
+    storage = _parse_storage(
+        "Filesystem     Size   Used  Avail Capacity  Mounted on\n"
+        "/dev/disk3s1  460Gi  200Gi  250Gi    45%    /\n"
+    )
+
+    assert storage["used"] == "200Gi"
+    assert storage["raw"] == {"total": 460 * GIB, "used": 200 * GIB, "available": 250 * GIB, "percent_used": 45.0}
+    assert compact_status({"storage": _parse_storage("garbage")})["storage"]["used"] is None
+
+
+@pytest.fixture
+def fake_sampler(monkeypatch):
+    status = _status()
+    fake = StatusSampler({name: (lambda value=value: value, 3600) for name, value in status.items()})
+    monkeypatch.setattr(Config, "STATUS_SAMPLER_ENABLED", True)
+    monkeypatch.setattr(sampler, "_sampler", fake)
+    monkeypatch.setattr(status_encoding, "_encoded", status_encoding.EncodedStatusCache())
+    yield fake
+    fake.stop(timeout=1.0)
+
+
+def test_unchanged_sample_refreshes_sampled_at(fake_sampler):
+    fake_sampler.snapshot(wait=1.0)
+    _, first, first_headers, _ = encode_status(10)
+
+    fake_sampler.refresh("memory")  # Same value, newer sample time
+    _, second, second_headers, _ = encode_status(10)
+
+    assert json.loads(second)["memory"] == json.loads(first)["memory"]
+    assert json.loads(second)["sampled_at"]["memory"] > json.loads(first)["sampled_at"]["memory"]
+    assert second_headers["ETag"] != first_headers["ETag"]
+
+
+def test_disabled_sampler_is_not_started(monkeypatch):
+    def no_sampler():
+        raise AssertionError("sampler started")
+
+    monkeypatch.setattr(Config, "STATUS_SAMPLER_ENABLED", False)
+    monkeypatch.setattr(sampler, "get_sampler", no_sampler)
+    monkeypatch.setattr(status_encoding, "get_status_revision", no_sampler)
+    monkeypatch.setattr(status_encoding, "get_system_status", lambda max_apps: _status())
+
+    success, body, headers, _ = encode_status(10)
+
+    assert success
+    assert json.loads(body)["memory"]["total"] == 16 * GIB
+    assert "ETag" not in headers
@@ -0,0 +1,56 @@
+"""
+Tests for the status change log behind /status/events.
+"""
+from app.services.status_events import StatusBroadcaster
+
+
+def _broadcaster():
+    broadcaster = StatusBroadcaster(log_size=4)
+    broadcaster.publish("memory", {"used": 1}, 1.0)
+    broadcaster.publish("battery", {"percent": "80%"}, 1.0)
+    return broadcaster
+
+
+def test_unchanged_value_is_not_an_event():
+    broadcaster = _broadcaster()
+    broadcaster.publish("memory", {"used": 1}, 2.0)
+
+    assert broadcaster.last_id == 2
+
+
+def test_delta_since_event():
+    broadcaster = _broadcaster()
+    broadcaster.publish("memory", {"used": 2}, 2.0)
+
+    event_id, full, fields = broadcaster.changes_since(2)
+
+    assert (event_id, full) == (3, False)
+    assert fields == {"memory": ({"used": 2}, 2.0)}
+
+
+def test_client_behind_the_log_gets_snapshot():
+    broadcaster = _broadcaster()
+    for used in range(10):
+        broadcaster.publish("memory", {"used": used + 10}, 2.0)
+
+    _, full, fields = broadcaster.changes_since(1)
+
+    assert full
+    assert set(fields) == {"memory", "battery"}
+
+
+def test_ids_round_trip_within_a_process():
+    broadcaster = _broadcaster()
+
+    assert broadcaster.parse_id(broadcaster.format_id(2)) == 2
+
+
+def test_ids_from_another_process_are_rejected():
+    # Same counter value, but issued before a restart
+    old, new = _broadcaster(), _broadcaster()
+    new.epoch = old.epoch + "0"
+
+    assert new.parse_id(old.format_id(2)) is None
+    assert new.parse_id("2") is None
+    assert new.parse_id("garbage") is None
+    assert new.changes_since(new.parse_id(old.format_id(2)))[1]
@@ -0,0 +1,29 @@
+"""
+Tests for opening shared MJPEG streams.
+"""
+import pytest
+
+from app.config import Config
+from app.services.capture import release_all
+from app.services.streaming import open_stream
+from benchmarks.fakes import fake_camera
+
+
+@pytest.fixture
+def camera(monkeypatch):
+    monkeypatch.setattr(Config, "CAMERA_WARMUP_TIME", 0.0)
+    with fake_camera(fps=30):
+        yield
+    release_all(timeout=2.0)
+
+
+@pytest.mark.parametrize("fps", [float("nan"), float("inf"), float("-inf")])
+def test_non_finite_fps_uses_the_default(camera, fps):
+    success, stream, error = open_stream(0, fps=fps, width=160)
+
+    assert success, error
+    try:
+        assert stream._viewer.fps == min(Config.STREAM_DEFAULT_FPS, Config.STREAM_MAX_FPS)
+        assert stream._interval == 1.0 / stream._viewer.fps
+    finally:
+        stream.close()
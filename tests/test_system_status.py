@@ -0,0 +1,110 @@
+"""
+Tests for status collection: the concurrent deadline and the Unknown fallbacks.
+"""
+import threading
+
+import pytest
+
+from app.config import Config
+from app.services import system_status
+from app.services.cache import TTLCache
+
+
+class Collectors:
+    """Stand-in collectors: "hostname" blocks until released, "battery" fails, the rest return at once."""
+
+    def __init__(self):
+        self.calls = {name: 0 for name in system_status.COLLECTORS}
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def hostname(self):
+        self.calls["hostname"] += 1
+        self.started.set()
+        assert self.release.wait(5.0)
+        return "mac"
+
+    def battery(self):
+        self.calls["battery"] += 1
+        raise OSError("pmset failed")
+
+    def instant(self, name, value):
+        def collect():
+            self.calls[name] += 1
+            return value
+        return collect
+
+
+@pytest.fixture
+def collectors(monkeypatch):
+    fake = Collectors()
+    monkeypatch.setitem(system_status.COLLECTORS, "hostname", fake.hostname)
+    monkeypatch.setitem(system_status.COLLECTORS, "memory", fake.instant("memory", {"used": "1 GB"}))
+    monkeypatch.setitem(system_status.COLLECTORS, "storage", fake.instant("storage", {"used": "2 GB"}))
+    monkeypatch.setitem(system_status.COLLECTORS, "battery", fake.battery)
+    monkeypatch.setitem(system_status.COLLECTORS, "running_apps", fake.instant("running_apps", ["A", "B", "C"]))
+    monkeypatch.setattr(system_status, "_cache", TTLCache())
+    monkeypatch.setattr(system_status, "_executor", None)
+    yield fake
+    fake.release.set()
+    if system_status._executor is not None:
+        system_status._executor.shutdown(wait=True)
+
+
+def test_slow_and_failing_collectors_are_reported_stale(monkeypatch, collectors):
+    monkeypatch.setattr(Config, "STATUS_COLLECTOR_WORKERS", 5)
+
+    status = system_status._collect_concurrently(max_apps=2, timeout=0.1)
+
+    assert status["stale"] == {"hostname": "timeout", "battery": "error"}
+    assert status["hostname"] == "Unknown"
+    assert status["battery"] == system_status._UNKNOWN["battery"]
+    assert status["memory"] == {"used": "1 GB"}
+    assert status["running_apps"] == ["A", "B"]
+
+    # The late collector still fills the cache for the next request
+    collectors.release.set()
+    system_status._executor.shutdown(wait=True)
+    monkeypatch.setattr(system_status, "_executor", None)
+    status = system_status._collect_concurrently(max_apps=2, timeout=0.1)
+    assert status["hostname"] == "mac"
+    assert collectors.calls["hostname"] == 1
+
+
+def test_queued_collectors_are_cancelled_at_the_deadline(monkeypatch, collectors):
+    # One worker: the blocked hostname collector holds it and the rest stay queued
+    monkeypatch.setattr(Config, "STATUS_COLLECTOR_WORKERS", 1)
+
+    status = system_status._collect_concurrently(max_apps=10, timeout=0.1)
+
+    assert set(status["stale"]) == set(system_status.COLLECTORS)
+    assert set(status["stale"].values()) == {"timeout"}
+    collectors.release.set()
+    system_status._executor.shutdown(wait=True)
+    # Cancelled collectors never ran
+    assert collectors.calls == {"hostname": 1, "memory": 0, "storage": 0, "battery": 0, "running_apps": 0}
+
+
+def test_loads_already_in_flight_are_waited_on_not_resubmitted(monkeypatch, collectors):
+    monkeypatch.setattr(Config, "STATUS_COLLECTOR_WORKERS", 5)
+    other = threading.Thread(target=system_status._cached, args=("hostname",))
+    other.start()
+    assert collectors.started.wait(5.0)
+
+    threading.Timer(0.05, collectors.release.set).start()
+    status = system_status._collect_concurrently(max_apps=10, timeout=2.0)
+    other.join(5.0)
+
+    assert status["hostname"] == "mac"
+    assert "hostname" not in status.get("stale", {})
+    assert collectors.calls["hostname"] == 1
+
+
+def test_unknown_values_do_not_share_nested_dicts():
+    first = system_status._parse_storage("garbage")
+    second = system_status._parse_storage("garbage")
+
+    first["raw"]["used"] = 123
+
+    assert second["raw"]["used"] is None
+    assert system_status._UNKNOWN["storage"]["raw"]["used"] is None
@@ -0,0 +1,100 @@
+"""
+Tests for the time-lapse recorder's queueing, file writing and camera keep-alive.
+"""
+import os
+import time
+
+from app.config import Config
+from app.services import timelapse
+from app.services.capture import Frame
+from app.services.timelapse import TimelapseRecorder, _Shot
+from benchmarks.fakes import synthetic_frame
+
+CAMERA = 3
+
+
+class FakeSession:
+    """Always has a frame; counts keep-alive touches."""
+
+    error = None
+
+    def __init__(self):
+        self.touches = 0
+        self.seq = 0
+
+    def latest(self, timeout=0):
+        self.seq += 1
+        return Frame(self.seq, time.time(), synthetic_frame(64, 48, seed=self.seq))
+
+    def touch(self):
+        self.touches += 1
+
+
+def _recorder(tmp_path, monkeypatch, **kwargs):
+    session = FakeSession()
+    monkeypatch.setattr(timelapse, "get_session", lambda camera_id: session)
+    return TimelapseRecorder([CAMERA], interval=60, directory=tmp_path, **kwargs), session
+
+
+def _shot(seq, timestamp=1700000000.0):
+    return _Shot(CAMERA, timestamp + seq / 100, synthetic_frame(64, 48, seed=seq))
+
+
+def test_full_queue_drops_without_blocking(tmp_path, monkeypatch):
+    recorder, _ = _recorder(tmp_path, monkeypatch, workers=1, queue_size=2)
+
+    started = time.monotonic()
+    for _ in range(5):
+        recorder._capture(CAMERA)  # No encoder is running, so the queue fills
+
+    assert time.monotonic() - started < 1.0
+    stats = recorder.stats()
+    assert stats["queued"] == [2]
+    assert stats["cameras"][CAMERA]["captured"] == 5
+    assert stats["cameras"][CAMERA]["dropped"] == 3
+
+
+def test_jpeg_is_written_then_renamed(tmp_path, monkeypatch):
+    recorder, _ = _recorder(tmp_path, monkeypatch)
+    renames = []
+
+    def replace(src, dst):
+        # The full image is on disk under the temporary name before it appears
+        assert os.path.getsize(src) > 0 and not os.path.exists(dst)
+        renames.append((src, dst))
+        os.rename(src, dst)
+
+    monkeypatch.setattr(timelapse.os, "replace", replace)
+    written = recorder._write_jpeg(_shot(1))
+
+    (src, dst), = renames
+    assert src.suffix == ".tmp" and dst.suffix == ".jpg"
+    assert dst.stat().st_size == written
+    assert not src.exists()
+
+
+def test_video_segments_rotate(tmp_path, monkeypatch):
+    recorder, _ = _recorder(tmp_path, monkeypatch, output_format="video", segment_frames=2, codec="MJPG")
+
+    for seq in range(5):
+        recorder._write_video(_shot(seq))
+    recorder._close_segment(CAMERA)
+
+    segments = sorted(tmp_path.glob(f"camera-{CAMERA}/*/*.avi"))
+    assert len(segments) == 3
+    assert recorder.stats()["cameras"][CAMERA]["bytes"] == sum(path.stat().st_size for path in segments)
+
+
+def test_long_interval_keeps_the_session_open(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "CAMERA_IDLE_TIMEOUT", 0.2)
+    recorder, session = _recorder(tmp_path, monkeypatch)
+
+    assert recorder.start()
+    try:
+        time.sleep(0.5)
+    finally:
+        recorder.stop(timeout=2.0)
+
+    # One capture is due per minute, but the session is touched every idle_timeout / 2
+    assert recorder.stats()["cameras"][CAMERA]["captured"] == 1
+    assert session.touches >= 3
@@ -0,0 +1,15 @@
+"""
+WSGI entry point for Mac Control.
+Exposes the Flask app defined in mac-control.py as `app` for WSGI servers.
+"""
+import importlib.util
+import sys
+from pathlib import Path
+
+# mac-control.py is not importable by name because of the hyphen
+_spec = importlib.util.spec_from_file_location("mac_control", Path(__file__).with_name("mac-control.py"))
+mac_control = importlib.util.module_from_spec(_spec)
+sys.modules["mac_control"] = mac_control
+_spec.loader.exec_module(mac_control)
+
+app = mac_control.APP